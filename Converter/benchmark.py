@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from converter import (
+    convert_imdb_tsv_to_json,
+    convert_large_tsv_streaming,
+    convert_tsv_parallel,
+    convert_tsv_vectorized,
+)
+
+TITLE_COLUMNS = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult',
+                 'startYear', 'endYear', 'runtimeMinutes', 'genres']
+NAME_COLUMNS = ['nconst', 'primaryName', 'birthYear', 'deathYear',
+                'primaryProfession', 'knownForTitles']
+
+TITLE_TYPES = ['movie', 'short', 'tvSeries', 'tvEpisode', 'tvMovie', 'video']
+GENRES = ['Action', 'Comedy', 'Documentary', 'Drama', 'Horror', 'Romance', 'Short', 'Animation']
+PROFESSIONS = ['actor', 'actress', 'director', 'producer', 'writer', 'composer']
+WORDS = ['The', 'Star', 'Night', 'Harbor', 'Love', 'Carmencita', 'Gök', 'Çiçek', 'Straße',
+         'Über', 'Null', 'nan', 'Le', 'clown', 'et', 'ses', 'chiens', 'O\'Brien', 'a\\b']
+
+
+def _maybe_null(rng: random.Random, value: str, probability: float = 0.1) -> str:
+    return '\\N' if rng.random() < probability else value
+
+
+def _title_row(rng: random.Random, i: int) -> list:
+    title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+    start_year = rng.randint(1890, 2025)
+    return [
+        f"tt{i:07d}",
+        rng.choice(TITLE_TYPES),
+        title,
+        title if rng.random() < 0.8 else title.upper(),
+        rng.choice(['0', '0', '0', '1']),
+        _maybe_null(rng, str(start_year)),
+        _maybe_null(rng, str(start_year + rng.randint(0, 10)), 0.9),
+        _maybe_null(rng, str(rng.randint(1, 240)), 0.3),
+        _maybe_null(rng, ','.join(rng.sample(GENRES, rng.randint(1, 3)))),
+    ]
+
+
+def _name_row(rng: random.Random, i: int) -> list:
+    birth_year = rng.randint(1850, 2010)
+    return [
+        f"nm{i:07d}",
+        f"{rng.choice(WORDS)} {rng.choice(WORDS)}",
+        _maybe_null(rng, str(birth_year), 0.4),
+        _maybe_null(rng, str(birth_year + rng.randint(20, 95)), 0.8),
+        _maybe_null(rng, ','.join(rng.sample(PROFESSIONS, rng.randint(1, 3)))),
+        _maybe_null(rng, ','.join(f"tt{rng.randint(1, 9999999):07d}" for _ in range(rng.randint(1, 4)))),
+    ]
+
+
+def make_synthetic_tsv(path: str, rows: int, kind: str = "title", seed: int = 42):
+    """
+    title.basics / name.basics biçiminde sentetik .tsv.gz dosyası üretir
+    """
+    if kind not in ("title", "name"):
+        raise ValueError(f"Geçersiz tür: {kind}")
+
+    rng = random.Random(seed)
+    columns, make_row = (TITLE_COLUMNS, _title_row) if kind == "title" else (NAME_COLUMNS, _name_row)
+
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        f.write('\t'.join(columns) + '\n')
+        for i in range(1, rows + 1):
+            f.write('\t'.join(make_row(rng, i)) + '\n')
+    return path
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _timed(func, *args, **kwargs) -> float:
+    # Dönüştürücülerin ilerleme çıktısı ölçümü bozmasın
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        return time.perf_counter() - start
+
+
+def run_benchmark(rows: int, kind: str, chunk_size: int, workdir: str):
+    tsv_path = make_synthetic_tsv(os.path.join(workdir, f"{kind}.basics.tsv.gz"), rows, kind)
+    print(f"🧪 Sentetik veri: {rows} satır ({kind}.basics)")
+
+    cases = [
+        ("streaming", convert_large_tsv_streaming, {'chunk_size': chunk_size}),
+        ("normal", convert_imdb_tsv_to_json, {}),
+    ]
+
+    for mode, baseline, baseline_options in cases:
+        baseline_path = os.path.join(workdir, f"{mode}_baseline.json")
+        vectorized_path = os.path.join(workdir, f"{mode}_vectorized.json")
+
+        baseline_time = _timed(baseline, tsv_path, baseline_path, **baseline_options)
+        vectorized_time = _timed(convert_tsv_vectorized, tsv_path, vectorized_path,
+                                 mode=mode, chunk_size=chunk_size)
+        identical = _file_digest(baseline_path) == _file_digest(vectorized_path)
+
+        print(f"\n📊 Mod: {mode}")
+        print(f"  - {baseline.__name__}: {baseline_time:.2f} sn ({rows / baseline_time:,.0f} kayıt/sn)")
+        print(f"  - convert_tsv_vectorized: {vectorized_time:.2f} sn ({rows / vectorized_time:,.0f} kayıt/sn)")
+        print(f"  - Hızlanma: {baseline_time / vectorized_time:.1f}x")
+        print(f"  - Byte düzeyinde aynı: {'✅' if identical else '❌'}")
+
+
+def run_scaling_benchmark(rows: int, kind: str, shard_size: int, worker_counts: list, workdir: str):
+    tsv_path = make_synthetic_tsv(os.path.join(workdir, f"{kind}.basics.tsv.gz"), rows, kind)
+    print(f"🧪 Sentetik veri: {rows} satır ({kind}.basics), shard: {shard_size} satır")
+
+    reference_path = os.path.join(workdir, "vectorized.json")
+    reference_time = _timed(convert_tsv_vectorized, tsv_path, reference_path, chunk_size=shard_size)
+    reference_digest = _file_digest(reference_path)
+    print(f"\n📊 Tek process (convert_tsv_vectorized): {reference_time:.2f} sn "
+          f"({rows / reference_time:,.0f} kayıt/sn)")
+
+    print(f"\n{'Worker':>8} {'Süre (sn)':>10} {'Kayıt/sn':>12} {'Hızlanma':>9}  Aynı")
+    for workers in worker_counts:
+        output_path = os.path.join(workdir, f"parallel_{workers}.json")
+        elapsed = _timed(convert_tsv_parallel, tsv_path, output_path,
+                         workers=workers, shard_size=shard_size)
+        identical = _file_digest(output_path) == reference_digest
+        print(f"{workers:>8} {elapsed:>10.2f} {rows / elapsed:>12,.0f} "
+              f"{reference_time / elapsed:>8.1f}x  {'✅' if identical else '❌'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converter benchmark (vektörel ve paralel)")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--kind", choices=["title", "name"], default="title")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=str, default=None,
+                        help="Paralel ölçekleme testi için worker sayıları, örn. 1,2,4,8,16")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.workers:
+            worker_counts = [int(w) for w in args.workers.split(',')]
+            run_scaling_benchmark(args.rows, args.kind, args.chunk_size, worker_counts, workdir)
+        else:
+            run_benchmark(args.rows, args.kind, args.chunk_size, workdir)
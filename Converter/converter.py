@@ -2,6 +2,15 @@ import pandas as pd
 import json
 import gzip
 import numpy as np
+import io
+import os
+import sys
+import unicodedata
+import functools
+import itertools
+import contextlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
 def clean_nan_values(obj):
@@ -25,9 +34,13 @@ def clean_nan_values(obj):
     else:
         return obj
 
-def convert_imdb_tsv_to_json(tsv_file_path: str, output_json_path: str, max_rows: Optional[int] = None):
+def convert_imdb_tsv_to_json(tsv_file_path: str, output_json_path: str, max_rows: Optional[int] = None,
+                             validate: str = "incremental", summary_path: Optional[str] = None):
     """
     IMDb TSV dosyasını JSON formatına dönüştürür (NaN değerleri düzeltilmiş)
+    
+    validate: "none", "incremental" (kayıt/null/tip sayımı) veya "full" (ek olarak streaming yeniden okuma)
+    summary_path: Verilirse doğrulama özeti bu JSON dosyasına yazılır
     """
     try:
         print(f"Dosya okunuyor: {tsv_file_path}")
@@ -103,6 +116,12 @@ def convert_imdb_tsv_to_json(tsv_file_path: str, output_json_path: str, max_rows
         # Final temizlik
         json_data = clean_nan_values(json_data)
         
+        # Artımlı doğrulama istatistikleri (dosyayı yeniden okumadan)
+        stats = ValidationStats() if validate != "none" else None
+        if stats is not None:
+            for record in json_data:
+                stats.observe_record(record)
+        
         # JSON dosyasına yaz
         print("JSON dosyası yazılıyor...")
         with open(output_json_path, 'w', encoding='utf-8') as f:
@@ -115,14 +134,7 @@ def convert_imdb_tsv_to_json(tsv_file_path: str, output_json_path: str, max_rows
         print(f"✅ Başarıyla dönüştürüldü: {output_json_path}")
         print(f"📊 JSON dosyası {len(json_data)} kayıt içeriyor")
         
-        # JSON validation test
-        print("🔍 JSON validation testi...")
-        try:
-            with open(output_json_path, 'r', encoding='utf-8') as f:
-                test_data = json.load(f)
-            print("✅ JSON dosyası geçerli!")
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON validation hatası: {e}")
+        report_validation(stats, output_json_path, validate, "json", summary_path)
         
         return json_data
         
@@ -164,12 +176,17 @@ def preview_data(tsv_file_path: str, num_rows: int = 5):
         print(f"❌ Önizleme hatası: {e}")
         return None
 
-def convert_large_tsv_streaming(tsv_file_path: str, output_json_path: str, chunk_size: int = 10000):
+def convert_large_tsv_streaming(tsv_file_path: str, output_json_path: str, chunk_size: int = 10000,
+                                validate: str = "incremental", summary_path: Optional[str] = None):
     """
     Büyük dosyalar için streaming converter (NaN değerleri düzeltilmiş)
+    
+    validate: "none", "incremental" (yazarken kayıt/null/tip sayımı) veya "full" (ek olarak streaming yeniden okuma)
+    summary_path: Verilirse doğrulama özeti bu JSON dosyasına yazılır
     """
     try:
         print(f"🚀 Streaming conversion başlıyor...")
+        stats = ValidationStats() if validate != "none" else None
         
         with open(output_json_path, 'w', encoding='utf-8') as f:
             f.write('[\n')
@@ -222,6 +239,8 @@ def convert_large_tsv_streaming(tsv_file_path: str, output_json_path: str, chunk
                     
                     json.dump(record, f, ensure_ascii=False, default=str)
                     total_rows += 1
+                    if stats is not None:
+                        stats.observe_record(record)
                 
                 print(f"  ✅ Toplam işlenen: {total_rows} kayıt")
             
@@ -230,27 +249,1101 @@ def convert_large_tsv_streaming(tsv_file_path: str, output_json_path: str, chunk
         print(f"🎉 Streaming conversion tamamlandı!")
         print(f"📊 Toplam {total_rows} kayıt işlendi")
         
-        # Validation test
-        print("🔍 JSON validation testi...")
-        try:
-            with open(output_json_path, 'r', encoding='utf-8') as f:
-                json.load(f)
-            print("✅ JSON dosyası geçerli!")
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON validation hatası: {e}")
+        report_validation(stats, output_json_path, validate, "json", summary_path)
         
     except Exception as e:
         print(f"❌ Streaming conversion hatası: {e}")
         import traceback
         traceback.print_exc()
 
+# Vektörel dönüştürme motoru
+IMDB_NUMERIC_COLUMNS = ['isAdult', 'startYear', 'endYear', 'runtimeMinutes', 'birthYear', 'deathYear',
+                        'ordering', 'numVotes']
+# Arrow'da int32 yerine int64 yazılan sayısal sütunlar (üst sınırı olmayan sayaçlar); tip sütun başına
+# sabittir çünkü bir dosyanın tüm chunk'ları aynı şemayla yazılır
+IMDB_INT64_COLUMNS = ['numVotes']
+# Ondalıklı sayısal sütunlar (title.ratings)
+IMDB_FLOAT_COLUMNS = ['averageRating']
+IMDB_NA_VALUES = ['\\N', 'NaN', 'nan', 'NULL', 'null', '']
+_NULL_STRINGS = ['nan', 'null', '\\n', '']
+
+# Arama şeması (mode="search")
+IMDB_LIST_COLUMNS = ['genres', 'primaryProfession', 'knownForTitles']
+SEARCH_KEY_COLUMNS = {'primaryTitle': 'primaryTitleKey', 'originalTitle': 'originalTitleKey',
+                      'primaryName': 'primaryNameKey'}
+CONVERSION_MODES = ("streaming", "normal", "search")
+
+@functools.lru_cache(maxsize=1)
+def _combining_marks_table() -> dict:
+    return {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.combining(chr(cp))}
+
+def fold_text(text: str) -> str:
+    """
+    Arama anahtarı: NFKD + aksan işaretlerini sil + casefold + boşlukları tekle ("Çiçek  Straße" -> "cicek strasse")
+    """
+    if text.isascii():
+        return ' '.join(text.lower().split())
+    decomposed = unicodedata.normalize('NFKD', text).translate(_combining_marks_table())
+    return ' '.join(decomposed.casefold().split())
+
+def fold_series(series: pd.Series) -> pd.Series:
+    """fold_text'in sütun bazlı (vektörel) karşılığı"""
+    return (series.str.normalize('NFKD')
+                  .str.translate(_combining_marks_table())
+                  .str.casefold()
+                  .str.replace(r'\s+', ' ', regex=True)
+                  .str.strip())
+
+def _encode_numeric_column(series: pd.Series, integral_floats: bool):
+    """
+    Sayısal sütunu toplu olarak JSON parçalarına dönüştürür.
+    integral_floats=True ise tam sayı değerli float'lar int olarak yazılır (streaming modu).
+    
+    Returns:
+        (parçalar, doğrulama sayıları) ikilisi
+    """
+    values = pd.to_numeric(series, errors='coerce')
+    if values.dtype.kind in 'iu':
+        return values.astype(str).tolist(), {'nulls': 0, 'invalid': 0, 'types': {'int': len(values)}}
+    
+    floats = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    null_mask = ~np.isfinite(floats)
+    fragments = np.array(list(map(float.__repr__, floats.tolist())), dtype=object)
+    
+    int_count = 0
+    if integral_floats:
+        integral_mask = ~null_mask & (np.mod(np.where(null_mask, 0, floats), 1) == 0)
+        fragments[integral_mask] = list(map(str, floats[integral_mask].astype(np.int64).tolist()))
+        int_count = int(integral_mask.sum())
+    
+    fragments[null_mask] = 'null'
+    null_count = int(null_mask.sum())
+    counts = {
+        'nulls': null_count,
+        # Kaynakta değer olup sayıya çevrilemeyenler
+        'invalid': int((null_mask & series.notna().to_numpy()).sum()),
+        'types': {'int': int_count, 'float': len(floats) - null_count - int_count},
+    }
+    return fragments.tolist(), counts
+
+def _encode_string_column(series: pd.Series, lowercase_nulls: bool):
+    """
+    String sütununu toplu olarak JSON parçalarına dönüştürür.
+    lowercase_nulls=True ise 'Null', 'NAN' gibi değerler de null sayılır (normal mod).
+    
+    Returns:
+        (parçalar, doğrulama sayıları) ikilisi
+    """
+    null_mask = series.isna().to_numpy()
+    if lowercase_nulls:
+        null_mask = null_mask | series.str.lower().isin(_NULL_STRINGS).to_numpy()
+    
+    fragments = np.array(series.tolist(), dtype=object)
+    valid = ~null_mask
+    fragments[valid] = list(map(json.encoder.encode_basestring, fragments[valid].tolist()))
+    fragments[null_mask] = 'null'
+    null_count = int(null_mask.sum())
+    return fragments.tolist(), {'nulls': null_count, 'invalid': 0, 'types': {'str': len(fragments) - null_count}}
+
+def _encode_list_column(series: pd.Series):
+    """
+    Virgülle ayrılmış sütunu ("Drama,Short") JSON dizisine (["Drama", "Short"]) dönüştürür.
+    JSON kaçışları virgül üretmediği için önce tüm değer kodlanır, sonra virgüller bölünür.
+    """
+    null_mask = series.isna().to_numpy()
+    fragments = np.full(len(series), 'null', dtype=object)
+    valid = ~null_mask
+    encoded = pd.Series(list(map(json.encoder.encode_basestring, series[valid].tolist())), dtype=object)
+    fragments[valid] = ('[' + encoded.str.replace(',', '", "', regex=False) + ']').tolist()
+    null_count = int(null_mask.sum())
+    return fragments.tolist(), {'nulls': null_count, 'invalid': 0, 'types': {'list': len(fragments) - null_count}}
+
+def encode_dataframe_columns(df: pd.DataFrame, mode: str = "streaming",
+                             stats: Optional["ValidationStats"] = None) -> list:
+    """
+    DataFrame'in her sütununu '"sütun": değer' biçiminde JSON parçalarına dönüştürür.
+    Hücre başına Python döngüsü yoktur; NaN temizliği ve tip dönüştürme sütun bazında yapılır.
+    
+    Args:
+        df: dtype=str ile okunmuş DataFrame
+        mode: "streaming" (convert_large_tsv_streaming çıktısı),
+              "normal" (convert_imdb_tsv_to_json çıktısı) veya
+              "search" (streaming + liste alanları dizi + aranabilir anahtar alanları)
+        stats: Verilirse sütun başına null/tip sayıları buraya eklenir
+    """
+    if mode not in CONVERSION_MODES:
+        raise ValueError(f"Geçersiz mod: {mode}")
+    
+    separator = ': '
+    prefix = '    ' if mode == "normal" else ''
+    encoded = []
+    for col in df.columns:
+        if col in IMDB_NUMERIC_COLUMNS:
+            fragments, counts = _encode_numeric_column(df[col], integral_floats=(mode != "normal"))
+        elif col in IMDB_FLOAT_COLUMNS:
+            fragments, counts = _encode_numeric_column(df[col], integral_floats=False)
+        elif mode == "search" and col in IMDB_LIST_COLUMNS:
+            fragments, counts = _encode_list_column(df[col])
+        else:
+            fragments, counts = _encode_string_column(df[col], lowercase_nulls=(mode == "normal"))
+        encoded.append((col, fragments, counts))
+    
+    if mode == "search":
+        for col, key_col in SEARCH_KEY_COLUMNS.items():
+            if col in df.columns:
+                fragments, counts = _encode_string_column(fold_series(df[col]), lowercase_nulls=False)
+                encoded.append((key_col, fragments, counts))
+    
+    columns = []
+    for col, fragments, counts in encoded:
+        if stats is not None:
+            stats.observe_column(col, **counts)
+        key = prefix + json.encoder.encode_basestring(str(col)) + separator
+        columns.append([key + fragment for fragment in fragments])
+    return columns
+
+def encode_dataframe_records(df: pd.DataFrame, mode: str = "streaming",
+                             stats: Optional["ValidationStats"] = None) -> list:
+    """
+    DataFrame'i kayıt başına JSON metinlerine dönüştürür (byte düzeyinde eski çıktıyla aynı).
+    """
+    if stats is not None:
+        stats.records += len(df)
+    columns = encode_dataframe_columns(df, mode, stats)
+    if not columns:
+        return ['  {}' if mode == "normal" else '{}'] * len(df)
+    if mode != "normal":
+        return ['{' + ', '.join(parts) + '}' for parts in zip(*columns)]
+    return ['  {\n' + ',\n'.join(parts) + '\n  }' for parts in zip(*columns)]
+
+# Doğrulama
+VALIDATION_MODES = ("none", "incremental", "full")
+
+def _json_type_name(value) -> str:
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, np.integer)):
+        return 'int'
+    if isinstance(value, (float, np.floating)):
+        return 'float'
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, list):
+        return 'list'
+    return type(value).__name__
+
+class ValidationStats:
+    """
+    Çıktı yazılırken toplanan artımlı doğrulama istatistikleri.
+    
+    Kayıt sayısını, sütun başına null / geçersiz değer sayılarını ve değer tiplerini tutar;
+    verinin kendisini bellekte tutmaz. Worker'lardan gelen istatistikler merge ile birleştirilir.
+    """
+    MAX_ERRORS = 20
+    
+    def __init__(self):
+        self.records = 0
+        self.columns = {}
+        self.errors = []
+    
+    def _column(self, column: str) -> dict:
+        return self.columns.setdefault(column, {'nulls': 0, 'invalid': 0, 'types': {}})
+    
+    def add_error(self, message: str):
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(message)
+    
+    def observe_column(self, column: str, nulls: int = 0, types: Optional[dict] = None, invalid: int = 0):
+        """Bir sütun parçasının toplu sayılarını ekler ve beklenen tipi kontrol eder"""
+        entry = self._column(column)
+        entry['nulls'] += nulls
+        entry['invalid'] += invalid
+        if column in IMDB_NUMERIC_COLUMNS or column in IMDB_FLOAT_COLUMNS:
+            expected = ('int', 'float')
+        elif column in IMDB_LIST_COLUMNS:
+            expected = ('str', 'list')
+        else:
+            expected = ('str',)
+        for type_name, count in (types or {}).items():
+            if not count:
+                continue
+            entry['types'][type_name] = entry['types'].get(type_name, 0) + count
+            if type_name not in expected:
+                self.add_error(f"{column}: beklenmeyen tip {type_name} ({count} değer)")
+    
+    def observe_record(self, record: dict):
+        """Tek bir kaydı ekler (kayıt bazlı dönüştürücüler ve tam doğrulama için)"""
+        self.records += 1
+        for column, value in record.items():
+            if value is None:
+                self.observe_column(column, nulls=1)
+            else:
+                self.observe_column(column, types={_json_type_name(value): 1})
+    
+    def merge(self, other: "ValidationStats"):
+        self.records += other.records
+        for column, counts in other.columns.items():
+            entry = self._column(column)
+            entry['nulls'] += counts['nulls']
+            entry['invalid'] += counts['invalid']
+            for type_name, count in counts['types'].items():
+                entry['types'][type_name] = entry['types'].get(type_name, 0) + count
+        for error in other.errors:
+            self.add_error(error)
+    
+    def compare(self, other: "ValidationStats"):
+        """Yazım sırasındaki sayıları dosyadan yeniden okunan sayılarla karşılaştırır"""
+        if self.records != other.records:
+            self.add_error(f"Kayıt sayısı uyuşmuyor: yazılan {self.records}, okunan {other.records}")
+        for column in sorted(set(self.columns) | set(other.columns)):
+            written = self.columns.get(column, {'nulls': 0, 'types': {}})
+            read = other.columns.get(column, {'nulls': 0, 'types': {}})
+            if written['nulls'] != read['nulls']:
+                self.add_error(f"{column}: null sayısı uyuşmuyor (yazılan {written['nulls']}, okunan {read['nulls']})")
+            written_types = {k: v for k, v in written['types'].items() if v}
+            read_types = {k: v for k, v in read['types'].items() if v}
+            if written_types != read_types:
+                self.add_error(f"{column}: tip sayıları uyuşmuyor (yazılan {written_types}, okunan {read_types})")
+        for error in other.errors:
+            self.add_error(error)
+    
+    def summary(self) -> dict:
+        return {
+            'valid': not self.errors,
+            'records': self.records,
+            'columns': {
+                column: {
+                    'nulls': counts['nulls'],
+                    'invalid': counts['invalid'],
+                    'types': {k: v for k, v in counts['types'].items() if v},
+                }
+                for column, counts in self.columns.items()
+            },
+            'errors': list(self.errors),
+        }
+
+def _open_text(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def _iter_json_array(f, block_size: int = 1 << 20):
+    """
+    JSON dizisini tamamını belleğe almadan kayıt kayıt okur.
+    Yapı ('[', ',', ']') sıkı biçimde kontrol edilir; hatalarda ValueError fırlatılır.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+    
+    def refill() -> bool:
+        nonlocal buffer, pos
+        more = f.read(block_size)
+        buffer, pos = buffer[pos:] + more, 0
+        return bool(more)
+    
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not refill():
+                return ''
+    
+    if next_char() != '[':
+        raise ValueError("JSON dizisi '[' ile başlamalı")
+    pos += 1
+    
+    if next_char() == ']':
+        pos += 1
+    else:
+        while True:
+            if not next_char():
+                raise ValueError("Beklenmeyen dosya sonu")
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    if not refill():
+                        raise
+            yield record
+            pos = end
+            
+            char = next_char()
+            if char == ',':
+                pos += 1
+            elif char == ']':
+                pos += 1
+                break
+            elif not char:
+                raise ValueError("Beklenmeyen dosya sonu")
+            else:
+                raise ValueError(f"Beklenmeyen karakter: {char!r}")
+    
+    if next_char():
+        raise ValueError("JSON dizisinden sonra fazladan veri var")
+
+def detect_output_format(path: str) -> str:
+    """Dosya uzantısından çıktı formatını tahmin eder"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.parquet'):
+        return "parquet"
+    if name.endswith(('.arrow', '.feather')):
+        return "arrow"
+    if name.endswith(('.ndjson', '.jsonl')):
+        return "ndjson"
+    return "json"
+
+def iter_output_records(path: str, output_format: Optional[str] = None):
+    """
+    Dönüştürücü çıktısını (json, ndjson, parquet, arrow) kayıt kayıt okur.
+    Dosyanın tamamı belleğe alınmaz.
+    """
+    output_format = output_format or detect_output_format(path)
+    if output_format == "json":
+        with _open_text(path) as f:
+            yield from _iter_json_array(f)
+    elif output_format == "ndjson":
+        with _open_text(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif output_format == "parquet":
+        pa = _import_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=65536):
+            yield from batch.to_pylist()
+    elif output_format == "arrow":
+        pa = _import_pyarrow()
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield from reader.get_batch(i).to_pylist()
+    else:
+        raise ValueError(f"Geçersiz çıktı formatı: {output_format}")
+
+def validate_output_file(path: str, output_format: Optional[str] = None,
+                         stats: Optional[ValidationStats] = None) -> ValidationStats:
+    """
+    Tam streaming doğrulama: dosyayı baştan sona okuyup sayıları yeniden hesaplar.
+    Bellek kullanımı dosya boyutundan bağımsızdır.
+    """
+    stats = stats if stats is not None else ValidationStats()
+    try:
+        for record in iter_output_records(path, output_format):
+            stats.observe_record(record)
+    except (ValueError, OSError) as e:
+        stats.add_error(f"{path}: okunamadı ({e})")
+    return stats
+
+def report_validation(stats: Optional[ValidationStats], output_paths, validate: str = "incremental",
+                      output_format: Optional[str] = None, summary_path: Optional[str] = None) -> Optional[dict]:
+    """
+    Doğrulama sonucunu yazdırır, istenirse JSON özet dosyasına yazar ve özeti döndürür.
+    validate="full" ise çıktı dosyaları ayrıca streaming olarak yeniden okunup karşılaştırılır.
+    """
+    if validate == "none" or stats is None:
+        return None
+    
+    if validate == "full":
+        print("🔍 Tam streaming validation...")
+        read_stats = ValidationStats()
+        for path in ([output_paths] if isinstance(output_paths, str) else output_paths):
+            validate_output_file(path, output_format, read_stats)
+        stats.compare(read_stats)
+    
+    summary = stats.summary()
+    summary['mode'] = validate
+    
+    if summary['valid']:
+        print(f"✅ Validation başarılı: {summary['records']} kayıt")
+    else:
+        print(f"❌ Validation hataları ({len(summary['errors'])}):")
+        for error in summary['errors']:
+            print(f"  - {error}")
+    
+    if summary_path:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"📋 Validation özeti yazıldı: {summary_path}")
+    
+    return summary
+
+# Çıktı formatları
+OUTPUT_FORMATS = ("json", "ndjson", "parquet", "arrow")
+_JSON_LAYOUTS = {
+    # mod: (açılış, kayıt ayırıcı, kapanış, boş dosya)
+    "streaming": ('[\n  ', ',\n  ', '\n]', '[\n\n]'),
+    "normal": ('[\n', ',\n', '\n]', '[]'),
+}
+_JSON_LAYOUTS["search"] = _JSON_LAYOUTS["streaming"]
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet/Arrow çıktısı için pyarrow gerekli: pip install pyarrow")
+    return pyarrow
+
+def dataframe_to_arrow(df: pd.DataFrame, stats: Optional[ValidationStats] = None, mode: str = "streaming"):
+    """
+    DataFrame'i tipli bir Arrow tablosuna dönüştürür.
+    Sayısal IMDb sütunları nullable int32 (IMDB_INT64_COLUMNS int64), diğerleri string olur; tam sayı
+    olmayan veya tipe sığmayan değerler null (invalid) sayılır.
+    mode="search" ise liste alanları list<string> olur ve anahtar alanları eklenir.
+    """
+    pa = _import_pyarrow()
+    if mode == "search":
+        df = df.copy()
+        for col, key_col in SEARCH_KEY_COLUMNS.items():
+            if col in df.columns:
+                df[key_col] = fold_series(df[col])
+    
+    arrays = []
+    for col in df.columns:
+        if col in IMDB_NUMERIC_COLUMNS:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            finite = np.isfinite(values)
+            dtype = np.int64 if col in IMDB_INT64_COLUMNS else np.int32
+            # Tipe sığmayan değerler taşmak yerine tam sayı olmayanlar gibi null (invalid) sayılır
+            bound = 2.0 ** (np.iinfo(dtype).bits - 1)
+            valid = (finite & (np.mod(np.where(finite, values, 0), 1) == 0)
+                     & (values >= -bound) & (values < bound))
+            array = pa.array(np.where(valid, values, 0).astype(dtype), mask=~valid, type=pa.from_numpy_dtype(dtype))
+            invalid = int((~valid & df[col].notna().to_numpy()).sum())
+            type_counts = {'int': len(array) - array.null_count}
+        elif col in IMDB_FLOAT_COLUMNS:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            array = pa.array(values, mask=~np.isfinite(values), type=pa.float64())
+            invalid = int((~np.isfinite(values) & df[col].notna().to_numpy()).sum())
+            type_counts = {'float': len(array) - array.null_count}
+        elif mode == "search" and col in IMDB_LIST_COLUMNS:
+            array = pa.array(df[col].str.split(',').to_numpy(dtype=object, na_value=None),
+                             type=pa.list_(pa.string()))
+            invalid = 0
+            type_counts = {'list': len(array) - array.null_count}
+        else:
+            array = pa.array(df[col].to_numpy(dtype=object, na_value=None), type=pa.string())
+            invalid = 0
+            type_counts = {'str': len(array) - array.null_count}
+        if stats is not None:
+            stats.observe_column(col, nulls=array.null_count, types=type_counts, invalid=invalid)
+        arrays.append(array)
+    if stats is not None:
+        stats.records += len(df)
+    return pa.Table.from_arrays(arrays, names=[str(col) for col in df.columns])
+
+def encode_payload(df: pd.DataFrame, output_format: str = "json", mode: str = "streaming",
+                   validate: bool = True):
+    """
+    DataFrame'i OutputWriter'a yazılmaya hazır (kayıt sayısı, veri, istatistik) üçlüsüne dönüştürür.
+    Worker process'lerde çalıştırılabilir; veri json/ndjson için metin, parquet/arrow için Arrow
+    tablosudur. validate=False ise istatistik None döner.
+    """
+    stats = ValidationStats() if validate else None
+    if output_format == "json":
+        records = encode_dataframe_records(df, mode, stats)
+        return len(records), _JSON_LAYOUTS[mode][1].join(records), stats
+    if output_format == "ndjson":
+        records = encode_dataframe_records(df, "search" if mode == "search" else "streaming", stats)
+        return len(records), ''.join(record + '\n' for record in records), stats
+    return len(df), dataframe_to_arrow(df, stats, mode), stats
+
+class OutputWriter:
+    """
+    Chunk chunk kayıt yazan çıktı hedefi.
+    
+    Formatlar:
+        json: Tek JSON dizisi (mode ile streaming, normal veya search düzeni)
+        ndjson: Satır başına bir kayıt; dosya adı .gz ile bitiyorsa gzip ile sıkıştırılır
+        parquet / arrow: Tipli sütunlu format (pyarrow gerekir)
+    """
+    
+    def __init__(self, path: str, output_format: str = "json", mode: str = "streaming",
+                 validate: bool = True):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Geçersiz çıktı formatı: {output_format} (seçenekler: {', '.join(OUTPUT_FORMATS)})")
+        if mode not in _JSON_LAYOUTS:
+            raise ValueError(f"Geçersiz mod: {mode}")
+        if mode == "normal" and output_format != "json":
+            raise ValueError("Normal mod yalnızca json formatı ile kullanılabilir")
+        
+        self.path = path
+        self.output_format = output_format
+        self.mode = mode
+        self.count = 0
+        # Yazım sırasında toplanan artımlı doğrulama istatistikleri
+        self.stats = ValidationStats() if validate else None
+        self._file = None
+        self._table_writer = None
+        
+        if output_format == "json":
+            self._file = open(path, 'w', encoding='utf-8')
+        elif output_format == "ndjson":
+            if path.endswith('.gz'):
+                self._file = gzip.open(path, 'wt', encoding='utf-8')
+            else:
+                self._file = open(path, 'w', encoding='utf-8')
+        else:
+            _import_pyarrow()
+    
+    def write_frame(self, df: pd.DataFrame) -> int:
+        count, data, stats = encode_payload(df, self.output_format, self.mode, self.stats is not None)
+        self.write_payload(count, data, stats)
+        return count
+    
+    def write_payload(self, count: int, data, stats: Optional[ValidationStats] = None):
+        """encode_payload çıktısını dosyaya ekler"""
+        if self.stats is not None and stats is not None:
+            self.stats.merge(stats)
+        if count == 0:
+            return
+        
+        if self.output_format == "json":
+            opening, separator, _, _ = _JSON_LAYOUTS[self.mode]
+            self._file.write(opening if self.count == 0 else separator)
+            self._file.write(data)
+        elif self.output_format == "ndjson":
+            self._file.write(data)
+        else:
+            self._write_table(data)
+        self.count += count
+    
+    def _write_table(self, table):
+        if self._table_writer is None:
+            pa = _import_pyarrow()
+            if self.output_format == "parquet":
+                self._table_writer = pa.parquet.ParquetWriter(self.path, table.schema, compression='zstd')
+            else:
+                self._table_writer = pa.ipc.new_file(self.path, table.schema)
+        self._table_writer.write_table(table)
+    
+    def close(self):
+        if self.output_format == "json" and self._file is not None:
+            _, _, closing, empty = _JSON_LAYOUTS[self.mode]
+            self._file.write(closing if self.count else empty)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._table_writer is not None:
+            self._table_writer.close()
+            self._table_writer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _read_tsv_chunks(tsv_file_path: str, mode: str, chunk_size: int, max_rows: Optional[int]):
+    read_options = dict(sep='\t',
+                        compression='gzip',
+                        na_values=IMDB_NA_VALUES,
+                        keep_default_na=True,
+                        nrows=max_rows,
+                        low_memory=False,
+                        dtype=str)
+    if mode != "normal":
+        return pd.read_csv(tsv_file_path, chunksize=chunk_size, **read_options)
+    return [pd.read_csv(tsv_file_path, **read_options)]
+
+def convert_tsv_vectorized(tsv_file_path: str, output_json_path: str, mode: str = "streaming",
+                           chunk_size: int = 100000, max_rows: Optional[int] = None,
+                           output_format: str = "json", validate: str = "incremental",
+                           summary_path: Optional[str] = None):
+    """
+    IMDb TSV dosyasını sütun bazlı (vektörel) olarak dönüştürür.
+    
+    mode="streaming" çıktısı convert_large_tsv_streaming ile, mode="normal" çıktısı
+    convert_imdb_tsv_to_json ile byte düzeyinde aynıdır. Normal modda sayısal sütunların
+    int/float tipi tüm dosyaya bağlı olduğundan dosya tek parça okunur. mode="search"
+    arama şemasını üretir: genres / primaryProfession / knownForTitles dizi, yıllar int,
+    ve primaryTitleKey / originalTitleKey / primaryNameKey (küçük harf, aksansız) alanları.
+    
+    Args:
+        output_format: "json", "ndjson" (.gz uzantısı ile sıkıştırılmış), "parquet" veya "arrow"
+        validate: "none", "incremental" (yazarken sayım) veya "full" (ek olarak streaming yeniden okuma)
+        summary_path: Verilirse doğrulama özeti bu JSON dosyasına yazılır
+    
+    Returns:
+        Yazılan kayıt sayısı (hata durumunda None)
+    """
+    try:
+        print(f"⚡ Vektörel conversion başlıyor ({mode}, {output_format})...")
+        
+        with OutputWriter(output_json_path, output_format, mode, validate != "none") as writer:
+            for chunk_num, chunk in enumerate(_read_tsv_chunks(tsv_file_path, mode, chunk_size, max_rows), 1):
+                writer.write_frame(chunk)
+                print(f"📦 Chunk {chunk_num}: toplam {writer.count} kayıt")
+        
+        print(f"✅ Vektörel conversion tamamlandı: {output_json_path}")
+        print(f"📊 Toplam {writer.count} kayıt işlendi")
+        report_validation(writer.stats, output_json_path, validate, output_format, summary_path)
+        return writer.count
+        
+    except Exception as e:
+        print(f"❌ Vektörel conversion hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# Paralel (sharded) dönüştürme
+def _read_shard_frame(header: str, shard_text: str) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(header + shard_text),
+                       sep='\t',
+                       na_values=IMDB_NA_VALUES,
+                       keep_default_na=True,
+                       low_memory=False,
+                       dtype=str)
+
+def _convert_shard(header: str, shard_text: str, output_format: str = "json",
+                   part_path: Optional[str] = None, mode: str = "streaming"):
+    """
+    Worker: tek bir shard'ı (satır hizalı TSV metni) dönüştürür.
+    part_path verilirse shard kendi part dosyasına yazılır, aksi halde encode_payload çıktısı döndürülür.
+    """
+    df = _read_shard_frame(header, shard_text)
+    if part_path is None:
+        return encode_payload(df, output_format, mode)
+    
+    with OutputWriter(part_path, output_format, mode) as writer:
+        writer.write_frame(df)
+    return writer.count, None, writer.stats
+
+def iter_tsv_shards(tsv_file_path: str, shard_size: int):
+    """
+    Sıkıştırılmış TSV'yi açar; başlık satırını ve satır hizalı shard metinlerini döndürür.
+    Not: Shard sınırları satır sonlarındadır; birden fazla satıra yayılan tırnaklı alanlar desteklenmez.
+    """
+    f = gzip.open(tsv_file_path, 'rt', encoding='utf-8', newline='')
+    header = f.readline()
+    
+    def shards():
+        with f:
+            while True:
+                lines = list(itertools.islice(f, shard_size))
+                if not lines:
+                    break
+                yield ''.join(lines)
+    
+    return header, shards()
+
+def part_file_path(output_json_path: str, part_number: int) -> str:
+    """
+    Part dosyası adı; sıkıştırma uzantısı ile birlikte tüm uzantı korunur
+    (movies.ndjson.gz -> movies.part-00001.ndjson.gz), böylece detect_output_format formatı tanır.
+    """
+    root, ext = os.path.splitext(output_json_path)
+    if ext == '.gz':
+        root, inner_ext = os.path.splitext(root)
+        ext = inner_ext + ext
+    return f"{root}.part-{part_number:05d}{ext or '.json'}"
+
+def convert_tsv_parallel(tsv_file_path: str, output_json_path: str, workers: Optional[int] = None,
+                         shard_size: int = 200000, part_files: bool = False, output_format: str = "json",
+                         validate: str = "incremental", summary_path: Optional[str] = None,
+                         mode: str = "streaming"):
+    """
+    TSV dosyasını satır hizalı shard'lara bölüp process pool'da dönüştürür.
+    
+    Ana process gzip açma ve satır bölmeyi yapar; worker'lar pandas ile okuma, tip
+    dönüştürme ve JSON kodlamayı yapar. Çıktı orijinal sırayla tek dosyaya yazılır ve
+    convert_large_tsv_streaming çıktısıyla byte düzeyinde aynıdır. part_files=True ise
+    her shard numaralı ayrı bir JSON dosyasına (data.part-00001.json, ...) yazılır.
+    Bellekte en fazla 2 * workers shard bulunur.
+    
+    Args:
+        tsv_file_path: .tsv.gz dosya yolu
+        output_json_path: Çıktı JSON dosya yolu (part dosyaları için ad şablonu)
+        workers: Process sayısı (varsayılan: CPU sayısı)
+        shard_size: Shard başına satır sayısı
+        part_files: Her shard'ı ayrı dosyaya yaz
+        output_format: "json", "ndjson" (.gz uzantısı ile sıkıştırılmış), "parquet" veya "arrow"
+        validate: "none", "incremental" (worker istatistikleri birleştirilir) veya "full"
+        summary_path: Verilirse doğrulama özeti bu JSON dosyasına yazılır
+        mode: "streaming" veya "search" (arama şeması, bkz. convert_tsv_vectorized)
+    
+    Returns:
+        Yazılan kayıt sayısı (hata durumunda None)
+    """
+    if mode == "normal":
+        raise ValueError("Paralel conversion normal modu desteklemez")
+    workers = workers or os.cpu_count() or 1
+    try:
+        print(f"🚀 Paralel conversion başlıyor ({workers} worker, shard: {shard_size} satır)...")
+        
+        header, shards = iter_tsv_shards(tsv_file_path, shard_size)
+        total_rows = 0
+        part_paths = []
+        stats = ValidationStats() if validate != "none" else None
+        
+        output = contextlib.nullcontext() if part_files else OutputWriter(output_json_path, output_format,
+                                                                          mode, validate=False)
+        with ProcessPoolExecutor(max_workers=workers) as pool, output as writer:
+            pending = deque()
+            
+            def collect(future):
+                nonlocal total_rows
+                count, data, shard_stats = future.result()
+                if not part_files:
+                    writer.write_payload(count, data)
+                if stats is not None:
+                    stats.merge(shard_stats)
+                total_rows += count
+                print(f"📦 Shard tamamlandı: toplam {total_rows} kayıt")
+            
+            for shard_number, shard_text in enumerate(shards, 1):
+                part_path = part_file_path(output_json_path, shard_number) if part_files else None
+                if part_path:
+                    part_paths.append(part_path)
+                pending.append(pool.submit(_convert_shard, header, shard_text, output_format, part_path, mode))
+                # Backpressure: sırayla topla, bellekte sınırlı sayıda shard tut
+                if len(pending) >= 2 * workers:
+                    collect(pending.popleft())
+            
+            while pending:
+                collect(pending.popleft())
+        
+        print("🎉 Paralel conversion tamamlandı!")
+        if part_files:
+            print(f"📁 {len(part_paths)} part dosyası yazıldı")
+        print(f"📊 Toplam {total_rows} kayıt işlendi")
+        report_validation(stats, part_paths if part_files else output_json_path,
+                          validate, output_format, summary_path)
+        return total_rows
+        
+    except Exception as e:
+        print(f"❌ Paralel conversion hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# Artımlı (delta) dönüştürme
+FORMAT_EXTENSIONS = {"json": ".json", "ndjson": ".ndjson.gz", "parquet": ".parquet", "arrow": ".arrow"}
+
+class TsvFingerprints:
+    """
+    Bir IMDb dump'ının kompakt parmak izi: anahtar (tconst/nconst) başına satır hash'i.
+    
+    Anahtarlar sayısal kısımlarıyla (tt0000001 -> 1) int64, hash'ler uint64 olarak
+    sıralı numpy dizilerinde tutulur; satır başına 16 byte yer kaplar.
+    """
+    
+    def __init__(self, key_column: str, prefix: str, width: int, keys: np.ndarray, hashes: np.ndarray):
+        self.key_column = key_column
+        self.prefix = prefix
+        self.width = width
+        self.keys = keys
+        self.hashes = hashes
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def format_keys(self, keys: np.ndarray) -> list:
+        """Sayısal anahtarları IMDb biçimine geri çevirir (1 -> tt0000001)"""
+        return [f"{self.prefix}{key:0{self.width}d}" for key in keys.tolist()]
+    
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            np.savez(f, keys=self.keys, hashes=self.hashes,
+                     meta=np.array([self.key_column, self.prefix, str(self.width)]))
+    
+    @classmethod
+    def load(cls, path: str) -> "TsvFingerprints":
+        with np.load(path) as data:
+            key_column, prefix, width = data['meta'].tolist()
+            return cls(key_column, prefix, int(width), data['keys'], data['hashes'])
+
+def _split_imdb_keys(keys: pd.Series):
+    """'tt0000001' biçimindeki anahtarları (önek, sayısal değer, hane sayısı) olarak ayırır"""
+    prefixes = keys.str[:2].unique()
+    if len(prefixes) != 1:
+        raise ValueError(f"Anahtarlar tek bir önek kullanmalı, bulunan: {list(prefixes)[:5]}")
+    digits = keys.str[2:]
+    return prefixes[0], pd.to_numeric(digits, errors='raise').to_numpy(dtype=np.int64), int(digits.str.len().min())
+
+def build_fingerprints(tsv_file_path: str, chunk_size: int = 500000) -> TsvFingerprints:
+    """
+    .tsv.gz dosyasının parmak izini çıkarır. Satırlar pandas ile toplu olarak hash'lenir;
+    ilk sütun anahtar kabul edilir.
+    """
+    header, shards = iter_tsv_shards(tsv_file_path, chunk_size)
+    key_column = header.rstrip('\r\n').split('\t')[0]
+    prefix, width = None, None
+    key_parts, hash_parts = [], []
+    
+    for shard_text in shards:
+        lines = pd.Series(shard_text.splitlines(), dtype=object)
+        shard_prefix, keys, shard_width = _split_imdb_keys(lines.str.split('\t', n=1).str[0])
+        if prefix is not None and shard_prefix != prefix:
+            raise ValueError(f"Anahtar öneki değişti: {prefix} -> {shard_prefix}")
+        prefix = shard_prefix
+        width = shard_width if width is None else min(width, shard_width)
+        key_parts.append(keys)
+        hash_parts.append(pd.util.hash_pandas_object(lines, index=False).to_numpy())
+    
+    keys = np.concatenate(key_parts) if key_parts else np.empty(0, dtype=np.int64)
+    hashes = np.concatenate(hash_parts) if hash_parts else np.empty(0, dtype=np.uint64)
+    order = np.argsort(keys, kind='stable')
+    return TsvFingerprints(key_column, prefix or '', width or 7, keys[order], hashes[order])
+
+def load_previous_fingerprints(previous_path: str) -> TsvFingerprints:
+    """Önceki dump'ı (.tsv.gz) veya önceki çalıştırmanın parmak izi dosyasını (.npz) yükler"""
+    if previous_path.endswith('.npz'):
+        return TsvFingerprints.load(previous_path)
+    return build_fingerprints(previous_path)
+
+def diff_fingerprints(previous: TsvFingerprints, current: TsvFingerprints):
+    """
+    İki parmak izini karşılaştırır.
+    
+    Returns:
+        (eklenen, değişen, silinen) sayısal anahtar dizileri
+    """
+    if previous.key_column != current.key_column:
+        raise ValueError(f"Anahtar sütunları farklı: {previous.key_column} / {current.key_column}")
+    
+    in_previous = np.isin(current.keys, previous.keys, assume_unique=True)
+    inserted = current.keys[~in_previous]
+    deleted = previous.keys[~np.isin(previous.keys, current.keys, assume_unique=True)]
+    
+    # Her iki dump'ta olan anahtarlar için hash karşılaştırması (diziler sıralı)
+    common = current.keys[in_previous]
+    previous_hashes = previous.hashes[np.searchsorted(previous.keys, common)]
+    changed = common[current.hashes[in_previous] != previous_hashes]
+    return inserted, changed, deleted
+
+def convert_tsv_delta(new_tsv_path: str, previous_path: str, output_prefix: str,
+                      output_format: str = "ndjson", fingerprint_path: Optional[str] = None,
+                      chunk_size: int = 100000, validate: str = "incremental", mode: str = "streaming"):
+    """
+    İki IMDb dump'ı arasındaki farkı dönüştürür: yalnızca eklenen, değişen ve silinen kayıtlar yazılır.
+    
+    Çıktılar:
+        <output_prefix>.inserted.<ext>  Yeni kayıtlar (tam kayıt)
+        <output_prefix>.changed.<ext>   Değişen kayıtlar (tam kayıt, yeni hali)
+        <output_prefix>.deleted.<ext>   Silinen kayıtlar (yalnızca anahtar alanı)
+        <output_prefix>.delta.json      Sayıları ve dosya yollarını içeren manifest
+    
+    Args:
+        new_tsv_path: Yeni .tsv.gz dosyası
+        previous_path: Önceki .tsv.gz dosyası veya önceki çalıştırmanın parmak izi (.npz)
+        output_prefix: Çıktı dosyalarının ortak öneki
+        output_format: "json", "ndjson", "parquet" veya "arrow"
+        fingerprint_path: Verilirse yeni dump'ın parmak izi bir sonraki çalıştırma için buraya kaydedilir
+        chunk_size: İkinci geçişte chunk başına satır
+        validate: Her çıktı dosyası için doğrulama modu
+        mode: "streaming" veya "search" (arama şeması)
+    
+    Returns:
+        Manifest sözlüğü (hata durumunda None)
+    """
+    try:
+        print(f"🔁 Delta conversion başlıyor: {previous_path} -> {new_tsv_path}")
+        
+        previous = load_previous_fingerprints(previous_path)
+        current = build_fingerprints(new_tsv_path)
+        inserted, changed, deleted = diff_fingerprints(previous, current)
+        print(f"📊 Eklenen: {len(inserted)}, değişen: {len(changed)}, silinen: {len(deleted)} "
+              f"(toplam {len(current)} kayıt)")
+        
+        extension = FORMAT_EXTENSIONS.get(output_format, '.' + output_format)
+        paths = {name: f"{output_prefix}.{name}{extension}" for name in ("inserted", "changed", "deleted")}
+        key_column = current.key_column
+        
+        # İkinci geçiş: yalnızca eklenen/değişen satırlar dönüştürülür
+        with OutputWriter(paths['inserted'], output_format, mode, validate != "none") as inserted_writer, \
+                OutputWriter(paths['changed'], output_format, mode, validate != "none") as changed_writer:
+            if len(inserted) or len(changed):
+                for chunk in _read_tsv_chunks(new_tsv_path, mode, chunk_size, None):
+                    _, keys, _ = _split_imdb_keys(chunk[key_column])
+                    inserted_writer.write_frame(chunk[np.isin(keys, inserted)])
+                    changed_writer.write_frame(chunk[np.isin(keys, changed)])
+        
+        with OutputWriter(paths['deleted'], output_format, validate=validate != "none") as deleted_writer:
+            deleted_writer.write_frame(pd.DataFrame({key_column: current.format_keys(deleted)}, dtype=object))
+        
+        manifest = {
+            'key': key_column,
+            'format': output_format,
+            'previous': previous_path,
+            'current': new_tsv_path,
+            'total_records': len(current),
+            'counts': {'inserted': len(inserted), 'changed': len(changed), 'deleted': len(deleted)},
+            'files': paths,
+            'validation': {},
+        }
+        for name, writer in (("inserted", inserted_writer), ("changed", changed_writer), ("deleted", deleted_writer)):
+            summary = report_validation(writer.stats, paths[name], validate, output_format)
+            if summary is not None:
+                manifest['validation'][name] = summary
+        
+        if fingerprint_path:
+            current.save(fingerprint_path)
+            manifest['fingerprint'] = fingerprint_path
+            print(f"🧬 Parmak izi kaydedildi: {fingerprint_path}")
+        
+        with open(f"{output_prefix}.delta.json", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        
+        print(f"🎉 Delta conversion tamamlandı: {output_prefix}.delta.json")
+        return manifest
+        
+    except Exception as e:
+        print(f"❌ Delta conversion hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# İlişki dosyaları (title.principals + title.ratings -> başlık başına tek kayıt)
+# Başlık başına ilk TOP_PRINCIPALS sıradaki oyuncu / yönetmen tutulur; isimler yükleyicide çözülür
+TOP_PRINCIPALS = 10
+PRINCIPAL_CATEGORIES = ('actor', 'actress', 'self', 'director')
+PRINCIPAL_COLUMNS = ['tconst', 'ordering', 'nconst', 'category', 'characters']
+
+def _parse_characters(value) -> Optional[list]:
+    """'["Andy Dufresne"]' -> ["Andy Dufresne"] (boş / bozuksa None)"""
+    if not isinstance(value, str):
+        return None
+    try:
+        characters = json.loads(value)
+    except ValueError:
+        return None
+    return characters if isinstance(characters, list) else None
+
+def load_title_ratings(ratings_tsv_path: str) -> pd.DataFrame:
+    """title.ratings.tsv.gz -> tconst index'li (averageRating, numVotes) tablosu"""
+    ratings = pd.read_csv(ratings_tsv_path, sep='\t', compression='gzip', na_values=IMDB_NA_VALUES,
+                          keep_default_na=True, dtype=str, index_col='tconst')
+    ratings['averageRating'] = pd.to_numeric(ratings['averageRating'], errors='coerce')
+    ratings['numVotes'] = pd.to_numeric(ratings['numVotes'], errors='coerce').astype('Int64')
+    return ratings
+
+def _relation_records(rows: pd.DataFrame, ratings: Optional[pd.DataFrame], seen: Optional[np.ndarray]) -> list:
+    """Aynı tconst'a ait principal satırlarını başlık başına tek kayda toplar"""
+    if rows.empty:
+        return []
+    rows = rows.sort_values(['tconst', '_ordering'], kind='stable')
+    records = []
+    for tconst, group in itertools.groupby(
+            zip(rows['tconst'], rows['nconst'], rows['category'], rows['characters']), key=lambda row: row[0]):
+        records.append({
+            'tconst': tconst,
+            'principals': [{'nconst': nconst, 'category': category, 'characters': _parse_characters(characters)}
+                           for _, nconst, category, characters in group],
+        })
+    
+    if ratings is not None:
+        positions = ratings.index.get_indexer([record['tconst'] for record in records])
+        average, votes = ratings['averageRating'].to_numpy(), ratings['numVotes'].to_numpy()
+        for record, position in zip(records, positions):
+            if position >= 0:
+                seen[position] = True
+                _attach_rating(record, average[position], votes[position])
+    return records
+
+def _attach_rating(record: dict, average, votes):
+    if pd.notna(average):
+        record['averageRating'] = float(average)
+    if pd.notna(votes):
+        record['numVotes'] = int(votes)
+
+def convert_title_relations(principals_tsv_path: Optional[str], ratings_tsv_path: Optional[str],
+                            output_path: str, output_format: str = "ndjson",
+                            top_principals: int = TOP_PRINCIPALS, chunk_size: int = 500000):
+    """
+    title.principals ve title.ratings'i başlık başına tek ilişki kaydına dönüştürür.
+    
+    Çıktı kaydı: {"tconst", "averageRating", "numVotes", "principals": [{"nconst", "category",
+    "characters"}]}. title.principals ~90M satırdır; dosya tconst sırasında olduğu için chunk'lar
+    tek geçişte gruplanır (chunk sınırındaki başlık bir sonraki chunk'a taşınır) ve yalnızca ilk
+    top_principals sıradaki oyuncu / yönetmen satırları tutulur. Puanlar (~1.5M satır) bellekte
+    birleştirilir; principal'ı olmayan puanlı başlıklar sonda yalnızca puanla yazılır.
+    Yükleyici bu dosyayla MongoDBUploader.attach_relations çağırır.
+    
+    Args:
+        principals_tsv_path: title.principals.tsv.gz (None ise yalnızca puanlar)
+        ratings_tsv_path: title.ratings.tsv.gz (None ise puansız)
+        output_format: "ndjson" (.gz ile sıkıştırılmış) veya "json"
+            (iç içe kayıtlar sütunlu formatlara yazılmaz)
+        top_principals: Başlık başına en fazla kaçıncı sıraya kadar principal tutulacağı
+    
+    Returns:
+        Yazılan kayıt sayısı (hata durumunda None)
+    """
+    try:
+        if output_format not in ("json", "ndjson"):
+            raise ValueError(f"İlişki kayıtları yalnızca json / ndjson olarak yazılabilir: {output_format}")
+        print(f"🔗 İlişki conversion başlıyor (ilk {top_principals} principal)...")
+        
+        ratings, seen = None, None
+        if ratings_tsv_path:
+            ratings = load_title_ratings(ratings_tsv_path)
+            seen = np.zeros(len(ratings), dtype=bool)
+            print(f"⭐ {len(ratings)} puan yüklendi")
+        
+        def write(writer, records):
+            if not records:
+                return
+            separator = '\n' if output_format == "ndjson" else _JSON_LAYOUTS["search"][1]
+            data = separator.join(json.dumps(record, ensure_ascii=False) for record in records)
+            writer.write_payload(len(records), data + '\n' if output_format == "ndjson" else data)
+        
+        with OutputWriter(output_path, output_format, "search", validate=False) as writer:
+            if principals_tsv_path:
+                carry = None
+                reader = pd.read_csv(principals_tsv_path, sep='\t', compression='gzip', usecols=PRINCIPAL_COLUMNS,
+                                     na_values=IMDB_NA_VALUES, keep_default_na=True, dtype=str,
+                                     chunksize=chunk_size)
+                for chunk_num, chunk in enumerate(reader, 1):
+                    last = chunk['tconst'].iloc[-1]
+                    chunk['_ordering'] = pd.to_numeric(chunk['ordering'], errors='coerce')
+                    chunk = chunk[(chunk['_ordering'] <= top_principals)
+                                  & chunk['category'].isin(PRINCIPAL_CATEGORIES)]
+                    if carry is not None:
+                        chunk = pd.concat([carry, chunk])
+                    # Son başlığın satırları sonraki chunk'ta devam edebilir
+                    tail = (chunk['tconst'] == last).to_numpy()
+                    carry = chunk[tail]
+                    write(writer, _relation_records(chunk[~tail], ratings, seen))
+                    print(f"📦 Chunk {chunk_num}: toplam {writer.count} başlık")
+                if carry is not None:
+                    write(writer, _relation_records(carry, ratings, seen))
+            
+            if ratings is not None:
+                # Principal'ı olmayan puanlı başlıklar
+                average, votes = ratings['averageRating'].to_numpy(), ratings['numVotes'].to_numpy()
+                records = []
+                for position in np.flatnonzero(~seen):
+                    record = {'tconst': ratings.index[position]}
+                    _attach_rating(record, average[position], votes[position])
+                    records.append(record)
+                    if len(records) >= chunk_size:
+                        write(writer, records)
+                        records = []
+                write(writer, records)
+        
+        print(f"✅ İlişki conversion tamamlandı: {output_path} ({writer.count} başlık)")
+        return writer.count
+        
+    except Exception as e:
+        print(f"❌ İlişki conversion hatası: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
 # Ana program
 if __name__ == "__main__":
     print("🎬 IMDb TSV to JSON Converter (NaN Fixed)")
     print("="*50)
     
-    # Dosya yolları
-    tsv_file = "/home/hudul/Masaüstü/Projects/movie-api/1. Convert/title.basics.tsv.gz"
+    # Dosya yolları: python converter.py [title.basics.tsv.gz]
+    tsv_file = sys.argv[1] if len(sys.argv) > 1 else "title.basics.tsv.gz"
+    if not os.path.exists(tsv_file):
+        tsv_file = input(f"TSV dosyası bulunamadı ({tsv_file}), yolu girin: ").strip()
     json_file = "data.json"
     
     # Önizleme
@@ -263,10 +1356,39 @@ if __name__ == "__main__":
     print("Dönüştürme seçenekleri:")
     print("1. Normal conversion (hızlı, daha fazla RAM)")
     print("2. Streaming conversion (yavaş, az RAM)")
+    print("3. Vektörel conversion (en hızlı, streaming çıktısıyla aynı)")
+    print("4. Paralel conversion (tüm çekirdekler, streaming çıktısıyla aynı)")
+    print("5. Delta conversion (önceki dump'a göre yalnızca değişiklikler)")
+    print("6. İlişki conversion (title.principals + title.ratings -> oyuncular, puanlar)")
+    
+    choice = input("Seçiminiz (1-6): ").strip()
     
-    choice = input("Seçiminiz (1 veya 2): ").strip()
+    output_format = "json"
+    mode = "streaming"
+    if choice in ("3", "4"):
+        output_format = input(f"Çıktı formatı ({', '.join(OUTPUT_FORMATS)}) [json]: ").strip() or "json"
+        if output_format != "json":
+            json_file = {"ndjson": "data.ndjson.gz", "parquet": "data.parquet", "arrow": "data.arrow"}.get(output_format, json_file)
+    if choice in ("3", "4", "5"):
+        if input("Arama şeması (dizi alanları, int yıllar, *Key alanları)? (e/H): ").strip().lower() == "e":
+            mode = "search"
     
-    if choice == "2":
+    if choice == "6":
+        print("🔗 İlişki conversion seçildi...")
+        principals = input("title.principals.tsv.gz yolu (boş: atla): ").strip() or None
+        ratings = input("title.ratings.tsv.gz yolu (boş: atla): ").strip() or None
+        convert_title_relations(principals, ratings, "relations.ndjson.gz")
+    elif choice == "5":
+        print("🔁 Delta conversion seçildi...")
+        previous = input("Önceki dump (.tsv.gz) veya parmak izi (.npz) yolu: ").strip()
+        convert_tsv_delta(tsv_file, previous, "data", fingerprint_path="data.fingerprint.npz", mode=mode)
+    elif choice == "4":
+        print("🧵 Paralel conversion seçildi...")
+        convert_tsv_parallel(tsv_file, json_file, output_format=output_format, mode=mode)
+    elif choice == "3":
+        print("⚡ Vektörel conversion seçildi...")
+        convert_tsv_vectorized(tsv_file, json_file, mode=mode, output_format=output_format)
+    elif choice == "2":
         print("🌊 Streaming conversion seçildi...")
         convert_large_tsv_streaming(tsv_file, json_file, chunk_size=5000)
     else:
@@ -0,0 +1,253 @@
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from converter import (ValidationStats, convert_imdb_tsv_to_json, convert_large_tsv_streaming,
+                       convert_title_relations, convert_tsv_delta, convert_tsv_parallel, convert_tsv_vectorized,
+                       dataframe_to_arrow, detect_output_format, iter_output_records, part_file_path,
+                       validate_output_file)
+
+TITLE_HEADER = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult', 'startYear', 'endYear',
+                'runtimeMinutes', 'genres']
+NAME_HEADER = ['nconst', 'primaryName', 'birthYear', 'deathYear', 'primaryProfession', 'knownForTitles']
+
+
+def write_tsv(path, header, rows):
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+        f.write('\t'.join(header) + '\n')
+        for row in rows:
+            f.write('\t'.join(row) + '\n')
+    return str(path)
+
+
+def title_rows(count):
+    return [[f"tt{i:07d}", 'movie', f"Title {i}", f"Original {i}", '0', str(1950 + i % 70), '\\N',
+             str(80 + i % 60) if i % 7 else '\\N', 'Drama,Comedy' if i % 3 else '\\N']
+            for i in range(1, count + 1)]
+
+
+def messy_title_rows():
+    """Null işaretleri, Unicode, tırnak / ters bölü ve boş sayısal sütun parçaları"""
+    return [
+        ['tt0000001', 'short', 'Carmencita', 'Carmencita', '0', '1894', '\\N', '1', 'Documentary,Short'],
+        ['tt0000002', 'movie', 'Çiçek Straße', 'Le clown et ses chiens', '0', '\\N', '\\N', '\\N', '\\N'],
+        ['tt0000003', 'movie', 'Say "Hello"', 'C:\\path\\name', '1', '1999', '2001', '95', 'Drama'],
+        ['tt0000004', 'tvSeries', 'null', 'NULL', '0', '2010', '\\N', '\\N', 'Comedy,Drama,Romance'],
+        ['tt0000005', 'movie', '東京物語', '東京物語', '0', '1953', '\\N', '136', 'Drama'],
+        ['tt0000006', 'movie', 'Title 6', 'Title 6', '\\N', '\\N', '\\N', '\\N', '\\N'],
+    ] + title_rows(20)[6:]
+
+
+def messy_name_rows():
+    return [
+        ['nm0000001', 'Fred Astaire', '1899', '1987', 'actor,miscellaneous', 'tt0050419,tt0053137'],
+        ['nm0000002', 'Lauren Bacall', '1924', '2014', 'actress', 'tt0037382'],
+        ['nm0000003', 'Brigitte Bardot', '1934', '\\N', '\\N', '\\N'],
+        ['nm0000004', 'Zoë "Z" Ünal', '\\N', '\\N', 'writer', 'tt0000003'],
+    ]
+
+
+@pytest.fixture
+def titles_tsv(tmp_path):
+    return write_tsv(tmp_path / 'title.basics.tsv.gz', TITLE_HEADER, title_rows(25))
+
+
+@pytest.mark.parametrize('output_path, expected', [
+    ('movies.json', 'movies.part-00001.json'),
+    ('movies.ndjson.gz', 'movies.part-00001.ndjson.gz'),
+    ('out/movies.json.gz', 'out/movies.part-00001.json.gz'),
+    ('movies.parquet', 'movies.part-00001.parquet'),
+    ('movies', 'movies.part-00001.json'),
+])
+def test_part_file_path_keeps_compound_extension(output_path, expected):
+    assert part_file_path(output_path, 1) == expected
+
+
+def test_gzip_ndjson_parts_round_trip(tmp_path, titles_tsv):
+    single = tmp_path / 'single.ndjson.gz'
+    assert convert_tsv_vectorized(titles_tsv, str(single), output_format='ndjson', validate='none') == 25
+
+    parts_template = str(tmp_path / 'movies.ndjson.gz')
+    assert convert_tsv_parallel(titles_tsv, parts_template, workers=2, shard_size=10, part_files=True,
+                                output_format='ndjson', validate='full') == 25
+
+    parts = [part_file_path(parts_template, number) for number in (1, 2, 3)]
+    assert all(detect_output_format(part) == 'ndjson' for part in parts)
+    with gzip.open(parts[0], 'rt', encoding='utf-8') as f:
+        assert json.loads(f.readline())['tconst'] == 'tt0000001'
+    records = [record for part in parts for record in iter_output_records(part)]
+    assert records == list(iter_output_records(str(single)))
+
+
+@pytest.mark.parametrize('header, rows', [(TITLE_HEADER, messy_title_rows()), (NAME_HEADER, messy_name_rows())])
+def test_vectorized_streaming_output_matches_legacy_converter(tmp_path, header, rows):
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', header, rows)
+    legacy, vectorized = tmp_path / 'legacy.json', tmp_path / 'vectorized.json'
+
+    convert_large_tsv_streaming(tsv, str(legacy), chunk_size=4, validate='none')
+    assert convert_tsv_vectorized(tsv, str(vectorized), mode='streaming', chunk_size=4,
+                                  validate='none') == len(rows)
+    assert vectorized.read_bytes() == legacy.read_bytes()
+
+
+@pytest.mark.parametrize('header, rows', [(TITLE_HEADER, messy_title_rows()), (NAME_HEADER, messy_name_rows())])
+def test_vectorized_normal_output_matches_legacy_converter(tmp_path, header, rows):
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', header, rows)
+    legacy, vectorized = tmp_path / 'legacy.json', tmp_path / 'vectorized.json'
+
+    convert_imdb_tsv_to_json(tsv, str(legacy), validate='none')
+    assert convert_tsv_vectorized(tsv, str(vectorized), mode='normal', validate='none') == len(rows)
+    assert vectorized.read_bytes() == legacy.read_bytes()
+
+
+
+@pytest.mark.parametrize('output_format', ['json', 'ndjson'])
+def test_parallel_output_matches_single_process_output(tmp_path, output_format):
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', TITLE_HEADER, messy_title_rows() + title_rows(60)[20:])
+    extension = '.json' if output_format == 'json' else '.ndjson'
+    single, parallel = tmp_path / f'single{extension}', tmp_path / f'parallel{extension}'
+
+    count = convert_tsv_vectorized(tsv, str(single), output_format=output_format, validate='none')
+    assert convert_tsv_parallel(tsv, str(parallel), workers=3, shard_size=7, output_format=output_format,
+                                validate='full') == count == 60
+    assert parallel.read_bytes() == single.read_bytes()
+
+
+@pytest.mark.parametrize('output_format, extension', [('ndjson', '.ndjson'), ('ndjson', '.ndjson.gz'),
+                                                      ('parquet', '.parquet'), ('arrow', '.arrow')])
+@pytest.mark.parametrize('mode', ['streaming', 'search'])
+def test_output_formats_hold_the_same_records_as_json(tmp_path, output_format, extension, mode):
+    if output_format in ('parquet', 'arrow'):
+        pytest.importorskip('pyarrow')
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', TITLE_HEADER, messy_title_rows())
+    reference, output = tmp_path / 'reference.json', tmp_path / f'output{extension}'
+
+    convert_tsv_vectorized(tsv, str(reference), mode=mode, chunk_size=4, validate='none')
+    assert convert_tsv_vectorized(tsv, str(output), mode=mode, chunk_size=4, output_format=output_format,
+                                  validate='full') == 20
+    assert detect_output_format(str(output)) == output_format
+    assert list(iter_output_records(str(output))) == list(iter_output_records(str(reference)))
+
+
+def test_arrow_integers_never_overflow_their_column_type():
+    pa = pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'tconst': ['tt1', 'tt2', 'tt3'], 'startYear': ['1994', '3000000000', '-2147483648'],
+                       'numVotes': ['5000000000', '9223372036854775808', '12']})
+    stats = ValidationStats()
+    table = dataframe_to_arrow(df, stats)
+
+    assert table.schema.field('startYear').type == pa.int32() and table.schema.field('numVotes').type == pa.int64()
+    assert table.column('startYear').to_pylist() == [1994, None, -2147483648]
+    assert table.column('numVotes').to_pylist() == [5000000000, None, 12]
+    assert stats.columns['startYear']['invalid'] == stats.columns['numVotes']['invalid'] == 1
+
+
+def test_incremental_validation_counts_match_a_full_reread(tmp_path):
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', TITLE_HEADER, messy_title_rows())
+    output, summary_path = tmp_path / 'output.json', tmp_path / 'summary.json'
+    convert_tsv_vectorized(tsv, str(output), chunk_size=4, validate='full', summary_path=str(summary_path))
+
+    summary = json.loads(summary_path.read_text(encoding='utf-8'))
+    assert summary['valid'] and summary['mode'] == 'full' and summary['records'] == 20
+    assert summary['columns']['startYear'] == {'nulls': 2, 'invalid': 0, 'types': {'int': 18}}
+    assert summary['columns']['genres']['nulls'] == validate_output_file(str(output)).columns['genres']['nulls']
+
+
+def test_validation_reports_truncated_output(tmp_path):
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', TITLE_HEADER, messy_title_rows())
+    output = tmp_path / 'output.json'
+    convert_tsv_vectorized(tsv, str(output), validate='none')
+    output.write_text(output.read_text(encoding='utf-8')[:-40], encoding='utf-8')
+
+    reread = validate_output_file(str(output))
+    assert reread.errors and reread.records < 20
+
+
+def test_compare_reports_count_and_type_mismatches():
+    written, read = ValidationStats(), ValidationStats()
+    written.observe_record({'tconst': 'tt1', 'startYear': 1999})
+    written.observe_record({'tconst': 'tt2', 'startYear': None})
+    read.observe_record({'tconst': 'tt1', 'startYear': '1999'})
+
+    written.compare(read)
+    summary = written.summary()
+    assert not summary['valid']
+    assert any('Kayıt sayısı' in error for error in summary['errors'])
+    assert any(error.startswith('startYear: null') for error in summary['errors'])
+    assert any('beklenmeyen tip str' in error for error in summary['errors'])
+
+
+def test_delta_writes_only_inserted_changed_and_deleted_records(tmp_path):
+    previous_rows = title_rows(20)
+    current_rows = [row for row in previous_rows if row[0] not in ('tt0000003', 'tt0000010')]
+    current_rows[4] = current_rows[4][:2] + ['Renamed Title'] + current_rows[4][3:]
+    current_rows += title_rows(23)[20:]
+    previous = write_tsv(tmp_path / 'previous.tsv.gz', TITLE_HEADER, previous_rows)
+    current = write_tsv(tmp_path / 'current.tsv.gz', TITLE_HEADER, current_rows)
+    prefix, fingerprint = str(tmp_path / 'delta'), str(tmp_path / 'current.npz')
+
+    manifest = convert_tsv_delta(current, previous, prefix, fingerprint_path=fingerprint, validate='full')
+    assert manifest['counts'] == {'inserted': 3, 'changed': 1, 'deleted': 2}
+    records = {name: list(iter_output_records(path)) for name, path in manifest['files'].items()}
+    assert [record['tconst'] for record in records['inserted']] == ['tt0000021', 'tt0000022', 'tt0000023']
+    assert [(record['tconst'], record['primaryTitle']) for record in records['changed']] == \
+        [(current_rows[4][0], 'Renamed Title')]
+    assert records['deleted'] == [{'tconst': 'tt0000003'}, {'tconst': 'tt0000010'}]
+    assert all(summary['valid'] for summary in manifest['validation'].values())
+
+    # Aynı dump, kaydedilen parmak iziyle karşılaştırılınca boş delta
+    again = convert_tsv_delta(current, fingerprint, str(tmp_path / 'again'), validate='none')
+    assert again['counts'] == {'inserted': 0, 'changed': 0, 'deleted': 0}
+
+
+def test_search_mode_types_fields_and_adds_keys(tmp_path):
+    tsv = write_tsv(tmp_path / 'input.tsv.gz', TITLE_HEADER, messy_title_rows())
+    output = tmp_path / 'search.json'
+    convert_tsv_vectorized(tsv, str(output), mode='search', validate='none')
+
+    records = {record['tconst']: record for record in iter_output_records(str(output))}
+    assert records['tt0000001']['genres'] == ['Documentary', 'Short']
+    assert records['tt0000001']['startYear'] == 1894
+    assert records['tt0000002']['primaryTitleKey'] == 'cicek strasse'
+    assert records['tt0000002']['genres'] is None
+
+
+def test_relations_keep_top_principals_across_chunk_boundaries(tmp_path):
+    header = ['tconst', 'ordering', 'nconst', 'category', 'job', 'characters']
+    principals = write_tsv(tmp_path / 'principals.tsv.gz', header, [
+        ['tt0000001', '1', 'nm0000001', 'actor', '\\N', '["Hero"]'],
+        ['tt0000001', '2', 'nm0000002', 'director', '\\N', '\\N'],
+        ['tt0000001', '3', 'nm0000003', 'writer', '\\N', '\\N'],
+        ['tt0000001', '4', 'nm0000004', 'actress', '\\N', '["Late"]'],
+        ['tt0000002', '1', 'nm0000004', 'actress', '\\N', '["Lead","Twin"]'],
+        ['tt0000002', '2', 'nm0000001', 'self', '\\N', '\\N'],
+    ])
+    ratings = write_tsv(tmp_path / 'ratings.tsv.gz', ['tconst', 'averageRating', 'numVotes'],
+                        [['tt0000002', '7.5', '120'], ['tt0000009', '6.0', '5']])
+
+    records = {}
+    for chunk_size in (2, 1000):
+        output = str(tmp_path / f"relations_{chunk_size}.ndjson")
+        assert convert_title_relations(principals, ratings, output, top_principals=3, chunk_size=chunk_size) == 3
+        records[chunk_size] = list(iter_output_records(output))
+
+    # Küçük chunk'larda bölünen başlık tek kayıt olarak yazılır
+    assert records[2] == records[1000] == [
+        {'tconst': 'tt0000001', 'principals': [{'nconst': 'nm0000001', 'category': 'actor', 'characters': ['Hero']},
+                                               {'nconst': 'nm0000002', 'category': 'director', 'characters': None}]},
+        {'tconst': 'tt0000002', 'principals': [
+            {'nconst': 'nm0000004', 'category': 'actress', 'characters': ['Lead', 'Twin']},
+            {'nconst': 'nm0000001', 'category': 'self', 'characters': None}], 'averageRating': 7.5, 'numVotes': 120},
+        {'tconst': 'tt0000009', 'averageRating': 6.0, 'numVotes': 5},
+    ]
+    assert convert_title_relations(principals, ratings, str(tmp_path / 'relations.parquet'), 'parquet') is None
+
+
+@pytest.mark.parametrize('text', ['[{"a": 1}', '[{"a": 1}] x', '[{"a": 1},]'])
+def test_reading_malformed_json_output_raises(tmp_path, text):
+    path = tmp_path / 'data.json'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_output_records(str(path)))
@@ -0,0 +1,136 @@
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Optional
+from unittest import mock
+
+from upload import MongoDBUploader
+
+TITLE_TYPES = ['movie', 'short', 'tvSeries', 'tvEpisode', 'tvMovie', 'video']
+GENRES = ['Action', 'Comedy', 'Documentary', 'Drama', 'Horror', 'Romance', 'Short', 'Animation']
+WORDS = ['The', 'Star', 'Night', 'Harbor', 'Love', 'Carmencita', 'Gök', 'Çiçek', 'Straße', 'Über']
+
+
+def make_synthetic_ndjson(path: str, rows: int, seed: int = 42):
+    """
+    Write title.basics-shaped records as gzip NDJSON (converter output format)
+    """
+    rng = random.Random(seed)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        for i in range(1, rows + 1):
+            title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+            record = {
+                'tconst': f"tt{i:07d}",
+                'titleType': rng.choice(TITLE_TYPES),
+                'primaryTitle': title,
+                'originalTitle': title,
+                'isAdult': 0,
+                'startYear': rng.randint(1890, 2025),
+                'endYear': None,
+                'runtimeMinutes': rng.randint(1, 240),
+                'genres': ','.join(rng.sample(GENRES, rng.randint(1, 3))),
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return path
+
+
+class LatencyCollection:
+    """
+    Collection proxy that adds a fixed round-trip delay to insert_many
+
+    mongomock runs in-process, so without it there is no server time to overlap.
+    """
+
+    def __init__(self, collection, latency: float):
+        self._collection = collection
+        self._latency = latency
+
+    def insert_many(self, documents, *args, **kwargs):
+        time.sleep(self._latency)
+        return self._collection.insert_many(documents, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class LatencyDatabase:
+    def __init__(self, db, latency: float):
+        self._db = db
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return LatencyCollection(self._db[name], self._latency)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def make_uploader(uri: Optional[str], database_name: str, latency: float) -> MongoDBUploader:
+    """
+    Connect to a real mongod when a URI is given, otherwise to an in-process mongomock
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        if uri:
+            uploader = MongoDBUploader(uri, database_name)
+        else:
+            import mongomock
+            with mock.patch('upload.MongoClient', mongomock.MongoClient):
+                uploader = MongoDBUploader(None, database_name)
+    if latency:
+        uploader.db = LatencyDatabase(uploader.db, latency)
+    return uploader
+
+
+def _timed_upload(uploader: MongoDBUploader, method: str, collection_name: str, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        inserted, failed = getattr(uploader, method)(collection_name=collection_name, **kwargs)
+        elapsed = time.perf_counter() - start
+    uploader.db[collection_name].drop()
+    return elapsed, inserted, len(failed)
+
+
+def run_benchmark(rows: int, batch_size: int, writer_counts: list, uri: Optional[str],
+                  latency: float, workdir: str):
+    data_path = make_synthetic_ndjson(os.path.join(workdir, "titles.ndjson.gz"), rows)
+    uploader = make_uploader(uri, "imdb_benchmark", latency)
+    target = uri or f"mongomock (+{latency * 1000:.0f} ms/insert)"
+    print(f"🧪 {rows} records, batch size {batch_size}, target: {target}")
+
+    baseline, inserted, failed = _timed_upload(uploader, "upload_json_stream", "bench_stream",
+                                               json_file_path=data_path, batch_size=batch_size)
+    print(f"\n📊 upload_json_stream: {baseline:.2f}s ({rows / baseline:,.0f} records/sec, "
+          f"inserted {inserted}, failed {failed})")
+
+    print(f"\n{'Writers':>8} {'Time (s)':>9} {'Records/s':>11} {'Speedup':>8} {'Inserted':>9} {'Failed':>7}")
+    for writers in writer_counts:
+        elapsed, inserted, failed = _timed_upload(uploader, "upload_json_parallel", f"bench_parallel_{writers}",
+                                                  json_file_path=data_path, batch_size=batch_size,
+                                                  writers=writers)
+        print(f"{writers:>8} {elapsed:>9.2f} {rows / elapsed:>11,.0f} {baseline / elapsed:>7.1f}x "
+              f"{inserted:>9} {failed:>7}")
+
+    uploader.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MongoDB uploader benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--writers", type=str, default="1,2,4,8")
+    parser.add_argument("--uri", type=str, default=None,
+                        help="mongod connection string (default: in-process mongomock)")
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="Simulated insert_many round-trip for mongomock")
+    args = parser.parse_args()
+
+    latency = 0.0 if args.uri else args.latency_ms / 1000
+    with tempfile.TemporaryDirectory() as workdir:
+        run_benchmark(args.rows, args.batch_size, [int(w) for w in args.writers.split(',')],
+                      args.uri, latency, workdir)
@@ -0,0 +1,323 @@
+import gzip
+import io
+import json
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+import upload  # noqa: E402
+from upload import SYNC_MARK_FIELD, MongoDBUploader, iter_batches, iter_json_records  # noqa: E402
+
+
+@pytest.fixture
+def uploader(monkeypatch):
+    monkeypatch.setattr(upload, "MongoClient", mongomock.MongoClient)
+    return MongoDBUploader("mongodb://localhost:27017/", "imdb_test")
+
+
+def write_ndjson(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    return str(path)
+
+
+def write_json_array(path, records):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write('[\n  ' + ',\n  '.join(json.dumps(record, ensure_ascii=False) for record in records) + '\n]')
+    return str(path)
+
+
+def stored(collection):
+    return sorted((({k: v for k, v in doc.items() if k != '_id'}) for doc in collection.find()),
+                  key=lambda doc: doc['tconst'])
+
+
+def titles(count, year=2000):
+    return [{"tconst": f"tt{i:07d}", "primaryTitle": f"Title {i}", "startYear": year, "genres": ["Drama"]}
+            for i in range(1, count + 1)]
+
+
+def test_second_sync_of_same_file_modifies_nothing(uploader, tmp_path):
+    path = write_ndjson(tmp_path / 'titles.ndjson', titles(5))
+    first = uploader.sync_json_file(path, 'movies', batch_size=2, delete_missing=True)
+    assert first['upserted'] == 5
+    revision = uploader.db['_generations'].find_one({'_id': 'movies'})['revision']
+
+    second = uploader.sync_json_file(path, 'movies', batch_size=2, delete_missing=True)
+    assert second == {'upserted': 0, 'modified': 0, 'unchanged': 5, 'deleted': 0, 'failed': 0}
+    assert uploader.db['_generations'].find_one({'_id': 'movies'})['revision'] == revision
+
+
+def test_sync_replaces_only_changed_records_and_deletes_missing_keys(uploader, tmp_path):
+    uploader.sync_json_file(write_ndjson(tmp_path / 'v1.ndjson', titles(5)), 'movies', delete_missing=True)
+
+    records = titles(4)
+    records[0]['startYear'] = 1999
+    records.append({"tconst": "tt0000009", "primaryTitle": "New", "startYear": 2020, "genres": []})
+    counts = uploader.sync_json_file(write_ndjson(tmp_path / 'v2.ndjson', records), 'movies',
+                                     delete_missing=True)
+
+    assert counts == {'upserted': 1, 'modified': 1, 'unchanged': 3, 'deleted': 1, 'failed': 0}
+    collection = uploader.db['movies']
+    assert sorted(doc['tconst'] for doc in collection.find()) == [f"tt000000{i}" for i in (1, 2, 3, 4, 9)]
+    assert collection.find_one({'tconst': 'tt0000001'})['startYear'] == 1999
+
+
+def test_sync_keeps_bookkeeping_out_of_documents(uploader, tmp_path):
+    collection = uploader.db['movies']
+    collection.insert_one(dict(titles(1)[0], **{SYNC_MARK_FIELD: 'old-run'}))
+    collection.update_one({'tconst': 'tt0000001'}, {'$set': {'cast': [{'nconst': 'nm1'}]}})
+
+    counts = uploader.sync_json_file(write_ndjson(tmp_path / 'titles.ndjson', titles(1)), 'movies',
+                                     delete_missing=True)
+
+    assert counts['modified'] == 1
+    assert SYNC_MARK_FIELD not in collection.find_one({'tconst': 'tt0000001'})
+    # Without the legacy stamp, fields the file does not carry (relations) do not count as changes
+    collection.update_one({'tconst': 'tt0000001'}, {'$set': {'cast': [{'nconst': 'nm1'}]}})
+    again = uploader.sync_json_file(write_ndjson(tmp_path / 'titles.ndjson', titles(1)), 'movies',
+                                    delete_missing=True)
+    assert again['unchanged'] == 1
+    assert collection.find_one({'tconst': 'tt0000001'})['cast'] == [{'nconst': 'nm1'}]
+
+
+def test_sync_keeps_relations_embedded_by_attach_relations(uploader, tmp_path):
+    collection = uploader.db['movies']
+    collection.insert_many([dict(record, averageRating=8.0, numVotes=100, cast=[], directors=[])
+                            for record in titles(2)])
+
+    records = titles(2)
+    records[0]['primaryTitle'] = 'A2'
+    del records[1]['genres']
+    counts = uploader.sync_json_file(write_ndjson(tmp_path / 'titles.ndjson', records), 'movies')
+
+    assert counts['modified'] == 2
+    changed = {k: v for k, v in collection.find_one({'tconst': 'tt0000001'}).items() if k != '_id'}
+    assert changed == dict(records[0], averageRating=8.0, numVotes=100, cast=[], directors=[])
+    # A source field dropped from the file is unset, relations stay
+    trimmed = collection.find_one({'tconst': 'tt0000002'})
+    assert 'genres' not in trimmed and trimmed['numVotes'] == 100
+
+
+def test_resumed_sync_still_knows_keys_of_committed_batches(uploader, tmp_path):
+    path = write_ndjson(tmp_path / 'titles.ndjson', titles(6))
+    uploader.sync_json_file(path, 'movies', batch_size=2)
+    checkpoint_path = str(tmp_path / 'sync.checkpoint.json')
+    # A crash after two of the three batches
+    uploader.sync_json_file(path, 'movies', batch_size=2, checkpoint_path=checkpoint_path)
+    checkpoint = {'file': upload._file_signature(path), 'collection': 'movies', 'batch_size': 2,
+                  'phase': 'upsert', 'batches_committed': 2, 'key_field': 'tconst',
+                  'counts': {'upserted': 0, 'modified': 0, 'unchanged': 4, 'deleted': 0, 'failed': 0}}
+    upload.save_checkpoint(checkpoint_path, checkpoint)
+
+    counts = uploader.sync_json_file(path, 'movies', batch_size=2, delete_missing=True,
+                                     checkpoint_path=checkpoint_path)
+
+    assert counts['deleted'] == 0
+    assert uploader.db['movies'].count_documents({}) == 6
+
+
+def test_reload_swaps_in_new_generation_and_rollback_restores_previous(uploader, tmp_path):
+    assert uploader.reload_collection(write_ndjson(tmp_path / 'v1.ndjson', titles(3)), 'movies', writers=1) == 1
+    assert uploader.reload_collection(write_ndjson(tmp_path / 'v2.ndjson', titles(5, year=2010)), 'movies',
+                                      writers=1) == 2
+
+    meta = uploader.db['_generations'].find_one({'_id': 'movies'})
+    assert meta['generation'] == 2 and meta['previous'] == ['movies__gen_1']
+    assert uploader.db['movies'].count_documents({}) == 5
+    assert uploader.db['movies__gen_1'].count_documents({}) == 3
+    assert not [name for name in uploader.db.list_collection_names() if '__staging_' in name]
+
+    assert uploader.rollback_collection('movies') == 1
+    live = uploader.db['movies']
+    assert live.count_documents({}) == 3 and live.find_one()['startYear'] == 2000
+    assert 'tconst_1' in live.index_information()
+    assert uploader.db['_generations'].find_one({'_id': 'movies'})['previous'] == ['movies__gen_2']
+
+
+def test_failed_swap_leaves_live_collection_untouched(uploader, tmp_path, monkeypatch):
+    uploader.reload_collection(write_ndjson(tmp_path / 'v1.ndjson', titles(3)), 'movies', writers=1)
+    rename = mongomock.collection.Collection.rename
+
+    def fail_staging_rename(self, new_name, **kwargs):
+        if '__staging_' in self.name:
+            raise RuntimeError("rename failed")
+        return rename(self, new_name, **kwargs)
+    monkeypatch.setattr(mongomock.collection.Collection, 'rename', fail_staging_rename)
+
+    assert uploader.reload_collection(write_ndjson(tmp_path / 'v2.ndjson', titles(5)), 'movies',
+                                      writers=1) is None
+    assert uploader.db['movies'].count_documents({}) == 3
+    assert 'tconst_1' in uploader.db['movies'].index_information()
+    assert 'movies__gen_1' not in uploader.db.list_collection_names()
+    assert uploader.db['_generations'].find_one({'_id': 'movies'})['generation'] == 1
+
+
+def test_swap_moves_the_live_collection_aside_without_copying(uploader, tmp_path, monkeypatch):
+    uploader.reload_collection(write_ndjson(tmp_path / 'v1.ndjson', titles(3)), 'movies', writers=1)
+
+    def no_copy(self, pipeline, **kwargs):
+        assert not any('$out' in stage for stage in pipeline), "live collection copied with $out"
+        return aggregate(self, pipeline, **kwargs)
+    aggregate = mongomock.collection.Collection.aggregate
+    monkeypatch.setattr(mongomock.collection.Collection, 'aggregate', no_copy)
+
+    assert uploader.reload_collection(write_ndjson(tmp_path / 'v2.ndjson', titles(5)), 'movies', writers=1) == 2
+    assert 'tconst_1' in uploader.db['movies__gen_1'].index_information()
+
+
+def test_rollback_without_previous_generation_returns_none(uploader):
+    assert uploader.rollback_collection('movies') is None
+
+
+def test_reload_resolves_relations_against_configured_names_collection(uploader, tmp_path):
+    uploader.db['people'].insert_one({"nconst": "nm0000001", "primaryName": "Ada Actor"})
+    relations = write_ndjson(tmp_path / 'relations.ndjson', [
+        {"tconst": "tt0000001", "averageRating": 8.1, "numVotes": 1200,
+         "principals": [{"nconst": "nm0000001", "category": "actor", "characters": ["Hero"]}]}])
+
+    assert uploader.reload_collection(write_ndjson(tmp_path / 'titles.ndjson', titles(2)), 'movies', writers=1,
+                                      relations_path=relations, names_collection='people') == 1
+
+    title = uploader.db['movies'].find_one({'tconst': 'tt0000001'})
+    assert title['averageRating'] == 8.1
+    assert title['cast'][0]['primaryName'] == 'Ada Actor'
+
+
+@pytest.mark.parametrize('name', ['titles.json', 'titles.json.gz', 'titles.ndjson', 'titles.ndjson.gz'])
+def test_iter_json_records_reads_arrays_and_ndjson(tmp_path, name):
+    records = titles(7) + [{"tconst": "tt0000099", "primaryTitle": "Çiçek", "startYear": None, "genres": None}]
+    path = tmp_path / name
+    if '.ndjson' in name:
+        with (gzip.open if name.endswith('.gz') else open)(path, 'wt', encoding='utf-8') as f:
+            f.write('\n'.join(json.dumps(record) for record in records) + '\n\n')
+    else:
+        write_json_array(path, records)
+    assert list(iter_json_records(str(path))) == records
+
+
+@pytest.mark.parametrize('text', ['[]', ' [ ] ', '[{"a": 1}]', '[{"a": 1}, {"b": [2, 3]}]\n'])
+def test_json_array_reader_matches_json_load(text):
+    assert list(upload._iter_json_array(io.StringIO(text))) == json.loads(text)
+
+
+def test_json_array_reader_refills_small_blocks():
+    records = [{"tconst": f"tt{i:07d}", "title": "x" * i} for i in range(50)]
+    assert list(upload._iter_json_array(io.StringIO(json.dumps(records)), block_size=7)) == records
+
+
+@pytest.mark.parametrize('text', ['{"a": 1}', '[{"a": 1}', '[{"a": 1} {"b": 2}]', '[{"a": 1}] x'])
+def test_json_array_reader_rejects_malformed_input(text):
+    with pytest.raises(ValueError):
+        list(upload._iter_json_array(io.StringIO(text)))
+
+
+def test_iter_batches_is_lazy():
+    consumed = []
+
+    def records():
+        for i in range(10):
+            consumed.append(i)
+            yield {"i": i}
+
+    batches = iter_batches(records(), 4)
+    assert [record["i"] for record in next(batches)] == [0, 1, 2, 3]
+    assert consumed == [0, 1, 2, 3]
+    assert [len(batch) for batch in batches] == [4, 2]
+
+
+def test_streaming_upload_matches_whole_file_upload(uploader, tmp_path):
+    path = write_json_array(tmp_path / 'titles.json', titles(11))
+    with open(path, encoding='utf-8') as f:
+        uploader.db['whole'].insert_many(json.load(f))
+    assert uploader.upload_json_stream(path, 'streamed', batch_size=4) == (11, [])
+    assert stored(uploader.db['streamed']) == stored(uploader.db['whole'])
+
+
+def test_upload_json_file_streams_instead_of_loading_the_file(uploader, tmp_path, monkeypatch):
+    def no_load(*args, **kwargs):
+        raise AssertionError("json.load reads the whole file into memory")
+    monkeypatch.setattr(upload.json, 'load', no_load)
+
+    path = write_json_array(tmp_path / 'titles.json.gz', titles(11))
+    assert uploader.upload_json_file(path, 'movies', batch_size=4) == (11, [])
+    assert stored(uploader.db['movies']) == titles(11)
+
+
+def test_parallel_upload_inserts_every_batch_once(uploader, tmp_path):
+    records = titles(50) + [titles(1)[0]]
+    uploader.db['parallel'].create_index('tconst', unique=True)
+    path = write_json_array(tmp_path / 'titles.json', records)
+
+    inserted, failed = uploader.upload_json_parallel(path, 'parallel', batch_size=3, writers=4, queue_size=2)
+    assert inserted == 50 and len(failed) == 1
+    assert stored(uploader.db['parallel']) == sorted(titles(50), key=lambda doc: doc['tconst'])
+
+
+def test_parallel_upload_stops_on_writer_error(uploader, tmp_path, monkeypatch):
+    calls = []
+
+    def broken_insert_many(self, documents, ordered=True, **kwargs):
+        calls.append(len(documents))
+        raise RuntimeError("connection lost")
+    monkeypatch.setattr(mongomock.collection.Collection, 'insert_many', broken_insert_many)
+
+    path = write_json_array(tmp_path / 'titles.json', titles(200))
+    assert uploader.upload_json_parallel(path, 'parallel', batch_size=2, writers=2, queue_size=1) == (0, [])
+    assert len(calls) < 100
+
+
+def test_normalize_record_builds_the_search_schema():
+    record = {"tconst": "tt1", "primaryTitle": "Çiçek  Straße", "originalTitle": None, "startYear": 1994.0,
+              "runtimeMinutes": 90.5, "genres": "Drama,Comedy", "isAdult": 0.0}
+    normalized = upload.normalize_record(dict(record))
+
+    assert normalized["genres"] == ["Drama", "Comedy"]
+    assert normalized["startYear"] == 1994 and isinstance(normalized["startYear"], int)
+    assert normalized["runtimeMinutes"] == 90.5
+    assert normalized["primaryTitleKey"] == "cicek strasse"
+    assert normalized["originalTitleKey"] is None
+    assert upload.normalize_record(dict(normalized)) == normalized
+
+
+def test_normalized_upload_matches_search_mode_records(uploader, tmp_path):
+    legacy = [{"tconst": "tt0000001", "primaryTitle": "Ünal", "originalTitle": "Ünal", "startYear": 2001.0,
+               "genres": "Drama,Short"}]
+    search = [{"tconst": "tt0000001", "primaryTitle": "Ünal", "originalTitle": "Ünal", "startYear": 2001,
+               "genres": ["Drama", "Short"], "primaryTitleKey": "unal", "originalTitleKey": "unal"}]
+    uploader.upload_json_stream(write_json_array(tmp_path / 'legacy.json', legacy), 'legacy', normalize=True)
+    uploader.upload_json_stream(write_json_array(tmp_path / 'search.json', search), 'search', normalize=True)
+    assert stored(uploader.db['legacy']) == stored(uploader.db['search']) == search
+
+
+def test_attach_relations_embeds_cast_and_known_for_cards(uploader, tmp_path):
+    uploader.db['movies'].insert_many(titles(2))
+    people = uploader.db['people']
+    people.insert_many([{"nconst": "nm0000001", "primaryName": "Ada Actor", "knownForTitles": "tt0000002,tt0000001"},
+                        {"nconst": "nm0000002", "primaryName": "Dee Director", "knownForTitles": "tt0009999"}])
+    principals = [{"nconst": f"nm{i:07d}", "category": "actor"} for i in range(3, 10)]
+    relations = write_ndjson(tmp_path / 'relations.ndjson', [
+        {"tconst": "tt0000001", "averageRating": 8.1, "numVotes": 1200,
+         "principals": [{"nconst": "nm0000001", "category": "actor", "characters": ["Hero"]},
+                        {"nconst": "nm0000002", "category": "director", "characters": None}] + principals},
+        {"tconst": "tt0000002", "numVotes": 30, "principals": []},
+        {"tconst": "tt0009999", "averageRating": 5.0, "numVotes": 1}])
+
+    assert uploader.attach_relations('movies', relations, batch_size=2, names_collection='people') == \
+        {'titles': 2, 'people': 0}
+    title = uploader.db['movies'].find_one({'tconst': 'tt0000001'})
+    assert len(title['cast']) == upload.TOP_CAST
+    assert title['cast'][0] == {"nconst": "nm0000001", "primaryName": "Ada Actor", "category": "actor",
+                                "characters": ["Hero"]}
+    assert title['cast'][1]['primaryName'] is None
+    assert title['directors'] == [{"nconst": "nm0000002", "primaryName": "Dee Director"}]
+
+    assert uploader.attach_relations('people', titles_collection='movies') == {'titles': 0, 'people': 2}
+    ada = people.find_one({'nconst': 'nm0000001'})
+    assert [card['tconst'] for card in ada['knownFor']] == ['tt0000002', 'tt0000001']
+    assert ada['numVotes'] == 1230 and ada['knownFor'][1]['averageRating'] == 8.1
+    dee = people.find_one({'nconst': 'nm0000002'})
+    assert dee['knownFor'] == [] and 'numVotes' not in dee
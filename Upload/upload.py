@@ -1,9 +1,330 @@
 import json
+import gzip
+import itertools
+import queue
+import threading
+import time
+import unicodedata
 import pymongo
-from pymongo import MongoClient
+from pymongo import MongoClient, DeleteMany, UpdateOne
 from datetime import datetime
 import os
-from typing import Optional
+import sys
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+
+def _open_text(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def _iter_json_array(f, block_size: int = 1 << 20) -> Iterator[dict]:
+    """
+    Yield the elements of a top-level JSON array without loading the whole file
+
+    The structure ('[', ',', ']') is checked strictly, including trailing data
+    after the closing bracket; malformed input raises ValueError.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = '', 0
+
+    def refill() -> bool:
+        nonlocal buffer, pos
+        more = f.read(block_size)
+        buffer, pos = buffer[pos:] + more, 0
+        return bool(more)
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not refill():
+                return ''
+
+    if next_char() != '[':
+        raise ValueError("JSON array must start with '['")
+    pos += 1
+
+    if next_char() == ']':
+        pos += 1
+    else:
+        while True:
+            if not next_char():
+                raise ValueError("Unexpected end of file")
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                    break
+                except json.JSONDecodeError:
+                    if not refill():
+                        raise
+            yield record
+            pos = end
+
+            char = next_char()
+            if char == ',':
+                pos += 1
+            elif char == ']':
+                pos += 1
+                break
+            elif not char:
+                raise ValueError("Unexpected end of file")
+            else:
+                raise ValueError(f"Unexpected character in JSON array: {char!r}")
+
+    if next_char():
+        raise ValueError("Unexpected data after the JSON array")
+
+
+def iter_json_records(json_file_path: str, normalize: bool = False) -> Iterator[dict]:
+    """
+    Stream records from a JSON array or NDJSON file (optionally .gz)
+
+    The format is detected from the first non-whitespace character:
+    '[' means a JSON array, anything else is read as one JSON document per line.
+    With normalize=True every record is passed through normalize_record.
+    """
+    if normalize:
+        yield from map(normalize_record, iter_json_records(json_file_path))
+        return
+
+    with _open_text(json_file_path) as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        if not head:
+            return
+
+        f.seek(0)
+
+        if head == '[':
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+NATURAL_KEYS = ["tconst", "nconst"]
+
+# Search schema (same as the converter's mode="search")
+LIST_FIELDS = ["genres", "primaryProfession", "knownForTitles"]
+INTEGER_FIELDS = ["isAdult", "startYear", "endYear", "runtimeMinutes", "birthYear", "deathYear", "numVotes"]
+SEARCH_KEY_FIELDS = {"primaryTitle": "primaryTitleKey", "originalTitle": "originalTitleKey",
+                     "primaryName": "primaryNameKey"}
+
+# Indexes for title.basics (numVotes + key: popularity-ordered search pages)
+TITLE_INDEXES = ["tconst", "titleType", "startYear", "genres", "primaryTitleKey",
+                 [("numVotes", -1), ("tconst", 1)]]
+# Indexes for name.basics
+NAME_INDEXES = ["nconst", "primaryName", "birthYear", "primaryProfession", "primaryNameKey",
+                [("numVotes", -1), ("nconst", 1)]]
+
+# Denormalized relations (converter's convert_title_relations output, see attach_relations)
+TOP_CAST = 5
+CAST_CATEGORIES = ("actor", "actress", "self")
+KNOWN_FOR_FIELDS = ["tconst", "titleType", "primaryTitle", "startYear", "averageRating", "numVotes"]
+
+# Collection holding one generation document per live collection (blue/green reloads)
+GENERATIONS_COLLECTION = "_generations"
+
+# Field older sync runs stamped into documents; sync_json_file rewrites documents that still carry it
+SYNC_MARK_FIELD = "_syncRun"
+
+# Collection holding precomputed facet counts (titleType x startYear decade x genre) per live collection
+FACETS_COLLECTION = "_facets"
+
+# startYear as int (search schema) or float (legacy converter output, 1994.0); null otherwise
+_YEAR_EXPRESSION = {"$convert": {"input": "$startYear", "to": "int", "onError": None, "onNull": None}}
+# genres as array (search schema) or "Drama,Short" string
+_GENRES_EXPRESSION = {"$cond": [{"$isArray": "$genres"}, "$genres",
+                                {"$split": [{"$ifNull": ["$genres", ""]}, ","]}]}
+
+
+def facet_summary_pipeline() -> list:
+    """
+    One pass over a title collection: document counts per (titleType, decade) and
+    document-genre counts per (titleType, decade, genre)
+    """
+    return [
+        {"$project": {
+            "_id": 0,
+            "t": "$titleType",
+            "d": {"$multiply": [{"$floor": {"$divide": [_YEAR_EXPRESSION, 10]}}, 10]},
+            "g": _GENRES_EXPRESSION,
+        }},
+        {"$facet": {
+            "docs": [{"$group": {"_id": {"t": "$t", "d": "$d"}, "n": {"$sum": 1}}}],
+            "genres": [
+                {"$unwind": "$g"},
+                {"$match": {"g": {"$nin": ["", None]}}},
+                {"$group": {"_id": {"t": "$t", "d": "$d", "g": "$g"}, "n": {"$sum": 1}}},
+            ],
+        }},
+    ]
+
+
+def title_relation_fields(relation: dict, names: dict) -> dict:
+    """
+    Fields embedded into a title from its relation record
+
+    Args:
+        relation: {"tconst", "averageRating", "numVotes", "principals": [{"nconst", "category", "characters"}]}
+        names: nconst -> primaryName for the principals of this batch
+    """
+    fields = {}
+    for field in ("averageRating", "numVotes"):
+        if relation.get(field) is not None:
+            fields[field] = relation[field]
+
+    principals = relation.get("principals") or []
+    fields["cast"] = [
+        {"nconst": p["nconst"], "primaryName": names.get(p["nconst"]), "category": p.get("category"),
+         "characters": p.get("characters")}
+        for p in principals if p.get("category") in CAST_CATEGORIES
+    ][:TOP_CAST]
+    fields["directors"] = [{"nconst": p["nconst"], "primaryName": names.get(p["nconst"])}
+                           for p in principals if p.get("category") == "director"]
+    return fields
+
+
+def known_for_fields(known_for_titles, titles: dict) -> dict:
+    """
+    Fields embedded into a person: known-for title cards (in IMDb order) and their summed numVotes
+    """
+    if isinstance(known_for_titles, str):
+        known_for_titles = known_for_titles.split(',')
+    known_for = [titles[tconst] for tconst in known_for_titles or [] if tconst in titles]
+    votes = sum(title.get("numVotes") or 0 for title in known_for)
+    fields = {"knownFor": known_for}
+    if votes:
+        fields["numVotes"] = votes
+    return fields
+
+
+@lru_cache(maxsize=1)
+def _combining_marks_table() -> dict:
+    return {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.combining(chr(cp))}
+
+
+def fold_text(text: str) -> str:
+    """
+    Search key for a title or name: NFKD, accents removed, casefolded, whitespace collapsed
+    """
+    if text.isascii():
+        return ' '.join(text.lower().split())
+    decomposed = unicodedata.normalize('NFKD', text).translate(_combining_marks_table())
+    return ' '.join(decomposed.casefold().split())
+
+
+def normalize_record(record: dict) -> dict:
+    """
+    Convert a record to the search schema in place (idempotent)
+
+    Comma-separated list fields become arrays, integral floats become ints and
+    the folded *Key fields are added. Files written with the converter's
+    mode="search" already have this shape and pass through unchanged.
+    """
+    for field in LIST_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = value.split(',')
+    for field in INTEGER_FIELDS:
+        value = record.get(field)
+        if isinstance(value, float) and value.is_integer():
+            record[field] = int(value)
+    for field, key_field in SEARCH_KEY_FIELDS.items():
+        if field in record:
+            value = record[field]
+            record[key_field] = fold_text(value) if isinstance(value, str) else None
+    return record
+
+
+def detect_key_field(record: dict) -> str:
+    """
+    Return the natural key of an IMDb record (tconst for titles, nconst for names)
+    """
+    for field in NATURAL_KEYS:
+        if field in record:
+            return field
+    raise ValueError(f"Record has no natural key field ({', '.join(NATURAL_KEYS)})")
+
+
+def _file_signature(path: str) -> dict:
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def load_checkpoint(checkpoint_path: Optional[str]) -> Optional[dict]:
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint_path: Optional[str], checkpoint: dict):
+    """
+    Write the checkpoint atomically (temp file + rename) so a crash never leaves it half-written
+    """
+    if not checkpoint_path:
+        return
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+_MISSING = object()
+
+
+def record_changed(stored: Optional[dict], record: dict, removed: Iterable[str] = ()) -> bool:
+    """
+    True if the stored document differs from the record in any of the record's fields
+
+    Fields the record does not carry (relations embedded by attach_relations) are
+    not compared, except the removed source fields that the stored document still has.
+    Documents still stamped by an older sync run count as changed.
+    """
+    if stored is None or SYNC_MARK_FIELD in stored:
+        return True
+    return (any(field in stored for field in removed)
+            or any(stored.get(field, _MISSING) != value for field, value in record.items()))
+
+
+def sync_update(record: dict, removed: Iterable[str] = ()) -> dict:
+    """
+    $set / $unset update for a synced record: only the file's fields are written
+
+    A whole-document replace would drop the fields attach_relations embedded (ratings,
+    cast, directors, knownFor), which a sync or delta run does not attach again.
+    removed: source fields the batch carries but this record does not (unset)
+    """
+    unset = dict.fromkeys(removed, "")
+    unset[SYNC_MARK_FIELD] = ""
+    return {'$set': record, '$unset': unset}
+
+
+def _collect_keys(records: Iterable[dict], keys: set, key_field: Optional[str]) -> Iterator[dict]:
+    for record in records:
+        keys.add(record[key_field or detect_key_field(record)])
+        yield record
+
+
+def iter_batches(records: Iterable[dict], batch_size: int) -> Iterator[list]:
+    """
+    Group records into lists of batch_size lazily
+    """
+    iterator = iter(records)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
 
 class MongoDBUploader:
     def __init__(self, connection_string: str = None, database_name: str = "imdb_database"):
@@ -35,81 +356,705 @@ class MongoDBUploader:
         """
         Upload JSON file to MongoDB
         
+        Kept for existing callers; delegates to upload_json_stream, so the file is
+        read incrementally instead of being loaded with json.load.
+        
         Args:
             json_file_path: JSON file path
             collection_name: MongoDB collection name
             batch_size: Batch size (for performance)
         """
+        return self.upload_json_stream(json_file_path, collection_name, batch_size)
+    
+    def upload_json_stream(self, json_file_path: str, collection_name: str, batch_size: int = 1000,
+                           normalize: bool = False):
+        """
+        Upload a JSON array or NDJSON file (optionally .gz) without loading it into memory
+        
+        Records are parsed incrementally and grouped into batches lazily, so peak
+        memory is one batch regardless of file size.
+        
+        Args:
+            json_file_path: JSON / NDJSON file path
+            collection_name: MongoDB collection name
+            batch_size: Batch size (for performance)
+            normalize: Convert records to the search schema (see normalize_record)
+        """
         try:
-            print(f"📂 Reading JSON file: {json_file_path}")
-            
-            # Read JSON file
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            print(f"📂 Streaming JSON file: {json_file_path}")
             
-            print(f"📊 Total records: {len(data)}")
-            
-            # Get or create collection
             collection = self.db[collection_name]
+            self._confirm_clear(collection)
             
-            # If collection exists, clear it (optional)
-            existing_count = collection.count_documents({})
-            if existing_count > 0:
-                print(f"⚠️  Collection already has {existing_count} records!")
-                choice = input("Type 'y' to delete existing data: ").strip().lower()
-                if choice == 'y':
-                    collection.delete_many({})
-                    print("🗑️  Existing data deleted!")
-            
-            # Upload data in batches
             print(f"🚀 Uploading data in batches of {batch_size}...")
             
             total_inserted = 0
+            total_records = 0
             failed_inserts = []
+            start = time.perf_counter()
+            
+            for batch_number, batch in enumerate(iter_batches(iter_json_records(json_file_path, normalize), batch_size), 1):
+                inserted, errors = self._insert_batch(collection, batch, batch_number)
+                total_inserted += inserted
+                total_records += len(batch)
+                failed_inserts.extend(errors)
+            
+            elapsed = time.perf_counter() - start
+            rate = total_records / elapsed if elapsed > 0 else 0.0
+            
+            self._report_upload(collection, total_inserted, failed_inserts)
+            print(f"⚡ Throughput: {rate:,.0f} records/sec ({total_records} records in {elapsed:.1f}s)")
+            
+            return total_inserted, failed_inserts
+            
+        except Exception as e:
+            print(f"❌ Upload error: {e}")
+            import traceback
+            traceback.print_exc()
+            return 0, []
+    
+    def upload_json_parallel(self, json_file_path: str, collection_name: str, batch_size: int = 1000,
+                             writers: int = 4, queue_size: Optional[int] = None, normalize: bool = False):
+        """
+        Pipelined upload: parsing overlaps with several concurrent insert_many writers
+        
+        The calling thread parses the file and puts batches on a bounded queue;
+        `writers` threads take batches off the queue and insert them. When the queue
+        is full the parser blocks (backpressure), so memory stays bounded at about
+        (queue_size + writers) batches.
+        
+        Args:
+            json_file_path: JSON / NDJSON file path
+            collection_name: MongoDB collection name
+            batch_size: Batch size (for performance)
+            writers: Number of concurrent insert_many workers
+            queue_size: Maximum number of parsed batches waiting for a writer (default: 2 * writers)
+            normalize: Convert records to the search schema (see normalize_record)
+        """
+        try:
+            print(f"📂 Streaming JSON file: {json_file_path}")
+            
+            collection = self.db[collection_name]
+            self._confirm_clear(collection)
+            
+            print(f"🚀 Uploading data in batches of {batch_size} with {writers} writers...")
+            
+            batches = queue.Queue(maxsize=queue_size or 2 * writers)
+            lock = threading.Lock()
+            stop = threading.Event()
+            totals = {'inserted': 0, 'records': 0}
+            failed_inserts = []
+            worker_errors = []
+            
+            def writer():
+                while True:
+                    item = batches.get()
+                    if item is None:
+                        return
+                    if stop.is_set():
+                        continue
+                    batch_number, batch = item
+                    try:
+                        inserted, errors = self._insert_batch(collection, batch, batch_number)
+                    except Exception as e:
+                        # Non-bulk errors (e.g. lost connection) abort the whole upload
+                        with lock:
+                            worker_errors.append(e)
+                        stop.set()
+                        continue
+                    with lock:
+                        totals['inserted'] += inserted
+                        totals['records'] += len(batch)
+                        failed_inserts.extend(errors)
+            
+            threads = [threading.Thread(target=writer, name=f"mongo-writer-{i}", daemon=True)
+                       for i in range(writers)]
+            for thread in threads:
+                thread.start()
+            
+            start = time.perf_counter()
+            try:
+                for batch_number, batch in enumerate(iter_batches(iter_json_records(json_file_path, normalize), batch_size), 1):
+                    if stop.is_set():
+                        break
+                    batches.put((batch_number, batch))
+            finally:
+                for _ in threads:
+                    batches.put(None)
+                for thread in threads:
+                    thread.join()
+            elapsed = time.perf_counter() - start
+            
+            if worker_errors:
+                raise worker_errors[0]
+            
+            rate = totals['records'] / elapsed if elapsed > 0 else 0.0
+            self._report_upload(collection, totals['inserted'], failed_inserts)
+            print(f"⚡ Throughput: {rate:,.0f} records/sec ({totals['records']} records in {elapsed:.1f}s, "
+                  f"{writers} writers)")
+            
+            return totals['inserted'], failed_inserts
+            
+        except Exception as e:
+            print(f"❌ Upload error: {e}")
+            import traceback
+            traceback.print_exc()
+            return 0, []
+    
+    def sync_json_file(self, json_file_path: str, collection_name: str, key_field: Optional[str] = None,
+                       batch_size: int = 1000, delete_missing: bool = False,
+                       deleted_file_path: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                       normalize: bool = False):
+        """
+        Non-interactive, idempotent sync: upsert every changed record by its natural key
+        
+        Each batch reads the stored versions of its records with one $in query and sends
+        an unordered bulk_write of UpdateOne(upsert=True) for the new and changed ones
+        only (the file's fields are $set, fields embedded by attach_relations are kept), so re-running the same file writes nothing and never creates duplicates.
+        After every committed batch a checkpoint is written; a restarted run with the
+        same file and batch size resumes after the last committed batch.
+        
+        Args:
+            json_file_path: JSON / NDJSON file path
+            collection_name: MongoDB collection name
+            key_field: Natural key (default: detected, tconst or nconst)
+            batch_size: Batch size (for performance)
+            delete_missing: Delete documents that are not in the file (full sync).
+                The file's keys are collected in memory (about 100 bytes per key) and
+                compared with the collection's keys after the upsert pass.
+            deleted_file_path: JSON / NDJSON file with keys to delete (converter delta output)
+            checkpoint_path: Checkpoint file for resumable runs (removed on success)
+            normalize: Convert records to the search schema (see normalize_record)
+        
+        Returns:
+            Dict with upserted, modified, unchanged, deleted and failed counts
+        """
+        try:
+            collection = self.db[collection_name]
+            signature = _file_signature(json_file_path)
+            
+            checkpoint = load_checkpoint(checkpoint_path)
+            if (checkpoint and checkpoint.get('file') == signature
+                    and checkpoint.get('batch_size') == batch_size
+                    and checkpoint.get('collection') == collection_name):
+                print(f"♻️  Resuming from checkpoint: {checkpoint['batches_committed']} batches already committed")
+            else:
+                checkpoint = {
+                    'file': signature,
+                    'collection': collection_name,
+                    'batch_size': batch_size,
+                    'phase': 'upsert',
+                    'batches_committed': 0,
+                    'counts': {'upserted': 0, 'modified': 0, 'unchanged': 0, 'deleted': 0, 'failed': 0},
+                }
+            counts = checkpoint['counts']
+            # Keys seen in the file (delete_missing); skipped batches of a resumed run are counted too
+            file_keys = set() if delete_missing else None
             
-            for i in range(0, len(data), batch_size):
-                batch = data[i:i + batch_size]
+            print(f"🔄 Syncing {json_file_path} -> {collection_name} (batch size {batch_size})")
+            start = time.perf_counter()
+            records_processed = 0
+            
+            if checkpoint['phase'] == 'upsert':
+                records = iter_json_records(json_file_path, normalize)
+                if file_keys is not None:
+                    records = _collect_keys(records, file_keys, key_field)
+                skip = checkpoint['batches_committed'] * batch_size
+                batches = iter_batches(itertools.islice(records, skip, None), batch_size)
                 
-                try:
-                    # Insert batch into MongoDB
-                    result = collection.insert_many(batch, ordered=False)
-                    total_inserted += len(result.inserted_ids)
+                for batch_number, batch in enumerate(batches, checkpoint['batches_committed'] + 1):
+                    if key_field is None:
+                        key_field = detect_key_field(batch[0])
+                        # Upserts look up by key; without an index every replace is a collection scan
+                        collection.create_index(key_field)
                     
-                    print(f"✅ Batch {i//batch_size + 1}: Inserted {len(batch)} records")
+                    result = self._upsert_batch(collection, batch, key_field, batch_number)
+                    for name, value in result.items():
+                        counts[name] += value
+                    records_processed += len(batch)
                     
-                except pymongo.errors.BulkWriteError as e:
-                    # Some records might fail
-                    successful = len(batch) - len(e.details['writeErrors'])
-                    total_inserted += successful
-                    failed_inserts.extend(e.details['writeErrors'])
-                    
-                    print(f"⚠️  Batch {i//batch_size + 1}: Inserted {successful}/{len(batch)} records")
+                    checkpoint['batches_committed'] = batch_number
+                    checkpoint['key_field'] = key_field
+                    save_checkpoint(checkpoint_path, checkpoint)
+                
+                checkpoint['phase'] = 'delete'
+                save_checkpoint(checkpoint_path, checkpoint)
+            elif file_keys is not None:
+                # Resumed in the delete phase: read the keys again
+                key_field = key_field or checkpoint.get('key_field')
+                file_keys.update(record[key_field] for record in iter_json_records(json_file_path))
+            
+            key_field = key_field or checkpoint.get('key_field')
+            
+            if deleted_file_path and key_field:
+                counts['deleted'] += self._delete_keys(collection, key_field, deleted_file_path, batch_size)
             
-            # Report results
+            if delete_missing and key_field:
+                counts['deleted'] += self._delete_missing(collection, key_field, file_keys, batch_size)
+            
+            save_checkpoint(checkpoint_path, dict(checkpoint, phase='done'))
+            if checkpoint_path and os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+            if counts['upserted'] or counts['modified'] or counts['deleted']:
+                # Readers rebuild their indexes on a new revision; an unchanged file keeps them
+                self.build_facet_summary(collection_name)
+                self.touch_collection(collection_name)
+            
+            elapsed = time.perf_counter() - start
+            rate = records_processed / elapsed if elapsed > 0 else 0.0
             print("\n" + "="*50)
-            print(f"🎉 Upload completed!")
-            print(f"📊 Total successful: {total_inserted}")
-            print(f"❌ Failed: {len(failed_inserts)}")
-            print(f"🏷️  Collection: {collection_name}")
-            
-            # Collection stats
-            final_count = collection.count_documents({})
-            print(f"📈 Total documents in collection: {final_count}")
-            
-            if failed_inserts:
-                print(f"\n⚠️  Failed inserts:")
-                for error in failed_inserts[:5]:  # Show first 5 errors
-                    print(f"  - Index {error['index']}: {error['errmsg']}")
-                if len(failed_inserts) > 5:
-                    print(f"  ... and {len(failed_inserts) - 5} more errors")
+            print("🎉 Sync completed!")
+            print(f"🆕 Upserted: {counts['upserted']}")
+            print(f"✏️  Modified: {counts['modified']}")
+            print(f"➖ Unchanged: {counts['unchanged']}")
+            print(f"🗑️  Deleted: {counts['deleted']}")
+            print(f"❌ Failed: {counts['failed']}")
+            print(f"⚡ Throughput: {rate:,.0f} records/sec")
             
-            return total_inserted, failed_inserts
+            return counts
             
         except Exception as e:
-            print(f"❌ Upload error: {e}")
+            print(f"❌ Sync error: {e}")
+            if checkpoint_path:
+                print(f"💾 Progress saved, re-run to resume: {checkpoint_path}")
             import traceback
             traceback.print_exc()
-            return 0, []
+            return None
+    
+    def apply_delta(self, manifest_path: str, collection_name: str, batch_size: int = 1000,
+                    checkpoint_path: Optional[str] = None, normalize: bool = False):
+        """
+        Apply a converter delta (the <prefix>.delta.json manifest) with sync semantics
+        
+        Inserted and changed records are upserted, deleted keys are removed.
+        The delta files must be in json or ndjson format.
+        """
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        files = manifest['files']
+        key_field = manifest['key']
+        totals = {'upserted': 0, 'modified': 0, 'unchanged': 0, 'deleted': 0, 'failed': 0}
+        
+        steps = [
+            (files['inserted'], None),
+            (files['changed'], files['deleted']),
+        ]
+        for step_number, (upsert_path, deleted_path) in enumerate(steps, 1):
+            step_checkpoint = f"{checkpoint_path}.{step_number}" if checkpoint_path else None
+            counts = self.sync_json_file(upsert_path, collection_name, key_field=key_field,
+                                         batch_size=batch_size, deleted_file_path=deleted_path,
+                                         checkpoint_path=step_checkpoint, normalize=normalize)
+            if counts is None:
+                return None
+            for name, value in counts.items():
+                totals[name] += value
+        
+        return totals
+    
+    def reload_collection(self, json_file_path: str, collection_name: str, index_fields: Optional[list] = None,
+                          batch_size: int = 1000, writers: int = 4, keep_previous: int = 1,
+                          normalize: bool = False, relations_path: Optional[str] = None,
+                          names_collection: Optional[str] = None, titles_collection: Optional[str] = None):
+        """
+        Zero-downtime blue/green reload
+        
+        The file is loaded into a fresh staging collection, all indexes are built
+        once on the complete data, and only then is the staging collection renamed
+        over the live one in a single atomic rename. Readers keep using the old
+        generation at full speed during the load. With keep_previous > 0 the previous
+        live collection is renamed to <name>__gen_<n> (indexes included) for rollback.
+        A generation document in GENERATIONS_COLLECTION is updated on every swap so
+        readers can detect the reload.
+        
+        Args:
+            json_file_path: JSON / NDJSON file path
+            collection_name: Live collection name
+            index_fields: Fields to index (default: TITLE_INDEXES or NAME_INDEXES by record type)
+            batch_size: Batch size (for performance)
+            writers: Concurrent insert_many workers
+            keep_previous: Number of old generations to keep for rollback
+            normalize: Convert records to the search schema (see normalize_record)
+            relations_path: Converter relations file to embed before the swap (see attach_relations)
+            names_collection: Where principals' names are looked up (default: the staging collection)
+            titles_collection: Where known-for titles are looked up (default: the staging collection)
+        
+        Returns:
+            New generation number (None on error)
+        """
+        try:
+            meta = self.db[GENERATIONS_COLLECTION].find_one({'_id': collection_name}) or {}
+            generation = meta.get('last_generation', 0) + 1
+            staging_name = f"{collection_name}__staging_{generation}"
+            staging = self.db[staging_name]
+            staging.drop()
+            
+            print(f"🟦 Loading generation {generation} into staging collection: {staging_name}")
+            inserted, failed = self.upload_json_parallel(json_file_path, staging_name,
+                                                         batch_size=batch_size, writers=writers,
+                                                         normalize=normalize)
+            if inserted == 0:
+                print("❌ Nothing was loaded, live collection left untouched")
+                staging.drop()
+                return None
+            
+            if index_fields is None:
+                key_field = detect_key_field(staging.find_one() or {})
+                index_fields = TITLE_INDEXES if key_field == "tconst" else NAME_INDEXES
+            # Key indexes first: the relation updates below look documents up by tconst / nconst
+            self.create_indexes(staging_name, index_fields)
+            if relations_path:
+                # The live name itself resolves to the staging data that is about to replace it
+                staged = {None: staging_name, collection_name: staging_name}
+                self.attach_relations(staging_name, relations_path, batch_size=batch_size,
+                                      names_collection=staged.get(names_collection, names_collection),
+                                      titles_collection=staged.get(titles_collection, titles_collection))
+            self.build_facet_summary(staging_name, summary_name=collection_name)
+            
+            self._swap_in(collection_name, staging_name, generation, meta,
+                          {'source': os.path.abspath(json_file_path), 'documents': inserted,
+                           'failed': len(failed)},
+                          archive=keep_previous > 0)
+            self._drop_old_generations(collection_name, keep_previous)
+            
+            print(f"🟩 Generation {generation} is live: {collection_name}")
+            return generation
+            
+        except Exception as e:
+            print(f"❌ Reload error: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def rollback_collection(self, collection_name: str):
+        """
+        Swap the most recent kept generation back into place
+        
+        Kept generations are renamed aside with their indexes; any index the live
+        collection gained since is created on the target first, then it is renamed back.
+        
+        Returns:
+            Generation number that is live after the rollback (None if nothing to roll back to or on error)
+        """
+        try:
+            meta = self.db[GENERATIONS_COLLECTION].find_one({'_id': collection_name}) or {}
+            previous = meta.get('previous', [])
+            if not previous:
+                print(f"⚠️  No previous generation kept for {collection_name}")
+                return None
+            
+            target = previous[-1]
+            generation = int(target.rsplit('_', 1)[1])
+            print(f"⏪ Rolling back {collection_name} to generation {generation}")
+            self._copy_indexes(collection_name, target)
+            self.build_facet_summary(target, summary_name=collection_name)
+            self._swap_in(collection_name, target, generation, dict(meta, previous=previous[:-1]),
+                          {'rolled_back_from': meta.get('generation')})
+            print(f"🟩 Generation {generation} is live again: {collection_name}")
+            return generation
+            
+        except Exception as e:
+            print(f"❌ Rollback error: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def _swap_in(self, collection_name: str, source_name: str, generation: int, meta: dict, details: dict,
+                 archive: bool = True):
+        """
+        Replace the live collection with source_name, keeping the current live data as a generation
+        
+        With archive=True the live collection is first renamed to <name>__gen_<n>: a
+        metadata-only change that keeps its indexes and writes no data, so rollback
+        targets stay indexed and a reload adds no full-collection copy on the primary.
+        The live name is then missing only between the two renames (milliseconds; a
+        reader querying in that gap sees an empty result, not an error). Without an
+        archive the swap is a single atomic renameCollection with dropTarget. If
+        installing source_name fails, the archived generation is renamed back.
+        """
+        previous = list(meta.get('previous', []))
+        retired_name = None
+        if archive and collection_name in self.db.list_collection_names():
+            retired_name = f"{collection_name}__gen_{meta.get('generation', 0)}"
+            self.db[retired_name].drop()
+            self.db[collection_name].rename(retired_name)
+        try:
+            self.db[source_name].rename(collection_name, dropTarget=True)
+        except Exception:
+            if retired_name:
+                self.db[retired_name].rename(collection_name)
+            raise
+        if retired_name:
+            previous.append(retired_name)
+        
+        self.db[GENERATIONS_COLLECTION].replace_one(
+            {'_id': collection_name},
+            dict(details,
+                 generation=generation,
+                 last_generation=max(generation, meta.get('last_generation', 0)),
+                 previous=previous,
+                 revision=meta.get('revision', 0) + 1,
+                 swapped_at=datetime.utcnow()),
+            upsert=True
+        )
+    
+    def _copy_indexes(self, source_name: str, target_name: str):
+        """
+        Create source_name's secondary indexes on target_name (existing identical indexes are kept)
+        """
+        options = ('unique', 'sparse', 'partialFilterExpression', 'collation', 'expireAfterSeconds')
+        for name, info in self.db[source_name].index_information().items():
+            if name == '_id_':
+                continue
+            self.db[target_name].create_index(info['key'], name=name,
+                                              **{option: info[option] for option in options if option in info})
+    
+    def build_facet_summary(self, collection_name: str, summary_name: Optional[str] = None):
+        """
+        Precompute facet counts for the web app's faceted search
+        
+        Broad searches take their titleType / decade / genre counts from this summary
+        instead of running $group over every match per request. Only title collections
+        are summarized; other collections get their summary removed.
+        
+        Args:
+            collection_name: Collection to aggregate
+            summary_name: Live collection name the summary belongs to (default: collection_name;
+                reload_collection passes the live name while aggregating the staging collection)
+        
+        Returns:
+            Number of summary rows (None on error or for non-title collections)
+        """
+        summary_name = summary_name or collection_name
+        try:
+            collection = self.db[collection_name]
+            if detect_key_field(collection.find_one() or {}) != "tconst":
+                self.db[FACETS_COLLECTION].delete_one({'_id': summary_name})
+                return None
+            
+            start = time.perf_counter()
+            result = next(collection.aggregate(facet_summary_pipeline(), allowDiskUse=True), {})
+            docs = [dict(row['_id'], n=row['n']) for row in result.get('docs', [])]
+            genres = [dict(row['_id'], n=row['n']) for row in result.get('genres', [])]
+            
+            self.db[FACETS_COLLECTION].replace_one(
+                {'_id': summary_name},
+                {'total': sum(row['n'] for row in docs), 'docs': docs, 'genres': genres,
+                 'updated_at': datetime.utcnow()},
+                upsert=True
+            )
+            print(f"📊 Facet summary: {len(docs) + len(genres)} rows ({time.perf_counter() - start:.1f}s)")
+            return len(docs) + len(genres)
+            
+        except Exception as e:
+            print(f"⚠️  Facet summary error: {e}")
+            return None
+    
+    def attach_relations(self, collection_name: str, relations_path: Optional[str] = None,
+                         batch_size: int = 2000, names_collection: Optional[str] = None,
+                         titles_collection: Optional[str] = None):
+        """
+        Embed precomputed title <-> person joins so a search result card needs no extra lookups
+        
+        Titles get averageRating / numVotes and their top cast and directors with names
+        resolved (cast: [{nconst, primaryName, category, characters}], directors). People get
+        knownFor: their knownForTitles as small title cards, and numVotes summed over them so
+        search can rank people by popularity too. Each batch costs one $in read on the key
+        index plus one unordered bulk_write; running it again just overwrites the same fields.
+        
+        Args:
+            collection_name: Collection to update
+            relations_path: Converter relations file (convert_title_relations output).
+                Without it only the people pass runs.
+            batch_size: Relation records / people per batch
+            names_collection: Where principals' names are looked up (default: collection_name)
+            titles_collection: Where known-for titles are looked up (default: collection_name)
+        
+        Returns:
+            Dict with the number of titles and people updated (None on error)
+        """
+        try:
+            collection = self.db[collection_name]
+            names = self.db[names_collection or collection_name]
+            titles = self.db[titles_collection or collection_name]
+            counts = {'titles': 0, 'people': 0}
+            start = time.perf_counter()
+            
+            if relations_path:
+                for batch in iter_batches(iter_json_records(relations_path), batch_size):
+                    nconsts = list({p['nconst'] for relation in batch for p in relation.get('principals') or []})
+                    found = {}
+                    if nconsts:
+                        found = {doc['nconst']: doc.get('primaryName')
+                                 for doc in names.find({'nconst': {'$in': nconsts}},
+                                                       {'_id': 0, 'nconst': 1, 'primaryName': 1})}
+                    operations = [UpdateOne({'tconst': relation['tconst']},
+                                            {'$set': title_relation_fields(relation, found)})
+                                  for relation in batch]
+                    counts['titles'] += collection.bulk_write(operations, ordered=False).matched_count
+                print(f"🎭 Cast and ratings attached to {counts['titles']} titles")
+            
+            # People pass runs after the titles pass so known-for cards carry the new numVotes
+            people = collection.find({'nconst': {'$exists': True}, 'knownForTitles': {'$nin': [None, '', []]}},
+                                     {'_id': 0, 'nconst': 1, 'knownForTitles': 1}, batch_size=batch_size)
+            projection = dict.fromkeys(KNOWN_FOR_FIELDS, 1)
+            projection['_id'] = 0
+            for batch in iter_batches(people, batch_size):
+                tconsts = set()
+                for person in batch:
+                    known = person['knownForTitles']
+                    tconsts.update(known.split(',') if isinstance(known, str) else known)
+                found = {doc['tconst']: doc for doc in titles.find({'tconst': {'$in': list(tconsts)}}, projection)}
+                operations = [UpdateOne({'nconst': person['nconst']},
+                                        {'$set': known_for_fields(person['knownForTitles'], found)})
+                              for person in batch]
+                counts['people'] += collection.bulk_write(operations, ordered=False).matched_count
+            if counts['people']:
+                print(f"🎬 Known-for titles attached to {counts['people']} people")
+            
+            print(f"🔗 Relations attached in {time.perf_counter() - start:.1f}s")
+            return counts
+            
+        except Exception as e:
+            print(f"❌ Relation error: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def touch_collection(self, collection_name: str):
+        """
+        Bump the collection's revision in GENERATIONS_COLLECTION after an in-place change
+        
+        Readers (the web app) cache the collection profile and search indexes per
+        generation/revision and rebuild them when this marker changes. Swaps bump it too.
+        """
+        self.db[GENERATIONS_COLLECTION].update_one(
+            {'_id': collection_name},
+            {'$inc': {'revision': 1}, '$set': {'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+    
+    def _drop_old_generations(self, collection_name: str, keep_previous: int):
+        meta = self.db[GENERATIONS_COLLECTION].find_one({'_id': collection_name}) or {}
+        previous = meta.get('previous', [])
+        keep = previous[-keep_previous:] if keep_previous > 0 else []
+        for name in previous:
+            if name not in keep:
+                self.db[name].drop()
+                print(f"🗑️  Dropped old generation: {name}")
+        self.db[GENERATIONS_COLLECTION].update_one({'_id': collection_name}, {'$set': {'previous': keep}})
+    
+    def _upsert_batch(self, collection, batch: list, key_field: str, batch_number: int) -> dict:
+        """
+        Upsert the new and changed records of one batch, returning per-batch counts
+        
+        One $in read on the key index fetches the stored versions of the batch's fields;
+        records identical to them are skipped without a write. Source fields another
+        record of the batch carries but this one does not are unset.
+        """
+        fields = {field for record in batch for field in record}
+        projection = dict.fromkeys(fields | {SYNC_MARK_FIELD}, 1)
+        projection['_id'] = 0
+        stored = {doc.get(key_field): doc
+                  for doc in collection.find({key_field: {'$in': [record[key_field] for record in batch]}},
+                                             projection)}
+        operations = []
+        for record in batch:
+            removed = [field for field in fields if field not in record]
+            if record_changed(stored.get(record[key_field]), record, removed):
+                operations.append(UpdateOne({key_field: record[key_field]}, sync_update(record, removed),
+                                            upsert=True))
+        skipped = len(batch) - len(operations)
+        
+        details, failed = {}, 0
+        if operations:
+            try:
+                details = collection.bulk_write(operations, ordered=False).bulk_api_result
+            except pymongo.errors.BulkWriteError as e:
+                details = e.details
+                failed = len(details['writeErrors'])
+                for error in details['writeErrors'][:5]:
+                    print(f"  - Index {error['index']}: {error['errmsg']}")
+        
+        upserted = details.get('nUpserted', 0)
+        matched = details.get('nMatched', 0)
+        modified = details.get('nModified', 0)
+        unchanged = skipped + matched - modified
+        print(f"✅ Batch {batch_number}: {upserted} new, {modified} modified, {unchanged} unchanged"
+              + (f", {failed} failed" if failed else ""))
+        return {'upserted': upserted, 'modified': modified, 'unchanged': unchanged, 'failed': failed}
+    
+    def _delete_missing(self, collection, key_field: str, file_keys: set, batch_size: int) -> int:
+        """
+        Delete documents whose key is not in file_keys (one key-only pass over the collection)
+        """
+        documents = collection.find({}, {key_field: 1, '_id': 0}, batch_size=batch_size)
+        missing = (doc.get(key_field) for doc in documents if doc.get(key_field) not in file_keys)
+        deleted = 0
+        for keys in iter_batches(missing, batch_size):
+            deleted += collection.delete_many({key_field: {'$in': keys}}).deleted_count
+        print(f"🗑️  Removed {deleted} documents missing from the file")
+        return deleted
+    
+    def _delete_keys(self, collection, key_field: str, deleted_file_path: str, batch_size: int) -> int:
+        """
+        Delete documents whose keys are listed in a JSON / NDJSON file
+        """
+        deleted = 0
+        for batch in iter_batches(iter_json_records(deleted_file_path), batch_size):
+            keys = [record[key_field] for record in batch]
+            result = collection.bulk_write([DeleteMany({key_field: {'$in': keys}})], ordered=False)
+            deleted += result.deleted_count
+        print(f"🗑️  Deleted {deleted} documents listed in {deleted_file_path}")
+        return deleted
+    
+    def _confirm_clear(self, collection):
+        """
+        Ask before deleting existing documents in the target collection
+        """
+        existing_count = collection.count_documents({})
+        if existing_count > 0:
+            print(f"⚠️  Collection already has {existing_count} records!")
+            choice = input("Type 'y' to delete existing data: ").strip().lower()
+            if choice == 'y':
+                collection.delete_many({})
+                print("🗑️  Existing data deleted!")
+    
+    def _insert_batch(self, collection, batch: list, batch_number: int):
+        """
+        Insert one batch, returning (inserted count, write errors)
+        """
+        try:
+            # Insert batch into MongoDB
+            result = collection.insert_many(batch, ordered=False)
+            print(f"✅ Batch {batch_number}: Inserted {len(batch)} records")
+            return len(result.inserted_ids), []
+            
+        except pymongo.errors.BulkWriteError as e:
+            # Some records might fail
+            errors = e.details['writeErrors']
+            successful = len(batch) - len(errors)
+            print(f"⚠️  Batch {batch_number}: Inserted {successful}/{len(batch)} records")
+            return successful, errors
+    
+    def _report_upload(self, collection, total_inserted: int, failed_inserts: list):
+        # Report results
+        print("\n" + "="*50)
+        print("🎉 Upload completed!")
+        print(f"📊 Total successful: {total_inserted}")
+        print(f"❌ Failed: {len(failed_inserts)}")
+        print(f"🏷️  Collection: {collection.name}")
+        
+        # Collection stats
+        final_count = collection.count_documents({})
+        print(f"📈 Total documents in collection: {final_count}")
+        
+        if failed_inserts:
+            print("\n⚠️  Failed inserts:")
+            for error in failed_inserts[:5]:  # Show first 5 errors
+                print(f"  - Index {error['index']}: {error['errmsg']}")
+            if len(failed_inserts) > 5:
+                print(f"  ... and {len(failed_inserts) - 5} more errors")
     
     def create_indexes(self, collection_name: str, index_fields: list):
         """
@@ -220,6 +1165,16 @@ def main():
     DB_NAME = "imdb_database"            # Database name
     COLLECTION_NAME = "movies"           # Collection name
     BATCH_SIZE = 5000                   # Batch size
+    WRITERS = 4                         # Concurrent insert_many workers
+    # "reload": blue/green load into staging + index + swap (no downtime, keeps previous generation)
+    # "sync":   upsert by tconst/nconst in place (no prompt, resumable)
+    # "insert": insert into the live collection (asks before deleting existing data)
+    MODE = "reload"
+    CHECKPOINT_FILE = "upload.checkpoint.json"  # Resume point for sync runs
+    RELATIONS_FILE = None               # Converter relations file (cast, ratings), e.g. "relations.ndjson.gz"
+    NAMES_COLLECTION = None             # Collection with people, if stored apart from COLLECTION_NAME
+    TITLES_COLLECTION = None            # Collection with titles, if stored apart from COLLECTION_NAME
+    NORMALIZE = True                    # Arrays for genres/professions, int years, *Key search fields
     
     # MongoDB connection string options:
     # Local: "mongodb://localhost:27017/"
@@ -236,24 +1191,59 @@ def main():
             print("Please check the file path!")
             return
         
-        # Upload process
-        inserted_count, failed = uploader.upload_json_file(
-            json_file_path=JSON_FILE,
-            collection_name=COLLECTION_NAME,
-            batch_size=BATCH_SIZE
-        )
+        if MODE == "reload":
+            generation = uploader.reload_collection(
+                json_file_path=JSON_FILE,
+                collection_name=COLLECTION_NAME,
+                batch_size=BATCH_SIZE,
+                writers=WRITERS,
+                normalize=NORMALIZE,
+                relations_path=RELATIONS_FILE,
+                names_collection=NAMES_COLLECTION,
+                titles_collection=TITLES_COLLECTION
+            )
+            if generation is not None:
+                # Indexes were built on the staging collection before the swap
+                uploader.query_examples(COLLECTION_NAME)
+            uploader.close()
+            return
+        
+        if MODE == "sync":
+            # Idempotent sync: safe to re-run, resumes after a crash
+            counts = uploader.sync_json_file(
+                json_file_path=JSON_FILE,
+                collection_name=COLLECTION_NAME,
+                batch_size=BATCH_SIZE,
+                delete_missing=True,
+                checkpoint_path=CHECKPOINT_FILE,
+                normalize=NORMALIZE
+            )
+            inserted_count = (counts or {}).get('upserted', 0) + (counts or {}).get('modified', 0)
+        else:
+            # Upload process (streaming + concurrent writers: memory stays bounded)
+            inserted_count, failed = uploader.upload_json_parallel(
+                json_file_path=JSON_FILE,
+                collection_name=COLLECTION_NAME,
+                batch_size=BATCH_SIZE,
+                writers=WRITERS,
+                normalize=NORMALIZE
+            )
         
         if inserted_count > 0:
             # Create indexes for performance
             print(f"\n🔍 Creating indexes...")
             
-            # Indexes for title.basics
-            title_indexes = ["tconst", "titleType", "startYear", "genres"]
-            # Indexes for name.basics  
-            name_indexes = ["nconst", "primaryName", "birthYear", "primaryProfession"]
-            
             # Create indexes based on type
-            uploader.create_indexes(COLLECTION_NAME, title_indexes)
+            uploader.create_indexes(COLLECTION_NAME, TITLE_INDEXES)
+            if RELATIONS_FILE:
+                # Sync keeps embedded relations; attaching again picks up new cast and ratings
+                uploader.attach_relations(COLLECTION_NAME, RELATIONS_FILE, names_collection=NAMES_COLLECTION,
+                                          titles_collection=TITLES_COLLECTION)
+            if MODE != "sync":
+                # sync_json_file already rebuilt the summary and bumped the revision for its changes
+                uploader.build_facet_summary(COLLECTION_NAME)
+            if MODE != "sync" or RELATIONS_FILE:
+                uploader.touch_collection(COLLECTION_NAME)
             
             # Show sample queries
             uploader.query_examples(COLLECTION_NAME)
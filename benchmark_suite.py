@@ -0,0 +1,452 @@
+import argparse
+import contextlib
+import gzip
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from unittest import mock
+
+# End-to-end benchmark: synthetic IMDb dumps -> converter -> uploader -> search / suggestions under load
+#   python benchmark_suite.py --rows 10000,100000 --output results.json
+#   python benchmark_suite.py --rows 100000 --compare results.json        # exit code 1 on regressions
+#   python benchmark_suite.py --rows 1000000 --uri mongodb://localhost:27017/ --db imdb_benchmark
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for component in ('Converter', 'Upload', 'web'):
+    sys.path.insert(0, os.path.join(ROOT, component))
+
+from converter import convert_tsv_vectorized  # noqa: E402
+from upload import MongoDBUploader  # noqa: E402
+from search_index import build_inverted_index, build_prefix_index  # noqa: E402
+from search_queries import search_projection  # noqa: E402
+
+TITLE_COLUMNS = ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'isAdult',
+                 'startYear', 'endYear', 'runtimeMinutes', 'genres']
+NAME_COLUMNS = ['nconst', 'primaryName', 'birthYear', 'deathYear', 'primaryProfession', 'knownForTitles']
+TITLE_TYPES = ['movie', 'short', 'tvSeries', 'tvEpisode', 'tvMovie', 'video']
+GENRES = ['Action', 'Comedy', 'Documentary', 'Drama', 'Horror', 'Romance', 'Short', 'Animation']
+PROFESSIONS = ['actor', 'actress', 'director', 'producer', 'writer', 'composer']
+CONSONANTS = 'bcdfghjklmnprstvyzçşß'
+VOWELS = 'aeiouöü'
+
+# Load mix for the in-process generator: (operation, share)
+LOAD_MIX = [('search', 0.5), ('suggestions', 0.4), ('fuzzy', 0.1)]
+COLLECTIONS = {'title': 'movies', 'name': 'names'}
+# Below these values a relative change is timer noise, not a regression
+NOISE_FLOOR = {'_ms': 1.0, 'seconds': 1.0}
+
+
+def make_vocabulary(size: int, seed: int = 7) -> list:
+    """Pronounceable words of 2-12 letters; index 0 is the most frequent in the generated dumps"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        syllables = rng.choices([1, 2, 3, 4, 5], weights=[2, 5, 5, 3, 1])[0]
+        words.add(''.join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(syllables)).capitalize())
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+class ZipfWords:
+    """Word sampler with Zipf frequencies (a few very common words, a long tail of rare ones)"""
+
+    def __init__(self, vocabulary: list, rng: random.Random):
+        self.vocabulary = vocabulary
+        self.cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+        self.rng = rng
+
+    def phrase(self, low: int = 1, high: int = 5) -> str:
+        count = self.rng.randint(low, high)
+        return ' '.join(self.rng.choices(self.vocabulary, cum_weights=self.cumulative, k=count))
+
+
+def _null(rng: random.Random, value: str, probability: float = 0.1) -> str:
+    return '\\N' if rng.random() < probability else value
+
+
+def write_title_basics(path: str, rows: int, vocabulary: list, seed: int = 42) -> str:
+    """title.basics.tsv.gz with Zipf-distributed title words"""
+    rng = random.Random(seed)
+    words = ZipfWords(vocabulary, rng)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        f.write('\t'.join(TITLE_COLUMNS) + '\n')
+        for i in range(1, rows + 1):
+            title = words.phrase()
+            start_year = rng.randint(1890, 2025)
+            f.write('\t'.join([
+                f"tt{i:07d}",
+                rng.choice(TITLE_TYPES),
+                title,
+                title if rng.random() < 0.9 else words.phrase(),
+                '1' if rng.random() < 0.02 else '0',
+                _null(rng, str(start_year)),
+                _null(rng, str(start_year + rng.randint(0, 10)), 0.9),
+                _null(rng, str(rng.randint(1, 240)), 0.3),
+                _null(rng, ','.join(rng.sample(GENRES, rng.randint(1, 3)))),
+            ]) + '\n')
+    return path
+
+
+def write_name_basics(path: str, rows: int, vocabulary: list, titles: int, seed: int = 43) -> str:
+    """name.basics.tsv.gz; knownForTitles point into the generated title range"""
+    rng = random.Random(seed)
+    words = ZipfWords(vocabulary, rng)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as f:
+        f.write('\t'.join(NAME_COLUMNS) + '\n')
+        for i in range(1, rows + 1):
+            birth_year = rng.randint(1850, 2010)
+            known_for = ','.join(f"tt{rng.randint(1, max(titles, 1)):07d}" for _ in range(rng.randint(1, 4)))
+            f.write('\t'.join([
+                f"nm{i:07d}",
+                words.phrase(2, 3),
+                _null(rng, str(birth_year), 0.4),
+                _null(rng, str(birth_year + rng.randint(20, 95)), 0.8),
+                _null(rng, ','.join(rng.sample(PROFESSIONS, rng.randint(1, 3)))),
+                _null(rng, known_for),
+            ]) + '\n')
+    return path
+
+
+def make_queries(vocabulary: list, count: int = 2000, seed: int = 3) -> list:
+    """
+    (operation, query) pairs following LOAD_MIX. Words are drawn with the same Zipf weights as
+    the dumps, so popular words are searched most: one or two words, prefixes, one-letter typos.
+    """
+    rng = random.Random(seed)
+    words = ZipfWords(vocabulary, rng)
+    operations, weights = zip(*LOAD_MIX)
+    queries = []
+    while len(queries) < count:
+        operation = rng.choices(operations, weights=weights)[0]
+        phrase = words.phrase(1, 2 if operation == 'search' else 1).lower()
+        if operation == 'suggestions':
+            queries.append((operation, phrase[:rng.randint(2, max(2, len(phrase)))]))
+        elif operation == 'fuzzy':
+            if len(phrase) >= 5:
+                pos = rng.randrange(1, len(phrase) - 1)
+                queries.append((operation, phrase[:pos] + phrase[pos + 1:]))
+        else:
+            queries.append((operation, phrase))
+    return queries
+
+
+def latency_summary(durations: list, elapsed: float, errors: int = 0) -> dict:
+    durations = sorted(durations)
+    if not durations:
+        return {'requests': 0, 'errors': errors}
+    p = lambda q: round(durations[min(len(durations) - 1, int(q * len(durations)))], 3)
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'requests_per_s': round(len(durations) / elapsed, 1),
+        'p50_ms': p(0.50),
+        'p95_ms': p(0.95),
+        'p99_ms': p(0.99),
+        'max_ms': round(durations[-1], 3),
+    }
+
+
+@contextlib.contextmanager
+def _quiet():
+    # Component progress output would drown the benchmark report
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def make_uploader(uri: Optional[str], database_name: str) -> MongoDBUploader:
+    """Real mongod when a URI is given, otherwise an in-process mongomock stand-in"""
+    with _quiet():
+        if uri:
+            return MongoDBUploader(uri, database_name)
+        import mongomock
+        with mock.patch('upload.MongoClient', mongomock.MongoClient):
+            return MongoDBUploader(None, database_name)
+
+
+def run_generate(rows: int, vocabulary: list, kinds: list, workdir: str) -> tuple:
+    paths, results = {}, {}
+    for kind in kinds:
+        path = os.path.join(workdir, f"{kind}.basics.tsv.gz")
+        start = time.perf_counter()
+        if kind == 'title':
+            write_title_basics(path, rows, vocabulary)
+        else:
+            write_name_basics(path, rows, vocabulary, titles=rows)
+        elapsed = time.perf_counter() - start
+        paths[kind] = path
+        results[kind] = {'rows': rows, 'seconds': round(elapsed, 2), 'bytes': os.path.getsize(path)}
+        print(f"  📝 {kind}.basics: {rows:,} rows, {os.path.getsize(path) / 1e6:.1f} MB gzip ({elapsed:.1f}s)")
+    return paths, results
+
+
+def run_convert(tsv_paths: dict, chunk_size: int, workdir: str) -> tuple:
+    outputs, results = {}, {}
+    for kind, tsv_path in tsv_paths.items():
+        output_path = os.path.join(workdir, f"{kind}.ndjson.gz")
+        with _quiet():
+            start = time.perf_counter()
+            count = convert_tsv_vectorized(tsv_path, output_path, mode="search", chunk_size=chunk_size,
+                                           output_format="ndjson", validate="none")
+            elapsed = time.perf_counter() - start
+        if count is None:
+            raise RuntimeError(f"Conversion failed: {tsv_path}")
+        outputs[kind] = output_path
+        results[kind] = {'records': count, 'seconds': round(elapsed, 2),
+                         'records_per_s': round(count / elapsed, 1), 'bytes': os.path.getsize(output_path)}
+        print(f"  ⚡ convert {kind}: {count / elapsed:,.0f} records/s ({elapsed:.1f}s)")
+    return outputs, results
+
+
+def run_upload(uploader: MongoDBUploader, outputs: dict, batch_size: int, writers: int) -> dict:
+    """Production load path: reload_collection (staging load, indexes, facet summary, swap)"""
+    results = {}
+    for kind, path in outputs.items():
+        collection_name = COLLECTIONS[kind]
+        with _quiet():
+            start = time.perf_counter()
+            generation = uploader.reload_collection(path, collection_name, batch_size=batch_size,
+                                                    writers=writers, normalize=True)
+            elapsed = time.perf_counter() - start
+        if generation is None:
+            raise RuntimeError(f"Upload failed: {path}")
+        count = uploader.db[collection_name].estimated_document_count()
+        results[kind] = {'documents': count, 'seconds': round(elapsed, 2),
+                         'documents_per_s': round(count / elapsed, 1)}
+        print(f"  📤 upload {kind}: {count / elapsed:,.0f} documents/s ({elapsed:.1f}s, generation {generation})")
+    return results
+
+
+def run_index_build(collection) -> tuple:
+    start = time.perf_counter()
+    index = build_inverted_index(collection, fuzzy=True)
+    inverted = time.perf_counter() - start
+    start = time.perf_counter()
+    prefixes = build_prefix_index(collection)
+    prefix = time.perf_counter() - start
+    print(f"  🔎 indexes: inverted + trigram {inverted:.1f}s, prefix {prefix:.1f}s")
+    return index, prefixes, {'inverted_seconds': round(inverted, 2), 'prefix_seconds': round(prefix, 2)}
+
+
+def run_load(collection, index, prefixes, queries: list, users: int, duration: float, warmup: float,
+             fetch: bool = True) -> dict:
+    """
+    In-process concurrent load: each user thread runs what the app does per request
+    (index lookup + one $in fetch with the card projection for searches). mongomock has no
+    indexes and scans the whole collection for $in, so the fetch is skipped there (fetch=False).
+    """
+    projection = search_projection(None, None, 'tconst')
+
+    def execute(operation, query):
+        if operation == 'suggestions':
+            prefixes.search(query, limit=5)
+            return
+        if operation == 'fuzzy':
+            hits = index.fuzzy_search(query, limit=10)[0]
+        else:
+            hits = index.search_page(query, limit=10)[0]
+        if hits and fetch:
+            list(collection.find({'tconst': {'$in': [key for key, _ in hits]}}, projection))
+
+    durations = {operation: [] for operation, _ in LOAD_MIX}
+    errors = {operation: 0 for operation, _ in LOAD_MIX}
+    lock = threading.Lock()
+
+    def user(offset, deadline, record):
+        i = offset
+        local = {operation: [] for operation in durations}
+        while time.perf_counter() < deadline:
+            operation, query = queries[i % len(queries)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                execute(operation, query)
+            except Exception:
+                if record:
+                    with lock:
+                        errors[operation] += 1
+                continue
+            local[operation].append((time.perf_counter() - start) * 1000)
+        if record:
+            with lock:
+                for operation, values in local.items():
+                    durations[operation].extend(values)
+
+    def run(seconds, record):
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=user, args=(n * 97, deadline, record)) for n in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    if warmup:
+        run(warmup, False)
+    start = time.perf_counter()
+    run(duration, True)
+    elapsed = time.perf_counter() - start
+
+    results = {operation: latency_summary(values, elapsed, errors[operation])
+               for operation, values in durations.items()}
+    for operation, summary in results.items():
+        if summary['requests']:
+            print(f"  🧪 {operation:<12} {summary['requests_per_s']:8.1f} req/s  p50 {summary['p50_ms']:7.2f} ms  "
+                  f"p95 {summary['p95_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms")
+    return {'users': users, 'duration_s': duration, 'fetch': fetch, **results}
+
+
+def run_http_load(url: str, queries: list, users: int, duration: float, warmup: float) -> dict:
+    """The same query mix over HTTP against a running app.py / async_app.py (web/load_test.py client)"""
+    import asyncio
+    from load_test import run_load as http_load
+
+    paths = {'search': '/api/search', 'suggestions': '/api/suggestions', 'fuzzy': '/api/search'}
+    requests = [(paths[operation], {'q': query}) for operation, query in queries]
+    durations, errors, elapsed = asyncio.run(http_load(url, users, duration, requests, warmup))
+    summary = latency_summary(durations, elapsed, len(errors))
+    if summary['requests']:
+        print(f"  🌐 http {summary['requests_per_s']:8.1f} req/s  p50 {summary['p50_ms']:7.2f} ms  "
+              f"p95 {summary['p95_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms  ({len(errors)} errors)")
+    return {'users': users, 'duration_s': duration, 'http': summary}
+
+
+def run_scale(rows: int, args, vocabulary: list, queries: list, workdir: str) -> dict:
+    print(f"\n🎬 {rows:,} rows per dump")
+    result = {'rows': rows}
+    tsv_paths, result['generate'] = run_generate(rows, vocabulary, args.kinds, workdir)
+    outputs, result['convert'] = run_convert(tsv_paths, args.chunk_size, workdir)
+
+    uploader = make_uploader(args.uri, args.db)
+    try:
+        result['upload'] = run_upload(uploader, outputs, args.batch_size, args.writers)
+        if 'title' in outputs:
+            collection = uploader.db[COLLECTIONS['title']]
+            if args.url:
+                result['load'] = run_http_load(args.url, queries, args.users, args.duration, args.warmup)
+            else:
+                index, prefixes, result['index'] = run_index_build(collection)
+                result['load'] = run_load(collection, index, prefixes, queries, args.users,
+                                          args.duration, args.warmup, fetch=bool(args.uri))
+    finally:
+        uploader.close()
+    return result
+
+
+def flatten_metrics(results: dict) -> dict:
+    """{"100000/convert/title/records_per_s": 51234.0, ...} for the comparable metrics"""
+    metrics = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}/{key}", item)
+        elif isinstance(value, (int, float)) and prefix.endswith(('_per_s', '_ms', 'seconds')):
+            metrics[prefix] = value
+
+    for run in results.get('runs', []):
+        walk(str(run['rows']), {key: value for key, value in run.items() if key != 'rows'})
+    return metrics
+
+
+def compare_results(previous: dict, current: dict, tolerance: float) -> list:
+    """
+    Metrics that got worse by more than tolerance (0.2 = 20%): throughput (*_per_s) going down,
+    latency (*_ms) or duration (*seconds) going up. Values under NOISE_FLOOR are not flagged.
+    """
+    before, after = flatten_metrics(previous), flatten_metrics(current)
+    regressions = []
+    print(f"\n{'Metric':<52} {'Before':>12} {'After':>12} {'Change':>8}")
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if name.endswith('_per_s') else change
+        noise = any(name.endswith(suffix) and max(old, new) < floor for suffix, floor in NOISE_FLOOR.items())
+        flag = ' ❌' if worse > tolerance and not noise else ''
+        print(f"{name:<52} {old:>12,.2f} {new:>12,.2f} {change:>+7.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(args) -> int:
+    vocabulary = make_vocabulary(args.vocabulary)
+    queries = make_queries(vocabulary)
+    results = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'target': 'mongod' if args.uri else 'mongomock',
+            'load': 'http' if args.url else 'in-process',
+            'config': {key: getattr(args, key) for key in ('kinds', 'vocabulary', 'chunk_size', 'batch_size',
+                                                          'writers', 'users', 'duration', 'warmup')},
+        },
+        'runs': [],
+    }
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+        for rows in args.rows:
+            results['runs'].append(run_scale(rows, args, vocabulary, queries, workdir))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare_results(json.load(f), results, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end benchmark: generate -> convert -> upload -> search")
+    parser.add_argument("--rows", type=lambda text: [int(n) for n in text.split(',')], default=[10000, 100000],
+                        help="Rows per synthetic dump, e.g. 10000,1000000,10000000")
+    parser.add_argument("--kinds", type=lambda text: text.split(','), default=['title', 'name'],
+                        help="Dumps to generate: title,name")
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Distinct title / name words")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--uri", type=str, default=None,
+                        help="mongod connection string (default: in-process mongomock)")
+    parser.add_argument("--db", type=str, default="imdb_benchmark",
+                        help="Database for the benchmark collections (movies, names)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=8, help="Concurrent load generator users")
+    parser.add_argument("--duration", type=float, default=10.0, help="Load phase length (s)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured load before each phase (s)")
+    parser.add_argument("--url", type=str, default=None,
+                        help="Load a running app over HTTP instead (it must serve the uploaded collection)")
+    parser.add_argument("--workdir", type=str, default=None, help="Keep generated files here (default: temp dir)")
+    parser.add_argument("--output", type=str, default="benchmark_results.json")
+    parser.add_argument("--compare", type=str, default=None, help="Previous results file to check against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before failing (0.2 = 20%%)")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Cross-component checks import the converter, uploader and web modules side by side
+for component in ('Converter', 'Upload', 'web'):
+    sys.path.insert(0, os.path.join(ROOT, component))
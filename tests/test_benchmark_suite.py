@@ -0,0 +1,79 @@
+import argparse
+import gzip
+import json
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+import benchmark_suite  # noqa: E402
+from benchmark_suite import (LOAD_MIX, compare_results, flatten_metrics, latency_summary, make_queries,  # noqa: E402
+                             make_vocabulary, write_name_basics, write_title_basics)
+
+
+def read_tsv(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [line.rstrip('\n').split('\t') for line in f]
+
+
+def test_generated_dumps_are_deterministic_and_well_formed(tmp_path):
+    vocabulary = make_vocabulary(50)
+    assert vocabulary == make_vocabulary(50) and len(set(vocabulary)) == 50
+
+    titles = read_tsv(write_title_basics(str(tmp_path / 'a.tsv.gz'), 200, vocabulary))
+    assert titles == read_tsv(write_title_basics(str(tmp_path / 'b.tsv.gz'), 200, vocabulary))
+    assert titles[0] == benchmark_suite.TITLE_COLUMNS and len(titles) == 201
+    assert all(len(row) == len(titles[0]) for row in titles)
+    assert any(row[5] == '\\N' for row in titles[1:])
+
+    names = read_tsv(write_name_basics(str(tmp_path / 'names.tsv.gz'), 100, vocabulary, titles=200))
+    known_for = {tconst for row in names[1:] if row[5] != '\\N' for tconst in row[5].split(',')}
+    assert known_for and all(1 <= int(tconst[2:]) <= 200 for tconst in known_for)
+
+
+def test_queries_follow_the_load_mix():
+    queries = make_queries(make_vocabulary(500), count=3000)
+    assert queries == make_queries(make_vocabulary(500), count=3000)
+    for operation, share in LOAD_MIX:
+        assert sum(1 for op, _ in queries if op == operation) / len(queries) == pytest.approx(share, abs=0.05)
+    assert all(len(query) >= 2 for _, query in queries)
+
+
+def test_latency_summary_percentiles():
+    summary = latency_summary([float(ms) for ms in range(1, 101)], elapsed=2.0, errors=1)
+    assert summary == {'requests': 100, 'errors': 1, 'requests_per_s': 50.0, 'p50_ms': 51.0, 'p95_ms': 96.0,
+                       'p99_ms': 100.0, 'max_ms': 100.0}
+    assert latency_summary([], 1.0) == {'requests': 0, 'errors': 0}
+
+
+def run(rows, **values):
+    return {'runs': [{'rows': rows, 'convert': {'title': {'records': 10, **values}}}]}
+
+
+def test_compare_flags_only_regressions_beyond_tolerance_and_noise():
+    before = run(1000, records_per_s=1000.0, seconds=10.0, p99_ms=0.5)
+    assert set(flatten_metrics(before)) == {'1000/convert/title/records_per_s', '1000/convert/title/seconds',
+                                            '1000/convert/title/p99_ms'}
+    assert compare_results(before, run(1000, records_per_s=900.0, seconds=11.0, p99_ms=0.9), 0.2) == []
+    assert compare_results(before, run(1000, records_per_s=700.0, seconds=13.0, p99_ms=0.9), 0.2) == \
+        ['1000/convert/title/records_per_s', '1000/convert/title/seconds']
+    assert compare_results(before, run(5000, records_per_s=1.0), 0.2) == []
+
+
+def test_small_end_to_end_run_writes_every_phase(tmp_path):
+    output = tmp_path / 'results.json'
+    args = argparse.Namespace(rows=[300], kinds=['title', 'name'], vocabulary=200, chunk_size=100, uri=None,
+                              db='imdb_benchmark', batch_size=50, writers=2, users=2, duration=0.2, warmup=0.05,
+                              url=None, workdir=str(tmp_path / 'work'), output=str(output), compare=None,
+                              tolerance=0.2)
+    assert benchmark_suite.main(args) == 0
+
+    result = json.loads(output.read_text(encoding='utf-8'))['runs'][0]
+    assert result['convert']['title']['records'] == result['upload']['title']['documents'] == 300
+    assert result['upload']['name']['documents'] == 300
+    for operation, _ in LOAD_MIX:
+        assert result['load'][operation]['requests'] > 0 and result['load'][operation]['errors'] == 0
+
+    args.compare, args.tolerance = str(output), 1e9
+    args.output = str(tmp_path / 'again.json')
+    assert benchmark_suite.main(args) == 0
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+import converter
+import search_index
+import upload
+
+SAMPLES = ["Çiçek  Straße", "  The  Matrix ", "Amélie", "", "東京物語", "ÆON Flux", "Ǆemal", "İstanbul",
+           "Señor\tSmith", "ﬁlm noir", "Ⅻ Monkeys"]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Çiçek  Straße", "cicek strasse"),
+    ("  The  Matrix ", "the matrix"),
+    ("Amélie", "amelie"),
+    ("", ""),
+])
+def test_fold_text(text, expected):
+    assert converter.fold_text(text) == expected
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_every_component_writes_and_queries_the_same_search_key(text):
+    # The key written at conversion / upload time must equal the one computed for queries
+    expected = converter.fold_text(text)
+    assert upload.fold_text(text) == search_index.fold_text(text) == expected
+    assert converter.fold_series(pd.Series([text])).iloc[0] == expected
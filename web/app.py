@@ -1,19 +1,149 @@
-from flask import Flask, render_template, request, jsonify
-from pymongo import MongoClient
-import re
+from flask import Flask, g, render_template, request, jsonify
+from pymongo.errors import ExecutionTimeout
 from bson import ObjectId
 import json
+import random
+import threading
+import time
+from database import MongoConnection, MongoSettings
+from collection_profile import CollectionProfile, detect_collection_profile
+from response_cache import HotIdCache, MemoryCacheBackend, RedisCacheBackend, ResponseCache
+from search_index import GenerationWatcher, build_inverted_index, build_prefix_index
+from metrics import REPLY_INSPECT_BYTES, CommandMetrics, Metrics
+from request_guard import SUPERSEDED_RESPONSE, latest_requests_store, request_sequence
+from search_queries import (CURSOR_EXPIRED, FACET_LIVE_LIMIT, FACET_TIMEOUT_MS, HEALTHY, NO_SEARCH_FIELDS,
+                            SEARCH_TIMED_OUT, SEARCH_TIMEOUT_MS, SUGGESTION_TIMEOUT_MS, SUGGESTIONS_TIMED_OUT,
+                            TOTAL_COUNT_CAP, TOTAL_COUNT_TIMEOUT_MS, LookupRequest, SearchRequest, TotalRequest,
+                            cache_payload, documents_by_id, facet_pipeline, index_version, load_facet_summary,
+                            lookup_query, metrics_payload, query_text, readiness, stats_payload,
+                            suggestion_pipeline, suggestions_reply)
 
 app = Flask(__name__)
 
-# MongoDB bağlantısı
-try:
-    client = MongoClient('mongodb://localhost:27017/')
-    db = client['imdb_database']
-    collection = db['movies']  # Collection adınızı buraya yazın
-    print("✅ MongoDB bağlantısı başarılı!")
-except Exception as e:
-    print(f"❌ MongoDB bağlantı hatası: {e}")
+# Ölçümler (/metrics): rota gecikmeleri, MongoDB komut süreleri, eşiği aşan sorguların explain planları
+METRICS_ENABLED = True
+SLOW_QUERY_MS = 100
+SLOW_QUERY_EXPLAIN = True
+metrics = Metrics()
+command_metrics = CommandMetrics(metrics, slow_ms=SLOW_QUERY_MS, explain=SLOW_QUERY_EXPLAIN)
+
+# MongoDB bağlantısı: havuz boyutu, zaman aşımları ve arama okuma tercihi MONGO_* ortam değişkenleriyle
+# ayarlanır (bkz. database.py). İstemci tembeldir: import sırasında bağlanmaz, MongoDB kapalıyken de
+# uygulama açılır ve istekler hata cevabı döner.
+MONGO_SETTINGS = MongoSettings.from_env(uri='mongodb://localhost:27017/', database='imdb_database',
+                                        collection='movies')  # Collection adınızı buraya yazın
+mongo = MongoConnection(MONGO_SETTINGS, event_listeners=[command_metrics] if METRICS_ENABLED else [])
+command_metrics.explain_with(mongo)
+db = mongo.database()
+# Birincil okumalar: generation işaretleri, profil ve indeks kurulumu
+collection = mongo.collection()
+# İstek okumaları (arama, sayım, facet, öneri, lookup): replica set'te ikincillere dağıtılabilir
+search_collection = mongo.collection(read_preference=MONGO_SETTINGS.read_preference())
+
+# Koleksiyon profili (alanlar, dizi alanları, index'ler): generation / revision başına bir kez tespit edilir
+collection_profile = GenerationWatcher(db, collection.name, lambda: detect_collection_profile(collection),
+                                       name="Koleksiyon profili", blocking=True)
+
+def get_profile():
+    """Güncel koleksiyon profili (tespit edilemediyse boş profil)"""
+    return collection_profile.get() or CollectionProfile()
+
+# Bellek içi öneri indeksi: başlangıçta arka planda kurulur, koleksiyon generation'ı değişince yenilenir
+SUGGESTION_INDEX_ENABLED = True
+suggestion_index = GenerationWatcher(db, collection.name, lambda: build_prefix_index(collection),
+                                     name="Öneri indeksi")
+
+# Bellek içi ters indeks (tam metin arama): hazır olana kadar /api/search regex sorgusuna düşer
+SEARCH_INDEX_ENABLED = True
+# Yazım hatası toleransı: indeksle birlikte trigram sözlüğü kurulur (?fuzzy=auto|1|0)
+FUZZY_SEARCH_ENABLED = True
+search_index = GenerationWatcher(db, collection.name,
+                                 lambda: build_inverted_index(collection, fuzzy=FUZZY_SEARCH_ENABLED),
+                                 name="Arama indeksi")
+
+# İndeksler import sırasında değil, worker başına rastgele gecikmeyle arka planda kurulmaya başlar:
+# aynı anda açılan worker'lar MongoDB'ye aynı anda tam tarama göndermez
+STARTUP_JITTER_S = 2.0
+
+def warm_up():
+    time.sleep(random.uniform(0, STARTUP_JITTER_S))
+    if SUGGESTION_INDEX_ENABLED:
+        suggestion_index.get()
+    if SEARCH_INDEX_ENABLED:
+        search_index.get()
+
+threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+# Yükleme sırasında hesaplanan facet özeti (_facets); geniş sorguların facet sayıları buradan gelir
+facet_summary = GenerationWatcher(db, collection.name, lambda: load_facet_summary(db, collection.name),
+                                  name="Facet özeti", blocking=True)
+
+# Cevap önbelleği: "memory" (süreç içi) veya "redis" (worker'lar arasında paylaşılan)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_BACKEND = "memory"
+RESPONSE_CACHE_MAX_ENTRIES = 10000
+REDIS_URL = "redis://localhost:6379/0"
+
+def cache_version():
+    """Önbellek sürümü: cevapları üreten profil ve indekslerin generation işaretleri"""
+    collection_profile.get()
+    return collection_profile.token, search_index.token, suggestion_index.token
+
+response_cache = ResponseCache(
+    RedisCacheBackend(REDIS_URL) if RESPONSE_CACHE_BACKEND == "redis"
+    else MemoryCacheBackend(RESPONSE_CACHE_MAX_ENTRIES),
+    version=cache_version,
+    enabled=RESPONSE_CACHE_ENABLED
+)
+
+# /api/lookup için sık istenen ID'lerin belgeleri (izleme listeleri, "known for" listeleri)
+HOT_ID_CACHE_ENTRIES = 20000
+HOT_ID_CACHE_TTL = 600
+hot_ids = HotIdCache(HOT_ID_CACHE_ENTRIES, HOT_ID_CACHE_TTL)
+
+# Aynı oturumdan daha yeni bir istek gelmişse eski isteğin MongoDB sorgusu atlanır; redis arka ucunda
+# sıra numaraları tüm worker'lar arasında paylaşılır
+latest_requests = latest_requests_store(RESPONSE_CACHE_BACKEND, REDIS_URL)
+
+def superseded(channel):
+    session, seq = request_sequence(request.headers)
+    return latest_requests.superseded(session, channel, seq)
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Rota şablonu başına gecikme ve sonuç"""
+    started = g.pop('request_started', None)
+    if not METRICS_ENABLED or started is None or request.url_rule is None:
+        return response
+    payload = None
+    if response.is_json and (response.content_length or 0) <= REPLY_INSPECT_BYTES:
+        payload = response.get_json(silent=True)
+    metrics.observe_reply(request.url_rule.rule, response.status_code, (time.perf_counter() - started) * 1000,
+                          cache=response.headers.get('X-Cache'), payload=payload)
+    return response
+
+def fetch_hits(params, hits):
+    """İndeks sonuçlarının belgelerini tek $in sorgusuyla getirir, indeks sırasına dizer"""
+    if not hits:
+        return []
+    return params.ordered(hits, search_collection.find(params.hits_query(hits), params.projection))
+
+def search_facets(params, match, narrow, total):
+    """
+    Facet sayıları: dar sonuç kümesinde canlı $facet, geniş kümede yükleme sırasında
+    hesaplanmış özetten tahmin (her istekte tüm eşleşmeler üzerinde $group çalışmaz)
+    """
+    if params.wants_live_facets(match, narrow, total):
+        try:
+            return params.live_facets(next(search_collection.aggregate(facet_pipeline(match),
+                                                                       maxTimeMS=FACET_TIMEOUT_MS), {}))
+        except ExecutionTimeout:
+            pass
+    return params.estimated_facets(facet_summary.get(), total)
 
 class JSONEncoder(json.JSONEncoder):
     """MongoDB ObjectId için JSON encoder"""
@@ -24,134 +154,210 @@ class JSONEncoder(json.JSONEncoder):
 
 app.json_encoder = JSONEncoder
 
+def capped_count(mongo_query, cap=None):
+    """En fazla cap + 1 belge sayar: (total, capped)"""
+    cap = TOTAL_COUNT_CAP if cap is None else cap
+    total = search_collection.count_documents(mongo_query, limit=cap + 1, maxTimeMS=SEARCH_TIMEOUT_MS)
+    return (cap, True) if total > cap else (total, False)
+
 @app.route('/')
 def index():
     """Ana sayfa"""
     return render_template('index.html')
 
 @app.route('/api/search')
+@response_cache.cached('search', ttl=60, list_params=('genre',),
+                       exact_params=('cursor', 'limit', 'view', 'fields', 'type', 'decade', 'facets', 'fuzzy'))
 def search():
-    """Canlı arama API"""
+    """
+    Canlı arama API (?limit=, ?cursor= ile sayfalı; ?view= / ?fields= ile alan seçimi;
+    ?type= / ?decade= / ?genre= filtreleri, ?facets=1 ile facet sayıları,
+    ?fuzzy=auto|1|0 ile yazım hatası toleransı)
+    """
     try:
-        query = request.args.get('q', '').strip()
-        
-        if not query or len(query) < 2:
-            return jsonify({'results': [], 'total': 0})
-        
-        search_conditions = []
-        
-        if 'primaryTitle' in collection.find_one() or {}:
-            search_conditions.extend([
-                {"primaryTitle": {"$regex": query, "$options": "i"}},
-                {"originalTitle": {"$regex": query, "$options": "i"}}
-            ])
-        
-        # Name search (name.basics için)
-        if 'primaryName' in collection.find_one() or {}:
-            search_conditions.append(
-                {"primaryName": {"$regex": query, "$options": "i"}}
-            )
-        
-        # Genres search
-        if 'genres' in collection.find_one() or {}:
-            search_conditions.append(
-                {"genres": {"$regex": query, "$options": "i"}}
-            )
-        
-        # Profession search (name.basics için)
-        if 'primaryProfession' in collection.find_one() or {}:
-            search_conditions.append(
-                {"primaryProfession": {"$regex": query, "$options": "i"}}
-            )
-        
-        if not search_conditions:
-            return jsonify({'results': [], 'total': 0, 'error': 'No searchable fields found'})
-        
-        # MongoDB sorgusu
-        mongo_query = {"$or": search_conditions}
-        
-        # Sonuçları getir (limit 10)
-        results = list(collection.find(mongo_query).limit(10))
-        total = collection.count_documents(mongo_query)
-        
-        # ObjectId'leri temizle
-        for result in results:
-            if '_id' in result:
-                result['_id'] = str(result['_id'])
-        
-        return jsonify({
-            'results': results,
-            'total': total,
-            'query': query
-        })
+        params, reply = SearchRequest.parse(request.args, get_profile())
+        if reply is not None:
+            return jsonify(reply)
+        
+        index, token = None, None
+        if SEARCH_INDEX_ENABLED:
+            search_index.get()
+            index, token = search_index.snapshot
+        if params.uses_index(index):
+            version = index_version(token)
+            if params.cursor_expired(version):
+                return jsonify(CURSOR_EXPIRED)
+            if params.fuzzy_first(index):
+                hits, total, exact, corrections = params.fuzzy_page(index)
+                return jsonify(params.fuzzy_reply(fetch_hits(params, hits), total, exact, corrections))
+            hits, total, exact, next_cursor = params.index_page(index, version)
+            results = fetch_hits(params, hits)
+            if params.fuzzy_fallback(index, total):
+                hits, total_fuzzy, exact_fuzzy, corrections = params.fuzzy_page(index)
+                if hits:
+                    return jsonify(params.fuzzy_reply(fetch_hits(params, hits), total_fuzzy, exact_fuzzy,
+                                                      corrections))
+            params.index_totals(total, exact)
+            if params.with_facets:
+                match, narrow = params.index_facet_match(index, total)
+                params.payload.update(search_facets(params, match, narrow, total))
+            return jsonify(params.reply(results, next_cursor))
+        
+        if params.cursor_expired():
+            # İndeks cursor'ı ama indeks artık kullanılmıyor
+            return jsonify(CURSOR_EXPIRED)
+        
+        mongo_query = params.regex_query()
+        if mongo_query is None:
+            return jsonify(NO_SEARCH_FIELDS)
+        
+        if superseded('search'):
+            return jsonify({'results': [], 'total': 0, **SUPERSEDED_RESPONSE})
+        
+        # Keyset sayfalama: index'li (numVotes, anahtar) veya anahtar sırasında, skip yok
+        page_query, projection, sort = params.page_find(mongo_query)
+        try:
+            results, next_cursor = params.regex_page(list(
+                search_collection.find(page_query, projection).sort(sort)
+                .limit(params.limit + 1).max_time_ms(SEARCH_TIMEOUT_MS)))
+            if params.first_page:
+                if next_cursor is None:
+                    # Tek sayfa: toplam zaten belli, ikinci sorguya gerek yok
+                    total, capped = len(results), False
+                elif superseded('search'):
+                    return jsonify({'results': [], 'total': 0, **SUPERSEDED_RESPONSE})
+                else:
+                    total, capped = capped_count(mongo_query)
+                params.regex_totals(total, capped)
+                if params.with_facets:
+                    narrow = not capped and total <= FACET_LIVE_LIMIT
+                    params.payload.update(search_facets(params, mongo_query, narrow, total))
+        except ExecutionTimeout:
+            return jsonify(SEARCH_TIMED_OUT)
+        
+        return jsonify(params.reply(results, next_cursor))
         
     except Exception as e:
         print(f"Search error: {e}")
         return jsonify({'results': [], 'total': 0, 'error': str(e)})
 
+@app.route('/api/search/total')
+@response_cache.cached('search_total', ttl=300, list_params=('genre',), exact_params=('type', 'decade'))
+def search_total():
+    """Kesin toplam (arayüz "1000+" / "~N" gösterdikten sonra ayrıca ister)"""
+    try:
+        params, reply = TotalRequest.parse(request.args, get_profile())
+        if reply is not None:
+            return jsonify(reply)
+        
+        index = search_index.get() if SEARCH_INDEX_ENABLED else None
+        if index is not None:
+            total, _ = index.count(params.query, tags=params.tags)
+            return jsonify(params.reply(total))
+        
+        mongo_query = params.regex_query()
+        if mongo_query is None:
+            return jsonify(params.reply(0))
+        if superseded('search_total'):
+            return jsonify({'total': None, **SUPERSEDED_RESPONSE})
+        try:
+            total = search_collection.count_documents(mongo_query, maxTimeMS=TOTAL_COUNT_TIMEOUT_MS)
+        except ExecutionTimeout:
+            return jsonify(params.timed_out())
+        return jsonify(params.reply(total))
+        
+    except Exception as e:
+        print(f"Total error: {e}")
+        return jsonify({'total': None, 'error': str(e)})
+
 @app.route('/api/suggestions')
+@response_cache.cached('suggestions', ttl=300)
 def suggestions():
     """Otomatik tamamlama önerileri"""
     try:
-        query = request.args.get('q', '').strip()
+        query = query_text(request.args)
+        if query is None:
+            return jsonify(suggestions_reply([]))
         
-        if not query or len(query) < 2:
-            return jsonify({'suggestions': []})
+        # İndeks hazırsa MongoDB'ye hiç gitmeden cevap ver
+        index = suggestion_index.get() if SUGGESTION_INDEX_ENABLED else None
+        if index is not None:
+            return jsonify({'suggestions': index.search(query, limit=5)})
         
         # Benzersiz öneriler için aggregation pipeline
-        pipeline = []
-        
-        # Title suggestions
-        sample_doc = collection.find_one()
-        if sample_doc and 'primaryTitle' in sample_doc:
-            pipeline = [
-                {"$match": {"primaryTitle": {"$regex": f"^{query}", "$options": "i"}}},
-                {"$group": {"_id": "$primaryTitle"}},
-                {"$limit": 5},
-                {"$project": {"_id": 0, "suggestion": "$_id"}}
-            ]
-        elif sample_doc and 'primaryName' in sample_doc:
-            pipeline = [
-                {"$match": {"primaryName": {"$regex": f"^{query}", "$options": "i"}}},
-                {"$group": {"_id": "$primaryName"}},
-                {"$limit": 5},
-                {"$project": {"_id": 0, "suggestion": "$_id"}}
-            ]
-        
-        if pipeline:
-            suggestions = list(collection.aggregate(pipeline))
-            return jsonify({
-                'suggestions': [s['suggestion'] for s in suggestions]
-            })
-        
-        return jsonify({'suggestions': []})
+        pipeline = suggestion_pipeline(query, get_profile())
+        if not pipeline:
+            return jsonify(suggestions_reply([]))
+        if superseded('suggestions'):
+            return jsonify({'suggestions': [], **SUPERSEDED_RESPONSE})
+        return jsonify(suggestions_reply(search_collection.aggregate(pipeline, maxTimeMS=SUGGESTION_TIMEOUT_MS)))
         
+    except ExecutionTimeout:
+        return jsonify(SUGGESTIONS_TIMED_OUT)
     except Exception as e:
         print(f"Suggestions error: {e}")
-        return jsonify({'suggestions': []})
+        return jsonify(suggestions_reply([]))
 
-@app.route('/api/stats')
-def stats():
-    """Database istatistikleri"""
+@app.route('/api/lookup', methods=['GET', 'POST'])
+def lookup():
+    """
+    tconst / nconst listesiyle toplu belge getirme (giriş sırası korunur)
+
+    GET /api/lookup?ids=tt0111161,nm0000151   veya   POST {"ids": [...], "view": "card"}
+    """
     try:
-        total_docs = collection.count_documents({})
-        sample_doc = collection.find_one()
+        body = (request.get_json(silent=True) or {}) if request.method == 'POST' else None
+        params, reply = LookupRequest.parse(request.args, body)
+        if reply is not None:
+            return jsonify(reply)
         
-        stats_data = {
-            'total_documents': total_docs,
-            'collection_name': collection.name,
-            'database_name': db.name
-        }
+        namespace = params.namespace(collection_profile.token)
+        found, missing = hot_ids.get_many(namespace, params.ids)
+        query = lookup_query(missing, get_profile()) if missing else None
+        if query is not None:
+            fetched = documents_by_id(search_collection.find(query, params.projection)
+                                      .max_time_ms(SEARCH_TIMEOUT_MS))
+            hot_ids.set_many(namespace, fetched)
+            found.update(fetched)
         
-        if sample_doc:
-            stats_data['sample_fields'] = list(sample_doc.keys())
-            if '_id' in stats_data['sample_fields']:
-                stats_data['sample_fields'].remove('_id')
+        return jsonify(params.reply(found))
         
-        return jsonify(stats_data)
+    except Exception as e:
+        print(f"Lookup error: {e}")
+        return jsonify({'results': [], 'error': str(e)})
+
+@app.route('/api/stats')
+@response_cache.cached('stats', ttl=30, query_params=())
+def stats():
+    """Database istatistikleri"""
+    try:
+        # Koleksiyon metadata'sından (tam sayım yerine, sabit maliyet)
+        total_docs = search_collection.estimated_document_count()
+        return jsonify(stats_payload(total_docs, collection.name, db.name, get_profile()))
         
     except Exception as e:
         return jsonify({'error': str(e)})
 
+@app.route('/api/cache')
+def cache_stats():
+    """Önbellek isabet / ıska sayaçları (bu worker)"""
+    return jsonify(cache_payload(response_cache, hot_ids))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Rota ve MongoDB komut gecikmeleri (p50 / p95 / p99), önbellek oranları, yavaş sorgular (bu worker)"""
+    return jsonify(metrics_payload(metrics, response_cache, hot_ids, SLOW_QUERY_MS))
+
+@app.route('/healthz')
+def healthz():
+    """Canlılık: süreç istek cevaplayabiliyor mu (MongoDB'ye gitmez; yeniden başlatma kararı için)"""
+    return jsonify(HEALTHY)
+
+@app.route('/readyz')
+def readyz():
+    """Hazırlık: MongoDB ping'i (önbellekli); başarısızsa 503 ile worker trafikten çıkarılır"""
+    payload, status = readiness(mongo.ping(), search_index, suggestion_index, MONGO_SETTINGS)
+    return jsonify(payload), status
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,523 @@
+import asyncio
+import contextlib
+import functools
+import random
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import ConnectionFailure, ExecutionTimeout
+from quart import Quart, g, jsonify, make_response, render_template, request
+
+from database import MongoConnection, MongoSettings
+from collection_profile import CollectionProfile, detect_collection_profile
+from response_cache import HotIdCache, MemoryCacheBackend, RedisCacheBackend, ResponseCache
+from search_index import GenerationWatcher, build_inverted_index, build_prefix_index
+from metrics import REPLY_INSPECT_BYTES, CommandMetrics, Metrics
+from request_guard import SUPERSEDED_RESPONSE, latest_requests_store, request_sequence
+from search_queries import (CURSOR_EXPIRED, FACET_LIVE_LIMIT, FACET_TIMEOUT_MS, HEALTHY, NO_SEARCH_FIELDS,
+                            SEARCH_TIMED_OUT, SEARCH_TIMEOUT_MS, SUGGESTION_TIMEOUT_MS, SUGGESTIONS_TIMED_OUT,
+                            TOTAL_COUNT_CAP, TOTAL_COUNT_TIMEOUT_MS, LookupRequest, SearchRequest, TotalRequest,
+                            cache_payload, documents_by_id, facet_pipeline, index_version, load_facet_summary,
+                            lookup_query, metrics_payload, query_text, readiness, stats_payload,
+                            suggestion_pipeline, suggestions_reply)
+
+# ASGI sürümü (app.py ile aynı endpoint'ler ve cevaplar):
+#   uvicorn async_app:app --host 0.0.0.0 --port 5000 --workers 4
+# MongoDB sorguları Motor ile event loop'u bloklamadan yapılır; bellek içi indeksler ve profil
+# app.py'deki gibi senkron pymongo ile arka plan thread'lerinde kurulur.
+
+# Havuz boyutu, zaman aşımları ve arama okuma tercihi MONGO_* ortam değişkenleriyle ayarlanır (database.py)
+MONGO_SETTINGS = MongoSettings.from_env(uri='mongodb://localhost:27017/', database='imdb_database',
+                                        collection='movies')  # Collection adınızı buraya yazın
+MONGO_URI = MONGO_SETTINGS.uri
+DATABASE_NAME = MONGO_SETTINGS.database
+COLLECTION_NAME = MONGO_SETTINGS.collection
+
+SUGGESTION_INDEX_ENABLED = True
+SEARCH_INDEX_ENABLED = True
+FUZZY_SEARCH_ENABLED = True
+WATCHER_CHECK_INTERVAL = 5.0
+# İndeks kurulumu worker başına 0..STARTUP_JITTER_S sn gecikmeyle başlar (aynı anda açılan worker'lar için)
+STARTUP_JITTER_S = 2.0
+
+# Cevap önbelleği: "memory" (süreç içi) veya "redis" (worker'lar arasında paylaşılan)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_BACKEND = "memory"
+RESPONSE_CACHE_MAX_ENTRIES = 10000
+REDIS_URL = "redis://localhost:6379/0"
+
+# /api/lookup için sık istenen ID'lerin belgeleri
+HOT_ID_CACHE_ENTRIES = 20000
+HOT_ID_CACHE_TTL = 600
+
+# Ölçümler (/metrics): rota gecikmeleri, MongoDB komut süreleri, eşiği aşan sorguların explain planları
+METRICS_ENABLED = True
+SLOW_QUERY_MS = 100
+SLOW_QUERY_EXPLAIN = True
+
+app = Quart(__name__)
+metrics = Metrics()
+command_metrics = CommandMetrics(metrics, slow_ms=SLOW_QUERY_MS, explain=SLOW_QUERY_EXPLAIN)
+
+# İndeks kurulumu ve generation kontrolü için senkron, tembel bağlantı (thread'lerde kullanılır)
+sync_client = MongoConnection(MONGO_SETTINGS)
+# explain komutları arka plan thread'inden senkron bağlantıyla gönderilir
+command_metrics.explain_with(sync_client)
+sync_db = sync_client.database()
+sync_collection = sync_client.collection()
+
+collection_profile = GenerationWatcher(sync_db, COLLECTION_NAME,
+                                       lambda: detect_collection_profile(sync_collection),
+                                       name="Koleksiyon profili", blocking=True,
+                                       check_interval=WATCHER_CHECK_INTERVAL)
+suggestion_index = GenerationWatcher(sync_db, COLLECTION_NAME,
+                                     lambda: build_prefix_index(sync_collection),
+                                     name="Öneri indeksi", check_interval=WATCHER_CHECK_INTERVAL)
+search_index = GenerationWatcher(sync_db, COLLECTION_NAME,
+                                 lambda: build_inverted_index(sync_collection, fuzzy=FUZZY_SEARCH_ENABLED),
+                                 name="Arama indeksi", check_interval=WATCHER_CHECK_INTERVAL)
+facet_summary = GenerationWatcher(sync_db, COLLECTION_NAME,
+                                  lambda: load_facet_summary(sync_db, COLLECTION_NAME),
+                                  name="Facet özeti", blocking=True, check_interval=WATCHER_CHECK_INTERVAL)
+
+# Motor istemcisi event loop'a bağlı olduğu için before_serving'de oluşturulur
+mongo = {}
+
+
+def connect_motor():
+    """Motor istemcisi (bağlantılar ilk sorguda, havuz ayarlarıyla açılır); arama okumaları read preference ile"""
+    try:
+        client = AsyncIOMotorClient(MONGO_URI, event_listeners=[command_metrics] if METRICS_ENABLED else [],
+                                    **MONGO_SETTINGS.client_options())
+    except Exception as e:
+        print(f"❌ MongoDB bağlantı hatası: {e}")
+        raise ConnectionFailure(f"MongoDB unavailable: {e}") from e
+    mongo['client'] = client
+    mongo['db'] = client[DATABASE_NAME]
+    mongo['collection'] = mongo['db'].get_collection(COLLECTION_NAME,
+                                                     read_preference=MONGO_SETTINGS.read_preference())
+    print(f"✅ MongoDB istemcisi hazır: {MONGO_SETTINGS.describe()['host']} "
+          f"(havuz {MONGO_SETTINGS.max_pool_size}, arama okumaları {MONGO_SETTINGS.search_read_preference})")
+
+
+def get_collection():
+    """Arama koleksiyonu; istemci başlangıçta oluşturulamadıysa yeniden denenir"""
+    if 'collection' not in mongo:
+        connect_motor()
+    return mongo['collection']
+
+
+async def motor_ping(cache_seconds=2.0):
+    """
+    Hazırlık kontrolü istekleri sunan Motor istemcisi üzerinden: (ok, latency_ms, error).
+    MongoConnection.ping gibi sonuç cache_seconds boyunca tekrar kullanılır.
+    """
+    checked_at, result = mongo.get('health', (0.0, None))
+    if result is not None and time.monotonic() - checked_at < cache_seconds:
+        return result
+    start = time.perf_counter()
+    try:
+        get_collection()
+        await asyncio.wait_for(mongo['client'].admin.command('ping'), MONGO_SETTINGS.health_timeout_ms / 1000)
+        result = (True, round((time.perf_counter() - start) * 1000, 1), None)
+    except Exception as e:
+        result = (False, round((time.perf_counter() - start) * 1000, 1), str(e)[:200] or type(e).__name__)
+    mongo['health'] = (time.monotonic(), result)
+    return result
+
+
+def get_profile():
+    """Güncel koleksiyon profili; handler'lar yalnızca hazır değeri okur, I/O yapmaz"""
+    return collection_profile.value or CollectionProfile()
+
+
+def active_watchers():
+    watchers = [collection_profile, facet_summary]
+    if SUGGESTION_INDEX_ENABLED:
+        watchers.append(suggestion_index)
+    if SEARCH_INDEX_ENABLED:
+        watchers.append(search_index)
+    return watchers
+
+
+async def refresh_watchers():
+    """Generation kontrolünü (senkron find_one) istek yolundan çıkarır"""
+    await asyncio.sleep(random.uniform(0, STARTUP_JITTER_S))
+    while True:
+        for watcher in active_watchers():
+            try:
+                await asyncio.to_thread(watcher.get)
+            except Exception as e:
+                print(f"⚠️  {watcher.name}: yenilenemedi: {e}")
+        await asyncio.sleep(WATCHER_CHECK_INTERVAL)
+
+
+@app.before_serving
+async def startup():
+    try:
+        connect_motor()
+    except ConnectionFailure:
+        pass
+
+    # Profil ilk istekten önce hazır olsun (MongoDB kapalıysa beklemeden açılır); indeksler arka planda,
+    # worker başına rastgele gecikmeyle kurulmaya başlar
+    await asyncio.to_thread(collection_profile.get)
+    mongo['refresher'] = asyncio.create_task(refresh_watchers())
+
+
+@app.after_serving
+async def shutdown():
+    refresher = mongo.pop('refresher', None)
+    if refresher is not None:
+        refresher.cancel()
+    client = mongo.pop('client', None)
+    if client is not None:
+        client.close()
+    sync_client.close()
+
+
+def cache_version():
+    """Önbellek sürümü: profil ve indekslerin generation işaretleri (I/O yok)"""
+    return collection_profile.token, search_index.token, suggestion_index.token
+
+
+response_cache = ResponseCache(
+    RedisCacheBackend(REDIS_URL) if RESPONSE_CACHE_BACKEND == "redis"
+    else MemoryCacheBackend(RESPONSE_CACHE_MAX_ENTRIES),
+    version=cache_version,
+    enabled=RESPONSE_CACHE_ENABLED
+)
+hot_ids = HotIdCache(HOT_ID_CACHE_ENTRIES, HOT_ID_CACHE_TTL)
+
+
+def cached(endpoint, ttl, query_params=('q',), list_params=(), exact_params=()):
+    """ResponseCache.cached'in Quart karşılığı (aynı anahtarlar, aynı sayaçlar)"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return await view(*args, **kwargs)
+
+            key = response_cache.make_key(endpoint, request.args, query_params, list_params, exact_params)
+            body = response_cache.lookup(endpoint, key)
+            if body is not None:
+                response = app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = await make_response(await view(*args, **kwargs))
+            if response.status_code == 200 and response.is_json:
+                response_cache.store(endpoint, key, await response.get_data(as_text=True), ttl)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+# Aynı oturumdan daha yeni bir istek gelmişse eski isteğin MongoDB sorgusu atlanır; redis arka ucunda
+# sıra numaraları tüm worker'lar arasında paylaşılır
+latest_requests = latest_requests_store(RESPONSE_CACHE_BACKEND, REDIS_URL)
+background_tasks = set()
+
+
+def superseded(channel):
+    session, seq = request_sequence(request.headers)
+    return latest_requests.superseded(session, channel, seq)
+
+
+@app.before_request
+async def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def record_request(response):
+    """Rota şablonu başına gecikme ve sonuç"""
+    started = getattr(g, 'request_started', None)
+    if not METRICS_ENABLED or started is None or request.url_rule is None:
+        return response
+    payload = None
+    if response.is_json and (response.content_length or 0) <= REPLY_INSPECT_BYTES:
+        payload = await response.get_json(silent=True)
+    metrics.observe_reply(request.url_rule.rule, response.status_code, (time.perf_counter() - started) * 1000,
+                          cache=response.headers.get('X-Cache'), payload=payload)
+    return response
+
+
+async def kill_operations(comment):
+    """comment ile etiketlenmiş, hâlâ çalışan MongoDB işlemlerini durdurur ($currentOp + killOp)"""
+    try:
+        get_collection()
+        admin = mongo['client'].admin
+        operations = await admin.aggregate([
+            {"$currentOp": {}},
+            {"$match": {"command.comment": comment}}
+        ]).to_list(length=None)
+        for operation in operations:
+            await admin.command('killOp', op=operation['opid'])
+    except Exception as e:
+        print(f"⚠️  killOp başarısız ({comment}): {e}")
+
+
+@contextlib.asynccontextmanager
+async def killed_on_disconnect(channel):
+    """
+    İstemci bağlantıyı kapatınca Quart handler görevini iptal eder; ancak Motor'un başlattığı
+    sorgu MongoDB'de sürmeye devam eder. Bu bloktaki sorgular comment ile etiketlenir ve
+    iptalde killOp ile sunucuda da durdurulur.
+    """
+    comment = f"imdb-web:{channel}:{uuid.uuid4().hex[:12]}"
+    try:
+        yield comment
+    except asyncio.CancelledError:
+        task = asyncio.get_running_loop().create_task(kill_operations(comment))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        raise
+
+
+async def capped_count(mongo_query, cap=None, comment=None):
+    """En fazla cap + 1 belge sayar: (total, capped)"""
+    cap = TOTAL_COUNT_CAP if cap is None else cap
+    total = await get_collection().count_documents(mongo_query, limit=cap + 1, maxTimeMS=SEARCH_TIMEOUT_MS,
+                                                   comment=comment)
+    return (cap, True) if total > cap else (total, False)
+
+
+async def search_facets(params, match, narrow, total, comment=None):
+    """
+    Facet sayıları: dar sonuç kümesinde canlı $facet, geniş kümede yükleme sırasında
+    hesaplanmış özetten tahmin (her istekte tüm eşleşmeler üzerinde $group çalışmaz)
+    """
+    if params.wants_live_facets(match, narrow, total):
+        try:
+            result = await get_collection().aggregate(facet_pipeline(match), maxTimeMS=FACET_TIMEOUT_MS,
+                                                      comment=comment).to_list(length=1)
+            return params.live_facets(result[0] if result else {})
+        except ExecutionTimeout:
+            pass
+    return params.estimated_facets(facet_summary.value, total)
+
+
+async def fetch_hits(params, hits):
+    """İndeks sonuçlarının belgelerini tek $in sorgusuyla getirir, indeks sırasına dizer"""
+    if not hits:
+        return []
+    documents = await get_collection().find(params.hits_query(hits), params.projection).to_list(length=None)
+    return params.ordered(hits, documents)
+
+
+@app.route('/')
+async def index():
+    """Ana sayfa"""
+    return await render_template('index.html')
+
+
+@app.route('/api/search')
+@cached('search', ttl=60, list_params=('genre',),
+        exact_params=('cursor', 'limit', 'view', 'fields', 'type', 'decade', 'facets', 'fuzzy'))
+async def search():
+    """
+    Canlı arama API (?limit=, ?cursor= ile sayfalı; ?view= / ?fields= ile alan seçimi;
+    ?type= / ?decade= / ?genre= filtreleri, ?facets=1 ile facet sayıları,
+    ?fuzzy=auto|1|0 ile yazım hatası toleransı)
+    """
+    try:
+        params, reply = SearchRequest.parse(request.args, get_profile())
+        if reply is not None:
+            return jsonify(reply)
+
+        # Bellek içi arama milisaniye mertebesinde; thread'e taşımak kazançtan çok maliyet getirir
+        index, token = search_index.snapshot if SEARCH_INDEX_ENABLED else (None, None)
+        if params.uses_index(index):
+            version = index_version(token)
+            if params.cursor_expired(version):
+                return jsonify(CURSOR_EXPIRED)
+            if params.fuzzy_first(index):
+                hits, total, exact, corrections = params.fuzzy_page(index)
+                return jsonify(params.fuzzy_reply(await fetch_hits(params, hits), total, exact, corrections))
+            hits, total, exact, next_cursor = params.index_page(index, version)
+            results = await fetch_hits(params, hits)
+            if params.fuzzy_fallback(index, total):
+                hits, total_fuzzy, exact_fuzzy, corrections = params.fuzzy_page(index)
+                if hits:
+                    return jsonify(params.fuzzy_reply(await fetch_hits(params, hits), total_fuzzy, exact_fuzzy,
+                                                      corrections))
+            params.index_totals(total, exact)
+            if params.with_facets:
+                match, narrow = params.index_facet_match(index, total)
+                async with killed_on_disconnect('facets') as comment:
+                    params.payload.update(await search_facets(params, match, narrow, total, comment))
+            return jsonify(params.reply(results, next_cursor))
+
+        if params.cursor_expired():
+            # İndeks cursor'ı ama indeks artık kullanılmıyor
+            return jsonify(CURSOR_EXPIRED)
+
+        mongo_query = params.regex_query()
+        if mongo_query is None:
+            return jsonify(NO_SEARCH_FIELDS)
+
+        if superseded('search'):
+            return jsonify({'results': [], 'total': 0, **SUPERSEDED_RESPONSE})
+
+        # Keyset sayfalama (skip yok); ilk sayfada sayfa ve (sınırlı) toplam aynı anda sorgulanır
+        page_query, projection, sort = params.page_find(mongo_query)
+        try:
+            async with killed_on_disconnect('search') as comment:
+                page = (get_collection().find(page_query, projection, comment=comment)
+                        .sort(sort).limit(params.limit + 1).max_time_ms(SEARCH_TIMEOUT_MS))
+                if params.first_page:
+                    documents, (total, capped) = await asyncio.gather(page.to_list(length=params.limit + 1),
+                                                                      capped_count(mongo_query, comment=comment))
+                    params.regex_totals(total, capped)
+                    if params.with_facets:
+                        narrow = not capped and total <= FACET_LIVE_LIMIT
+                        params.payload.update(await search_facets(params, mongo_query, narrow, total, comment))
+                else:
+                    documents = await page.to_list(length=params.limit + 1)
+        except ExecutionTimeout:
+            return jsonify(SEARCH_TIMED_OUT)
+
+        return jsonify(params.reply(*params.regex_page(documents)))
+
+    except Exception as e:
+        print(f"Search error: {e}")
+        return jsonify({'results': [], 'total': 0, 'error': str(e)})
+
+
+@app.route('/api/search/total')
+@cached('search_total', ttl=300, list_params=('genre',), exact_params=('type', 'decade'))
+async def search_total():
+    """Kesin toplam (arayüz "1000+" / "~N" gösterdikten sonra ayrıca ister)"""
+    try:
+        params, reply = TotalRequest.parse(request.args, get_profile())
+        if reply is not None:
+            return jsonify(reply)
+
+        index = search_index.value if SEARCH_INDEX_ENABLED else None
+        if index is not None:
+            # Sık kelimelerde tüm posting listeleri gezilir; event loop'u bekletmemek için thread'de
+            total, _ = await asyncio.to_thread(index.count, params.query, tags=params.tags)
+            return jsonify(params.reply(total))
+
+        mongo_query = params.regex_query()
+        if mongo_query is None:
+            return jsonify(params.reply(0))
+        if superseded('search_total'):
+            return jsonify({'total': None, **SUPERSEDED_RESPONSE})
+        try:
+            async with killed_on_disconnect('search_total') as comment:
+                total = await get_collection().count_documents(mongo_query, maxTimeMS=TOTAL_COUNT_TIMEOUT_MS,
+                                                               comment=comment)
+        except ExecutionTimeout:
+            return jsonify(params.timed_out())
+        return jsonify(params.reply(total))
+
+    except Exception as e:
+        print(f"Total error: {e}")
+        return jsonify({'total': None, 'error': str(e)})
+
+
+@app.route('/api/suggestions')
+@cached('suggestions', ttl=300)
+async def suggestions():
+    """Otomatik tamamlama önerileri"""
+    try:
+        query = query_text(request.args)
+        if query is None:
+            return jsonify(suggestions_reply([]))
+
+        # İndeks hazırsa MongoDB'ye hiç gitmeden cevap ver
+        index = suggestion_index.value if SUGGESTION_INDEX_ENABLED else None
+        if index is not None:
+            return jsonify({'suggestions': index.search(query, limit=5)})
+
+        pipeline = suggestion_pipeline(query, get_profile())
+        if not pipeline:
+            return jsonify(suggestions_reply([]))
+        if superseded('suggestions'):
+            return jsonify({'suggestions': [], **SUPERSEDED_RESPONSE})
+        async with killed_on_disconnect('suggestions') as comment:
+            rows = await get_collection().aggregate(pipeline, maxTimeMS=SUGGESTION_TIMEOUT_MS,
+                                                    comment=comment).to_list(length=None)
+        return jsonify(suggestions_reply(rows))
+
+    except ExecutionTimeout:
+        return jsonify(SUGGESTIONS_TIMED_OUT)
+    except Exception as e:
+        print(f"Suggestions error: {e}")
+        return jsonify(suggestions_reply([]))
+
+
+@app.route('/api/lookup', methods=['GET', 'POST'])
+async def lookup():
+    """
+    tconst / nconst listesiyle toplu belge getirme (giriş sırası korunur)
+
+    GET /api/lookup?ids=tt0111161,nm0000151   veya   POST {"ids": [...], "view": "card"}
+    """
+    try:
+        body = (await request.get_json(silent=True) or {}) if request.method == 'POST' else None
+        params, reply = LookupRequest.parse(request.args, body)
+        if reply is not None:
+            return jsonify(reply)
+
+        namespace = params.namespace(collection_profile.token)
+        found, missing = hot_ids.get_many(namespace, params.ids)
+        query = lookup_query(missing, get_profile()) if missing else None
+        if query is not None:
+            async with killed_on_disconnect('lookup') as comment:
+                documents = await (get_collection().find(query, params.projection, comment=comment)
+                                   .max_time_ms(SEARCH_TIMEOUT_MS).to_list(length=None))
+            fetched = documents_by_id(documents)
+            hot_ids.set_many(namespace, fetched)
+            found.update(fetched)
+
+        return jsonify(params.reply(found))
+
+    except Exception as e:
+        print(f"Lookup error: {e}")
+        return jsonify({'results': [], 'error': str(e)})
+
+
+@app.route('/api/stats')
+@cached('stats', ttl=30, query_params=())
+async def stats():
+    """Database istatistikleri"""
+    try:
+        total_docs = await get_collection().estimated_document_count()
+        return jsonify(stats_payload(total_docs, COLLECTION_NAME, DATABASE_NAME, get_profile()))
+
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+
+@app.route('/api/cache')
+async def cache_stats():
+    """Önbellek isabet / ıska sayaçları (bu worker)"""
+    return jsonify(cache_payload(response_cache, hot_ids))
+
+
+@app.route('/metrics')
+async def metrics_endpoint():
+    """Rota ve MongoDB komut gecikmeleri (p50 / p95 / p99), önbellek oranları, yavaş sorgular (bu worker)"""
+    return jsonify(metrics_payload(metrics, response_cache, hot_ids, SLOW_QUERY_MS))
+
+
+@app.route('/healthz')
+async def healthz():
+    """Canlılık: süreç istek cevaplayabiliyor mu (MongoDB'ye gitmez; yeniden başlatma kararı için)"""
+    return jsonify(HEALTHY)
+
+
+@app.route('/readyz')
+async def readyz():
+    """Hazırlık: Motor istemcisiyle MongoDB ping'i (önbellekli); başarısızsa 503 ile worker trafikten çıkarılır"""
+    payload, status = readiness(await motor_ping(), search_index, suggestion_index, MONGO_SETTINGS)
+    return jsonify(payload), status
+
+
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=5000)
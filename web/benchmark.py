@@ -0,0 +1,176 @@
+import argparse
+import gc
+import itertools
+import random
+import resource
+import statistics
+import time
+
+from search_index import InvertedIndex, PrefixIndex, TITLE_TYPE_WEIGHTS, fold_text
+
+TITLE_TYPES = list(TITLE_TYPE_WEIGHTS)
+GENRES = ['Action', 'Comedy', 'Documentary', 'Drama', 'Horror', 'Romance', 'Short', 'Animation']
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ra', 'su', 'ti', 'vo', 'ze', 'ba', 'do', 'fi', 'gu', 'ha', 'je',
+             'çi', 'gö', 'ße', 'ün', 'ar', 'el', 'or', 'an', 'st', 'th']
+
+
+def make_vocabulary(size, seed=7):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))).capitalize())
+    return sorted(words)
+
+
+def iter_synthetic_documents(count, vocabulary, seed=42):
+    """
+    title.basics biçiminde (key, texts, tags, weight) dörtlüleri; kelimeler Zipf dağılımlı
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    cumulative = list(itertools.accumulate(weights))
+    for i in range(1, count + 1):
+        title = ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(1, 5)))
+        genres = rng.sample(GENRES, rng.randint(1, 3))
+        title_type = rng.choice(TITLE_TYPES)
+        weight = TITLE_TYPE_WEIGHTS[title_type] + rng.random() * 4
+        yield f"tt{i:07d}", [title, title] + genres, [f"genre:{fold_text(g)}" for g in genres], weight
+
+
+def make_queries(vocabulary, count=300, seed=3):
+    rng = random.Random(seed)
+    common, rare = vocabulary[:50], vocabulary
+    queries = []
+    for _ in range(count):
+        kind = rng.choice(['common', 'rare', 'two', 'prefix'])
+        if kind == 'common':
+            queries.append(rng.choice(common))
+        elif kind == 'rare':
+            queries.append(rng.choice(rare))
+        elif kind == 'two':
+            queries.append(f"{rng.choice(common)} {rng.choice(rare)}")
+        else:
+            queries.append(rng.choice(rare)[:3])
+    return queries
+
+
+def make_typos(queries, seed=5):
+    """Her sorgunun en uzun kelimesine tek harf hatası (silme, ekleme, değiştirme veya yer değiştirme)"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    typos = []
+    for query in queries:
+        words = fold_text(query).split()
+        i = max(range(len(words)), key=lambda j: len(words[j]))
+        word = words[i]
+        if len(word) < 4:
+            continue
+        pos = rng.randrange(1, len(word) - 1)
+        kind = rng.choice(['delete', 'insert', 'replace', 'swap'])
+        if kind == 'delete':
+            word = word[:pos] + word[pos + 1:]
+        elif kind == 'insert':
+            word = word[:pos] + rng.choice(letters) + word[pos:]
+        elif kind == 'replace':
+            word = word[:pos] + rng.choice(letters) + word[pos + 1:]
+        else:
+            word = word[:pos - 1] + word[pos] + word[pos - 1] + word[pos + 1:]
+        typos.append(' '.join(words[:i] + [word] + words[i + 1:]))
+    return typos
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _latency_report(name, func, queries):
+    durations = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    p = lambda q: durations[min(len(durations) - 1, int(q * len(durations)))]
+    print(f"  {name:<22} p50 {p(0.50):8.3f} ms  p95 {p(0.95):8.3f} ms  p99 {p(0.99):8.3f} ms  "
+          f"ort {statistics.mean(durations):8.3f} ms")
+
+
+def _page_cursors(index, queries, page, limit=10):
+    """Her sorgu için page. sayfanın cursor'ı (sonuç o kadar sürmüyorsa sorgu atlanır)"""
+    cursors = []
+    for query in queries:
+        after = None
+        for _ in range(page - 1):
+            _, _, _, after = index.search_page(query, limit=limit, after=after)
+            if after is None:
+                break
+        if after is not None:
+            cursors.append((query, after))
+    return cursors
+
+
+def run_benchmark(doc_counts, vocabulary_size, uri=None, database=None, collection_name=None, fuzzy=False):
+    vocabulary = make_vocabulary(vocabulary_size)
+    queries = make_queries(vocabulary)
+    typos = make_typos(queries) if fuzzy else []
+
+    for count in doc_counts:
+        print(f"\n🧪 {count:,} belge, {vocabulary_size:,} kelimelik sözlük")
+        gc.collect()
+
+        start = time.perf_counter()
+        index = InvertedIndex(iter_synthetic_documents(count, vocabulary), fuzzy=fuzzy)
+        print(f"  Ters indeks kurulumu{' (+ trigram sözlüğü)' if fuzzy else ''}: {time.perf_counter() - start:.1f} sn, "
+              f"{len(index.token_ids):,} kelime, en yüksek RSS {_peak_rss_mb():,.0f} MB")
+
+        start = time.perf_counter()
+        prefixes = PrefixIndex((texts[0], None, weight)
+                               for _, texts, _, weight in iter_synthetic_documents(count, vocabulary))
+        print(f"  Önek indeksi kurulumu: {time.perf_counter() - start:.1f} sn, {len(prefixes):,} tekil başlık")
+
+        _latency_report("/api/search (indeks)", lambda q: index.search(q, limit=10), queries)
+        _latency_report("  + genre filtresi", lambda q: index.search(q, limit=10, tags=["genre:drama"]), queries)
+        _latency_report("/api/suggestions", lambda q: prefixes.search(q, limit=5), queries)
+        if typos:
+            _latency_report("  fuzzy (1 harf hatası)", lambda q: index.fuzzy_search(q, limit=10), typos)
+        for page in (2, 20):
+            cursors = _page_cursors(index, queries, page)
+            if cursors:
+                _latency_report(f"  {page}. sayfa (cursor)",
+                                lambda qa: index.search_page(qa[0], limit=10, after=qa[1]), cursors)
+
+        if uri:
+            _mongo_regex_report(uri, database, collection_name, queries)
+
+        del index, prefixes
+
+
+def _mongo_regex_report(uri, database, collection_name, queries):
+    """Karşılaştırma: app.py'nin eski $regex + count_documents yolu (yüklü bir koleksiyonda)"""
+    from pymongo import MongoClient
+    collection = MongoClient(uri)[database][collection_name]
+
+    def regex_search(query):
+        conditions = [{field: {"$regex": query, "$options": "i"}}
+                      for field in ('primaryTitle', 'originalTitle', 'genres')]
+        list(collection.find({"$or": conditions}).limit(10))
+        collection.count_documents({"$or": conditions})
+
+    _latency_report(f"MongoDB $regex ({collection.estimated_document_count():,})", regex_search, queries[:30])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arama / öneri indeksi gecikme benchmark'ı")
+    parser.add_argument("--docs", type=str, default="1000000,10000000",
+                        help="Belge sayıları, örn. 1000000,10000000")
+    parser.add_argument("--vocabulary", type=int, default=200000)
+    parser.add_argument("--uri", type=str, default=None,
+                        help="Karşılaştırma için mongod bağlantısı (yüklü koleksiyon gerekir)")
+    parser.add_argument("--db", type=str, default="imdb_database")
+    parser.add_argument("--collection", type=str, default="movies")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="Trigram sözlüğünü de kur ve yazım hatalı sorguları ölç")
+    args = parser.parse_args()
+
+    run_benchmark([int(n) for n in args.docs.split(',')], args.vocabulary,
+                  args.uri, args.db, args.collection, args.fuzzy)
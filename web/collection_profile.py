@@ -0,0 +1,55 @@
+class CollectionProfile:
+    """
+    Koleksiyonun şeması: kayıt türü, alanlar, dizi alanları ve index'ler
+
+    Handler'lar her istekte find_one() çağırmak yerine bu profile bakar; profil koleksiyon
+    generation'ı / revision'ı değiştiğinde yeniden tespit edilir (bkz. GenerationWatcher).
+    """
+
+    def __init__(self, fields=(), array_fields=(), indexes=()):
+        self.fields = list(fields)
+        self.array_fields = set(array_fields)
+        self.indexes = [tuple(index) for index in indexes]
+        self._field_set = set(self.fields)
+
+    def __repr__(self):
+        return f"CollectionProfile(kind={self.kind!r}, fields={self.fields!r})"
+
+    @property
+    def kind(self):
+        if 'tconst' in self._field_set:
+            return 'title'
+        if 'nconst' in self._field_set:
+            return 'name'
+        return None
+
+    @property
+    def key_field(self):
+        return {'title': 'tconst', 'name': 'nconst'}.get(self.kind)
+
+    def has(self, field):
+        return field in self._field_set
+
+    def is_array(self, field):
+        return field in self.array_fields
+
+    def is_indexed(self, field):
+        """Alan bir index'in ilk alanı mı (önek / eşitlik sorguları index'i kullanabilir)"""
+        return any(index[0] == field for index in self.indexes)
+
+
+def detect_collection_profile(collection, sample_size=20):
+    """
+    İlk sample_size kayıttan alanları ve dizi alanlarını, list_indexes() ile index'leri toplar
+    """
+    fields, array_fields = {}, set()
+    for doc in collection.find({}, limit=sample_size):
+        for field, value in doc.items():
+            if field == '_id':
+                continue
+            fields.setdefault(field, None)
+            if isinstance(value, list):
+                array_fields.add(field)
+
+    indexes = [list(index['key'].keys()) for index in collection.list_indexes()]
+    return CollectionProfile(fields, array_fields, indexes)
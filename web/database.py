@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+
+import pymongo
+from pymongo import MongoClient
+from pymongo.errors import ConnectionFailure
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return cast(value)
+
+
+class MongoSettings:
+    """
+    Bağlantı havuzu, zaman aşımları ve okuma tercihi
+
+    Varsayılanlar tek bir yerel mongod içindir; from_env() her değeri MONGO_* ortam
+    değişkenleriyle değiştirmeye izin verir (tüm gunicorn worker'ları aynı ayarları okur).
+    Havuz worker başınadır: toplam bağlantı = worker sayısı x max_pool_size.
+    """
+
+    def __init__(self, uri='mongodb://localhost:27017/', database='imdb_database', collection='movies',
+                 max_pool_size=20, min_pool_size=0, max_connecting=2, wait_queue_timeout_ms=2000,
+                 server_selection_timeout_ms=3000, connect_timeout_ms=2000, socket_timeout_ms=10000,
+                 search_read_preference='secondaryPreferred', max_staleness_s=None, app_name='imdb-web',
+                 health_timeout_ms=1000):
+        if search_read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Invalid read preference: {search_read_preference}")
+        self.uri = uri
+        self.database = database
+        self.collection = collection
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.max_connecting = max_connecting
+        self.wait_queue_timeout_ms = wait_queue_timeout_ms
+        self.server_selection_timeout_ms = server_selection_timeout_ms
+        self.connect_timeout_ms = connect_timeout_ms
+        self.socket_timeout_ms = socket_timeout_ms
+        self.search_read_preference = search_read_preference
+        self.max_staleness_s = max_staleness_s
+        self.app_name = app_name
+        self.health_timeout_ms = health_timeout_ms
+
+    @classmethod
+    def from_env(cls, **defaults):
+        """Ortam değişkenleri > defaults > sınıf varsayılanları (örn. MONGO_MAX_POOL_SIZE=50)"""
+        settings = cls(**defaults)
+        for name, cast in (('uri', str), ('database', str), ('collection', str), ('max_pool_size', int),
+                           ('min_pool_size', int), ('max_connecting', int), ('wait_queue_timeout_ms', int),
+                           ('server_selection_timeout_ms', int), ('connect_timeout_ms', int),
+                           ('socket_timeout_ms', int), ('search_read_preference', str),
+                           ('max_staleness_s', int), ('app_name', str), ('health_timeout_ms', int)):
+            setattr(settings, name, _env(f"MONGO_{name.upper()}", getattr(settings, name), cast))
+        if settings.search_read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Invalid read preference: {settings.search_read_preference}")
+        return settings
+
+    def client_options(self):
+        """MongoClient / AsyncIOMotorClient anahtar kelime argümanları"""
+        return {
+            'maxPoolSize': self.max_pool_size,
+            'minPoolSize': self.min_pool_size,
+            'maxConnecting': self.max_connecting,
+            'waitQueueTimeoutMS': self.wait_queue_timeout_ms,
+            'serverSelectionTimeoutMS': self.server_selection_timeout_ms,
+            'connectTimeoutMS': self.connect_timeout_ms,
+            'socketTimeoutMS': self.socket_timeout_ms,
+            'appname': self.app_name,
+            'retryReads': True,
+        }
+
+    def read_preference(self):
+        """Arama okumalarının tercihi (secondaryPreferred: replica set'te ikincillere dağıtılır)"""
+        mode = READ_PREFERENCES[self.search_read_preference]
+        if mode is Primary or self.max_staleness_s is None:
+            return mode()
+        return mode(max_staleness=self.max_staleness_s)
+
+    def describe(self):
+        """Sağlık / metrik çıktısı için ayarlar (URI'deki kullanıcı adı ve şifre gösterilmez)"""
+        return {
+            'host': self.uri.rsplit('@', 1)[-1],
+            'database': self.database,
+            'collection': self.collection,
+            'max_pool_size': self.max_pool_size,
+            'max_connecting': self.max_connecting,
+            'wait_queue_timeout_ms': self.wait_queue_timeout_ms,
+            'server_selection_timeout_ms': self.server_selection_timeout_ms,
+            'socket_timeout_ms': self.socket_timeout_ms,
+            'search_read_preference': self.search_read_preference,
+        }
+
+
+class MongoConnection:
+    """
+    Tembel ve yeniden denenen MongoClient
+
+    İstemci ilk kullanımda connect=False ile oluşturulur: import sırasında soket açılmaz,
+    bağlantılar ilk sorguda ve en fazla max_connecting eşzamanlı olarak kurulur (çok sayıda
+    worker aynı anda başlarken bağlantı fırtınası olmaz). Oluşturma başarısız olursa (geçersiz
+    URI, mongodb+srv DNS hatası) istekler ConnectionFailure alır ve yeni deneme üstel
+    beklemeyle (en fazla max_backoff saniye) yapılır.
+    """
+
+    def __init__(self, settings, event_listeners=(), max_backoff=30.0):
+        self.settings = settings
+        self.event_listeners = list(event_listeners)
+        self.max_backoff = max_backoff
+        self._client = None
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error = None
+        self._health = (0.0, None)
+
+    @property
+    def client(self):
+        client = self._client
+        if client is not None:
+            return client
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            if time.monotonic() < self._retry_at:
+                raise ConnectionFailure(f"MongoDB unavailable: {self._last_error}")
+            try:
+                self._client = MongoClient(self.settings.uri, connect=False,
+                                           event_listeners=self.event_listeners,
+                                           **self.settings.client_options())
+            except Exception as e:
+                self._failures += 1
+                self._last_error = str(e)
+                self._retry_at = time.monotonic() + min(self.max_backoff, 2 ** (self._failures - 1))
+                print(f"❌ MongoDB bağlantı hatası: {e}")
+                raise ConnectionFailure(f"MongoDB unavailable: {e}") from e
+            self._failures = 0
+            print(f"✅ MongoDB istemcisi hazır: {self.settings.describe()['host']} "
+                  f"(havuz {self.settings.max_pool_size}, arama okumaları {self.settings.search_read_preference})")
+            return self._client
+
+    def __getitem__(self, database_name):
+        """client[database_name] (örn. explain komutları için)"""
+        return self.client[database_name]
+
+    def database(self):
+        return LazyDatabase(self, self.settings.database)
+
+    def collection(self, name=None, read_preference=None):
+        return LazyCollection(self, self.settings.database, name or self.settings.collection, read_preference)
+
+    def ping(self, cache_seconds=2.0):
+        """
+        Hazırlık kontrolü: (ok, latency_ms, error). Sonuç cache_seconds boyunca tekrar kullanılır;
+        sık yoklanan /readyz her seferinde MongoDB'ye gitmez.
+        """
+        checked_at, result = self._health
+        if result is not None and time.monotonic() - checked_at < cache_seconds:
+            return result
+        start = time.perf_counter()
+        try:
+            with pymongo.timeout(self.settings.health_timeout_ms / 1000):
+                self.client.admin.command('ping')
+            result = (True, round((time.perf_counter() - start) * 1000, 1), None)
+        except Exception as e:
+            result = (False, round((time.perf_counter() - start) * 1000, 1), str(e)[:200])
+        self._health = (time.monotonic(), result)
+        return result
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+class LazyDatabase:
+    """Database yerine geçer; gerçek nesne istemci hazır olunca alınır (name bağlantısız okunur)"""
+
+    def __init__(self, connection, name):
+        self._connection = connection
+        self.name = name
+
+    def __getitem__(self, collection_name):
+        return self._connection.client[self.name][collection_name]
+
+    def __getattr__(self, attribute):
+        return getattr(self._connection.client[self.name], attribute)
+
+
+class LazyCollection:
+    """
+    Collection yerine geçer: handler'lar modül düzeyindeki nesneyi kullanmaya devam eder,
+    bağlantı yoksa çağrı ConnectionFailure ile handler'ın except bloğuna düşer
+    """
+
+    def __init__(self, connection, database_name, name, read_preference=None):
+        self._connection = connection
+        self._database_name = database_name
+        self._read_preference = read_preference
+        self._resolved = (None, None)
+        self.name = name
+
+    def _collection(self):
+        client = self._connection.client
+        resolved_client, collection = self._resolved
+        if resolved_client is not client:
+            collection = client[self._database_name][self.name]
+            if self._read_preference is not None:
+                collection = collection.with_options(read_preference=self._read_preference)
+            self._resolved = (client, collection)
+        return collection
+
+    def __getattr__(self, attribute):
+        return getattr(self._collection(), attribute)
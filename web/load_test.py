@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+# Senkron (Flask / gunicorn) ve asenkron (Quart / uvicorn) sunucuları aynı sorgu karışımıyla karşılaştırır:
+#   gunicorn -w 4 --threads 8 -b :5000 app:app
+#   uvicorn async_app:app --workers 4 --port 5001
+#   python load_test.py --sync-url http://localhost:5000 --async-url http://localhost:5001
+
+QUERY_MIX = [
+    ('/api/search', 0.45),
+    ('/api/suggestions', 0.35),
+    ('/api/search/total', 0.10),
+    ('/api/stats', 0.10),
+]
+SAMPLE_QUERIES = ['the', 'star', 'love', 'man', 'night', 'war', 'city', 'girl', 'life', 'house',
+                  'star wars', 'the dark', 'love story', 'godfather', 'matrix', 'amélie', 'lord of the']
+SAMPLE_GENRES = ['Drama', 'Comedy', 'Documentary', 'Action', 'Horror']
+
+
+def make_requests(count, seed=11):
+    """(path, params) listesi; her sanal kullanıcı aynı listeden farklı bir konumdan başlar"""
+    rng = random.Random(seed)
+    paths, weights = zip(*QUERY_MIX)
+    requests = []
+    for _ in range(count):
+        path = rng.choices(paths, weights=weights)[0]
+        query = rng.choice(SAMPLE_QUERIES)
+        params = {}
+        if path == '/api/suggestions':
+            params['q'] = query[:rng.randint(2, len(query))]
+        elif path != '/api/stats':
+            params['q'] = query
+            if rng.random() < 0.2:
+                params['genre'] = rng.choice(SAMPLE_GENRES)
+        requests.append((path, params))
+    return requests
+
+
+async def _user(client, requests, offset, deadline, durations, errors):
+    i = offset
+    while time.perf_counter() < deadline:
+        path, params = requests[i % len(requests)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        durations.append((time.perf_counter() - start) * 1000)
+
+
+async def run_load(base_url, users, duration, requests, warmup):
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        if warmup:
+            await _user(client, requests, 0, time.perf_counter() + warmup, [], [])
+
+        durations, errors = [], []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_user(client, requests, user * 97, deadline, durations, errors)
+                               for user in range(users)))
+        elapsed = time.perf_counter() - start
+    return durations, errors, elapsed
+
+
+async def _typist(client, queries, deadline, keystroke, counters, session):
+    """Sorguyu harf harf yazan kullanıcı: her tuşta yeni /api/search, önceki istek iptal edilir"""
+    rng = random.Random(session)
+    seq = 0
+    while time.perf_counter() < deadline:
+        query, pending = rng.choice(queries), None
+        for end in range(2, len(query) + 1):
+            if pending is not None and not pending.done():
+                pending.cancel()
+                counters['aborted'] += 1
+            seq += 1
+            headers = {'X-Search-Session': f"load-{session}", 'X-Search-Seq': str(seq)}
+            pending = asyncio.create_task(client.get('/api/search', params={'q': query[:end]}, headers=headers))
+            counters['sent'] += 1
+            await asyncio.sleep(keystroke)
+        try:
+            response = await pending
+            counters['superseded' if response.json().get('cancelled') else 'completed'] += 1
+        except (httpx.HTTPError, asyncio.CancelledError):
+            counters['errors'] += 1
+
+
+async def run_typing(base_url, users, duration, keystroke):
+    counters = dict.fromkeys(['sent', 'aborted', 'superseded', 'completed', 'errors'], 0)
+    limits = httpx.Limits(max_connections=users * 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(_typist(client, SAMPLE_QUERIES, deadline, keystroke, counters, user)
+                               for user in range(users)))
+    return counters
+
+
+def report(name, durations, errors, elapsed):
+    if not durations:
+        print(f"  {name:<8} başarılı istek yok ({len(errors)} hata)")
+        return
+    durations.sort()
+    p = lambda q: durations[min(len(durations) - 1, int(q * len(durations)))]
+    print(f"  {name:<8} {len(durations) / elapsed:8.1f} RPS  p50 {p(0.50):8.2f} ms  "
+          f"p99 {p(0.99):8.2f} ms  ({len(durations):,} istek, {len(errors)} hata)")
+
+
+async def main(args):
+    requests = make_requests(args.requests)
+    targets = [(name, url) for name, url in (('sync', args.sync_url), ('async', args.async_url)) if url]
+    if not targets:
+        print("❌ --sync-url ve/veya --async-url verin")
+        return
+
+    for users in [int(n) for n in args.users.split(',')]:
+        if args.typing:
+            print(f"\n⌨️  {users} kullanıcı yazıyor, tuş arası {args.keystroke * 1000:.0f} ms, {args.duration:.0f} sn")
+            for name, url in targets:
+                counters = await run_typing(url, users, args.duration, args.keystroke)
+                print(f"  {name:<8} {counters['sent']:,} istek: {counters['aborted']:,} istemcide iptal, "
+                      f"{counters['superseded']:,} sunucuda atlandı, {counters['completed']:,} son sorgu, "
+                      f"{counters['errors']} hata")
+            continue
+        print(f"\n🧪 {users} eşzamanlı kullanıcı, {args.duration:.0f} sn")
+        for name, url in targets:
+            durations, errors, elapsed = await run_load(url, users, args.duration, requests, args.warmup)
+            report(name, durations, errors, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Senkron / asenkron sunucu yük testi (RPS, p50, p99)")
+    parser.add_argument("--sync-url", type=str, default=None, help="örn. http://localhost:5000")
+    parser.add_argument("--async-url", type=str, default=None, help="örn. http://localhost:5001")
+    parser.add_argument("--users", type=str, default="10,50,200", help="Eşzamanlı kullanıcı sayıları")
+    parser.add_argument("--duration", type=float, default=30.0, help="Her ölçüm için süre (sn)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Ölçüm öncesi ısınma süresi (sn)")
+    parser.add_argument("--requests", type=int, default=2000, help="Sorgu karışımındaki istek sayısı")
+    parser.add_argument("--typing", action="store_true",
+                        help="Karışım yerine harf harf yazma senaryosu (iptal edilen / atlanan istekler)")
+    parser.add_argument("--keystroke", type=float, default=0.08, help="Tuş arası süre (sn)")
+    asyncio.run(main(parser.parse_args()))
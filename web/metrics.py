@@ -0,0 +1,304 @@
+import json
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+
+from pymongo import monitoring
+
+# Gecikme kovaları (ms): 0.1 ms'den ~60 sn'ye, her kova bir öncekinin 1.25 katı
+BUCKET_BOUNDS_MS = tuple(round(0.1 * 1.25 ** i, 3) for i in range(60))
+
+# Zamanlanan MongoDB komutları; explain yalnızca plan üreten komutlar için istenir
+TIMED_COMMANDS = frozenset(['find', 'aggregate', 'count', 'distinct', 'getMore'])
+EXPLAINED_COMMANDS = frozenset(['find', 'aggregate', 'count', 'distinct'])
+# Sürücünün eklediği, explain içinde geçersiz veya gereksiz alanlar
+_DRIVER_FIELDS = frozenset(['lsid', '$db', '$clusterTime', '$readPreference', 'txnNumber', 'autocommit',
+                            'startTransaction', 'readConcern'])
+_QUERY_FIELDS = ('filter', 'pipeline', 'query', 'key', 'sort', 'projection', 'limit')
+MAX_QUERY_TEXT = 500
+# Cevap gövdesi yalnızca bu boyuta kadar okunur (hata / iptal alanları için)
+REPLY_INSPECT_BYTES = 2048
+
+
+class LatencyHistogram:
+    """
+    Sabit kovalı gecikme histogramı (p50 / p95 / p99)
+
+    Her ölçüm tek bir sayaç artırır; bellek ölçüm sayısından bağımsızdır. Yüzdelikler
+    kova içinde doğrusal ara değerle tahmin edilir (en fazla %25 hata, gözlenen max ile sınırlı).
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS_MS[i - 1] if i else 0.0
+                upper = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return round(min(lower + (upper - lower) * (rank - seen) / n, self.max_ms), 3)
+            seen += n
+        return round(self.max_ms, 3)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+
+def query_shape(value):
+    """Sorgunun değerlerden arındırılmış biçimi: {"a": {"$gt": 5}} -> {"a": {"$gt": 1}}"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [query_shape(item) for item in value]
+        return shapes if any(isinstance(item, (dict, list)) for item in shapes) else 1
+    return 1
+
+
+def explain_command(command_name, command):
+    """Zamanlanan komuttan {"explain": {...}} komutu (sürücü alanları çıkarılır)"""
+    inner = {key: value for key, value in command.items() if key not in _DRIVER_FIELDS}
+    if command_name == 'aggregate':
+        inner['cursor'] = {}
+    return {'explain': inner, 'verbosity': 'queryPlanner'}
+
+
+def plan_summary(explain):
+    """
+    explain çıktısından kazanan planın aşamaları ve index'leri
+
+    find / count için queryPlanner en üsttedir; aggregate'te $cursor aşamasının içinde
+    (veya SBE'de yine en üstte) bulunur. Tüm winningPlan düğümleri aranır.
+    """
+    stages, indexes = [], []
+
+    def walk_plan(node):
+        if isinstance(node, dict):
+            if 'stage' in node:
+                stages.append(node['stage'])
+            if node.get('indexName'):
+                indexes.append(node['indexName'])
+            for key in ('inputStage', 'queryPlan'):
+                walk_plan(node.get(key))
+            for child in node.get('inputStages', []):
+                walk_plan(child)
+
+    def find_plans(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == 'winningPlan':
+                    walk_plan(value)
+                else:
+                    find_plans(value)
+        elif isinstance(node, list):
+            for item in node:
+                find_plans(item)
+
+    find_plans(explain)
+    return {'stages': stages, 'indexes': sorted(set(indexes)), 'collection_scan': 'COLLSCAN' in stages}
+
+
+class Metrics:
+    """
+    İstek ve MongoDB komutu ölçümleri (süreç / worker başına)
+
+    Rota başına gecikme histogramı, durum kodları, önbellek isabetleri ve hata cevapları;
+    (komut, koleksiyon) başına gecikme histogramı ve hata sayısı; eşiği aşan sorguların
+    son slow_query_log_size tanesi (explain planıyla birlikte).
+    """
+
+    def __init__(self, slow_query_log_size=100):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.routes = {}
+        self.commands = {}
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+
+    def observe_route(self, route, status, ms, cache=None, error=False, cancelled=False):
+        with self._lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {'latency': LatencyHistogram(), 'status': {}, 'cache_hits': 0,
+                                              'cache_misses': 0, 'errors': 0, 'cancelled': 0}
+            entry['latency'].observe(ms)
+            entry['status'][str(status)] = entry['status'].get(str(status), 0) + 1
+            if cache == 'HIT':
+                entry['cache_hits'] += 1
+            elif cache == 'MISS':
+                entry['cache_misses'] += 1
+            entry['errors'] += error
+            entry['cancelled'] += cancelled
+
+    def observe_reply(self, route, status, ms, cache=None, payload=None):
+        """
+        observe_route; hata cevapları da 200 döndüğü için sonuç gövdeden okunur
+        (payload: küçük JSON cevabın gövdesi, iptal edilen istekler hata sayılmaz)
+        """
+        payload = payload if isinstance(payload, dict) else {}
+        self.observe_route(route, status, ms, cache=cache,
+                           error='error' in payload and not payload.get('cancelled'),
+                           cancelled=bool(payload.get('cancelled')))
+
+    def observe_command(self, command_name, collection, ms, failed=False):
+        key = f"{command_name} {collection}" if collection else command_name
+        with self._lock:
+            entry = self.commands.get(key)
+            if entry is None:
+                entry = self.commands[key] = {'latency': LatencyHistogram(), 'failures': 0}
+            entry['latency'].observe(ms)
+            entry['failures'] += failed
+
+    def record_slow_query(self, record):
+        with self._lock:
+            self.slow_queries.append(record)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: {**entry['latency'].summary(), 'status': dict(entry['status']),
+                              'cache_hits': entry['cache_hits'], 'cache_misses': entry['cache_misses'],
+                              'errors': entry['errors'], 'cancelled': entry['cancelled']}
+                      for route, entry in self.routes.items()}
+            commands = {key: {**entry['latency'].summary(), 'failures': entry['failures']}
+                        for key, entry in self.commands.items()}
+            slow_queries = [dict(record) for record in reversed(self.slow_queries)]
+        for values in routes.values():
+            lookups = values['cache_hits'] + values['cache_misses']
+            values['cache_hit_ratio'] = round(values['cache_hits'] / lookups, 3) if lookups else 0.0
+        return {
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'routes': routes,
+            'mongo': commands,
+            'slow_queries': slow_queries,
+            'collection_scans': sum(1 for record in slow_queries if (record.get('plan') or {}).get('collection_scan'))
+        }
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    pymongo komut izleme dinleyicisi: MongoClient(event_listeners=[...]) ile kaydedilir
+
+    find / aggregate / count / distinct / getMore sürelerini Metrics'e yazar. slow_ms'i aşan
+    sorgular yavaş sorgu kaydına eklenir ve explain (queryPlanner, sorguyu çalıştırmaz) arka
+    plan thread'inde alınır: dinleyici sürücünün thread'inde çalıştığı için içinde sorgu
+    gönderilmez. Aynı biçimdeki sorgu explain_interval içinde bir kez açıklanır.
+    """
+
+    def __init__(self, metrics, slow_ms=100, explain=True, explain_interval=300):
+        self.metrics = metrics
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.client = None
+        self._pending = {}
+        self._plans = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=100)
+        self._worker = None
+
+    def explain_with(self, client):
+        """explain komutlarını gönderecek senkron MongoClient (aynı veya ayrı bağlantı)"""
+        self.client = client
+
+    def started(self, event):
+        if event.command_name not in TIMED_COMMANDS:
+            return
+        command = event.command
+        collection = command.get('collection') if event.command_name == 'getMore' else command.get(event.command_name)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, event.database_name, command)
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, database, command = pending
+        ms = event.duration_micros / 1000
+        self.metrics.observe_command(event.command_name, collection, ms, failed)
+        if ms >= self.slow_ms and not failed:
+            self._slow_query(event.command_name, collection, database, command, ms)
+
+    def _slow_query(self, command_name, collection, database, command, ms):
+        query = {key: command[key] for key in _QUERY_FIELDS if key in command}
+        text = json.dumps(query, default=str, ensure_ascii=False)
+        record = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'command': command_name,
+            'collection': collection,
+            'duration_ms': round(ms, 1),
+            'query': text if len(text) <= MAX_QUERY_TEXT else text[:MAX_QUERY_TEXT] + '...',
+            'comment': command.get('comment'),
+            'plan': None
+        }
+        print(f"🐢 Yavaş sorgu ({ms:.0f} ms): {command_name} {collection} {record['query'][:200]}")
+        self.metrics.record_slow_query(record)
+
+        if not self.explain or self.client is None or command_name not in EXPLAINED_COMMANDS:
+            return
+        shape = json.dumps([command_name, database, collection, query_shape(query)], default=str, sort_keys=True)
+        with self._lock:
+            plan, explained_at, waiting = self._plans.get(shape, (None, 0.0, []))
+            fresh = time.monotonic() - explained_at < self.explain_interval
+            if fresh and plan is None:
+                # Aynı biçimin explain'i sürüyor: plan gelince bu kayda da yazılır
+                waiting.append(record)
+            elif not fresh:
+                self._plans[shape] = (None, time.monotonic(), [record])
+        if fresh:
+            record['plan'] = plan
+            return
+        self._start_worker()
+        try:
+            self._queue.put_nowait((shape, database, explain_command(command_name, command), record))
+        except queue.Full:
+            with self._lock:
+                self._plans.pop(shape, None)
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+                self._worker.start()
+
+    def _explain_loop(self):
+        while True:
+            shape, database, command, record = self._queue.get()
+            try:
+                plan = plan_summary(self.client[database].command(command))
+            except Exception as e:
+                plan = {'error': str(e)}
+            with self._lock:
+                _, _, waiting = self._plans.get(shape, (None, 0.0, [record]))
+                self._plans[shape] = (plan, time.monotonic(), [])
+            for waiting_record in waiting:
+                waiting_record['plan'] = plan
+            if plan.get('collection_scan'):
+                print(f"⚠️  Koleksiyon taraması (COLLSCAN): {record['command']} {record['collection']} "
+                      f"{record['query'][:200]}")
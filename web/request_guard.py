@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+from response_cache import _import_redis
+
+# Canlı aramada arayüz her isteğe oturum kimliği ve artan sıra numarası ekler
+SESSION_HEADER = 'X-Search-Session'
+SEQUENCE_HEADER = 'X-Search-Seq'
+
+SUPERSEDED_RESPONSE = {'cancelled': True, 'error': 'Superseded by a newer request'}
+
+
+def request_sequence(headers):
+    """İstek başlıklarından (session, seq); başlık yoksa / geçersizse (None, None)"""
+    session = headers.get(SESSION_HEADER)
+    try:
+        seq = int(headers.get(SEQUENCE_HEADER, ''))
+    except ValueError:
+        return None, None
+    if not session:
+        return None, None
+    return session[:64], seq
+
+
+class LatestRequests:
+    """
+    Oturum ve kanal (search, suggestions ...) başına görülen en yüksek sıra numarası
+
+    Kullanıcı yazmaya devam ettikçe arayüz eski istekleri iptal eder; ancak sunucuya ulaşmış
+    (kuyrukta bekleyen veya çalışan) istekler yine de işlenir. Handler pahalı MongoDB
+    sorgusundan önce superseded() ile bakar: aynı oturumdan daha yeni bir istek geldiyse
+    sorguyu hiç çalıştırmaz. Sayaçlar süreç içidir; en eski oturumlar max_sessions aşılınca
+    atılır. Birden fazla worker'da (gunicorn -w 4) bir worker diğerlerine düşen yeni istekleri
+    görmez: yanlış iptal olmaz ama eski isteklerin çoğu yine çalışır, RedisLatestRequests kullanın.
+    """
+
+    def __init__(self, max_sessions=10000):
+        self.max_sessions = max_sessions
+        self._latest = OrderedDict()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def superseded(self, session, channel, seq):
+        """İsteği kaydeder; aynı oturumdan daha yeni bir istek görüldüyse True"""
+        if session is None:
+            return False
+        key = (session, channel)
+        with self._lock:
+            latest = self._latest.get(key)
+            if latest is not None and latest > seq:
+                self.dropped += 1
+                return True
+            self._latest[key] = seq
+            self._latest.move_to_end(key)
+            while len(self._latest) > self.max_sessions:
+                self._latest.popitem(last=False)
+        return False
+
+
+class RedisLatestRequests:
+    """
+    LatestRequests'in worker'lar / sunucular arasında paylaşılan sürümü (Redis)
+
+    Karşılaştırma ve yazma tek Lua betiğinde atomik yapılır; oturum anahtarları ttl saniye
+    sonra kendiliğinden silinir. Redis'e ulaşılamazsa istek iptal edilmez (normal işlenir).
+    """
+
+    # KEYS[1]: oturum + kanal, ARGV: sıra numarası, ttl; 1 = daha yeni bir istek görülmüş
+    _SCRIPT = """
+        local latest = tonumber(redis.call('GET', KEYS[1]))
+        if latest and latest > tonumber(ARGV[1]) then
+            return 1
+        end
+        redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+        return 0
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="imdb-seq", ttl=600, client=None):
+        redis = _import_redis()
+        self.client = client or redis.Redis.from_url(url, socket_timeout=0.05)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.dropped = 0
+        self._errors = (redis.RedisError,)
+        self._check = self.client.register_script(self._SCRIPT)
+
+    def superseded(self, session, channel, seq):
+        """İsteği kaydeder; herhangi bir worker aynı oturumdan daha yeni bir istek gördüyse True"""
+        if session is None:
+            return False
+        try:
+            newer = self._check(keys=[f"{self.prefix}:{channel}:{session}"], args=[seq, self.ttl])
+        except self._errors:
+            return False
+        if newer:
+            self.dropped += 1
+        return bool(newer)
+
+
+def latest_requests_store(backend, redis_url):
+    """Cevap önbelleğiyle aynı arka uç: "redis" ise paylaşılan, değilse süreç içi sayaçlar"""
+    if backend == "redis":
+        return RedisLatestRequests(redis_url)
+    return LatestRequests()
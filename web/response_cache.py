@@ -0,0 +1,229 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+
+class MemoryCacheBackend:
+    """
+    Süreç içi TTL + LRU önbellek
+
+    Girdiler OrderedDict'te erişim sırasıyla tutulur; max_entries aşılınca en eski kullanılan
+    atılır, süresi dolan girdi okunduğunda silinir.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _import_redis():
+    try:
+        import redis
+    except ImportError as e:
+        raise ImportError("Paylaşılan önbellek için redis gerekli: pip install redis") from e
+    return redis
+
+
+class RedisCacheBackend:
+    """
+    Birden fazla worker / sunucu arasında paylaşılan önbellek (Redis)
+
+    TTL Redis'in SETEX'i ile, LRU ise sunucunun maxmemory-policy ayarıyla (allkeys-lru) sağlanır.
+    Redis'e ulaşılamazsa önbellek atlanır, istek normal şekilde cevaplanır.
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="imdb-cache"):
+        redis = _import_redis()
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self.prefix = prefix
+        self._errors = (redis.RedisError,)
+
+    def get(self, key):
+        try:
+            value = self.client.get(f"{self.prefix}:{key}")
+        except self._errors:
+            return None
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl):
+        try:
+            self.client.setex(f"{self.prefix}:{key}", max(1, int(ttl)), value)
+        except self._errors:
+            pass
+
+    def clear(self):
+        try:
+            for key in self.client.scan_iter(f"{self.prefix}:*"):
+                self.client.delete(key)
+        except self._errors:
+            pass
+
+
+class HotIdCache:
+    """
+    Sık istenen tekil belgeler için ID -> belge önbelleği (toplu ID sorguları)
+
+    Namespace (örn. koleksiyon generation'ı + projection) anahtara eklenir; generation
+    değişince eski girdiler okunmaz ve LRU ile atılır.
+    """
+
+    def __init__(self, max_entries=5000, ttl=300):
+        self.ttl = ttl
+        self.backend = MemoryCacheBackend(max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, namespace, ids):
+        """(bulunanlar {id: belge}, bulunamayan ID'ler)"""
+        found, missing = {}, []
+        for id_ in ids:
+            doc = self.backend.get(f"{namespace}:{id_}")
+            if doc is None:
+                missing.append(id_)
+            else:
+                found[id_] = doc
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def set_many(self, namespace, docs_by_id):
+        for id_, doc in docs_by_id.items():
+            self.backend.set(f"{namespace}:{id_}", doc, self.ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.backend),
+            'max_entries': self.backend.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def normalize_query(text):
+    """Önbellek anahtarı için sorgu: küçük harf + tek boşluk ("The  Star " -> "the star")"""
+    return ' '.join(text.lower().split())
+
+
+class ResponseCache:
+    """
+    JSON endpoint'leri için cevap önbelleği
+
+    Anahtar: endpoint + normalize edilmiş sorgu parametreleri + koleksiyon sürümü. Sürüm
+    (version() çağrısı, örn. generation işaretleri) değişince eski girdiler artık okunmaz;
+    süreç içi backend ayrıca boşaltılır. Hata içeren veya 200 olmayan cevaplar saklanmaz.
+    """
+
+    def __init__(self, backend, version=lambda: None, enabled=True):
+        self.backend = backend
+        self.version = version
+        self.enabled = enabled
+        self._version_key = None
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counters = self.counters.setdefault(endpoint, {'hits': 0, 'misses': 0, 'stores': 0})
+            counters[name] += 1
+
+    def _current_version_key(self):
+        version_key = hashlib.sha1(repr(self.version()).encode('utf-8')).hexdigest()[:12]
+        if version_key != self._version_key:
+            if self._version_key is not None and isinstance(self.backend, MemoryCacheBackend):
+                self.backend.clear()
+            self._version_key = version_key
+        return version_key
+
+    def make_key(self, endpoint, args, query_params=('q',), list_params=(), exact_params=()):
+        """
+        args: istek parametreleri (get / getlist destekleyen MultiDict). exact_params olduğu gibi
+        (büyük/küçük harf korunarak) anahtara girer: sayfa cursor'ı, alan adları vb.
+        """
+        parts = [normalize_query(args.get(name, '')) for name in query_params]
+        for name in list_params:
+            parts.append(sorted(normalize_query(value) for value in args.getlist(name) if value))
+        parts.extend(args.get(name, '') for name in exact_params)
+        params = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+        return f"{self._current_version_key()}:{endpoint}:{params}"
+
+    def lookup(self, endpoint, key):
+        body = self.backend.get(key)
+        self._count(endpoint, 'misses' if body is None else 'hits')
+        return body
+
+    def store(self, endpoint, key, body, ttl):
+        """Hatasız JSON gövdesini saklar"""
+        payload = json.loads(body)
+        if isinstance(payload, dict) and 'error' in payload:
+            return
+        self.backend.set(key, body, ttl)
+        self._count(endpoint, 'stores')
+
+    def stats(self):
+        with self._lock:
+            counters = {endpoint: dict(values) for endpoint, values in self.counters.items()}
+        for values in counters.values():
+            lookups = values['hits'] + values['misses']
+            values['hit_ratio'] = round(values['hits'] / lookups, 3) if lookups else 0.0
+        stats = {'enabled': self.enabled, 'backend': type(self.backend).__name__, 'endpoints': counters}
+        if isinstance(self.backend, MemoryCacheBackend):
+            stats['entries'] = len(self.backend)
+            stats['max_entries'] = self.backend.max_entries
+        return stats
+
+    def cached(self, endpoint, ttl, query_params=('q',), list_params=(), exact_params=()):
+        """Flask view dekoratörü"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                key = self.make_key(endpoint, request.args, query_params, list_params, exact_params)
+                body = self.lookup(endpoint, key)
+                if body is not None:
+                    response = current_app.response_class(body, mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and response.is_json:
+                    self.store(endpoint, key, response.get_data(as_text=True), ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
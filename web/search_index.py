@@ -0,0 +1,850 @@
+import heapq
+import itertools
+import math
+import re
+import sys
+import threading
+import time
+import traceback
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+
+# Uploader'ın blue/green reload sırasında güncellediği koleksiyon (Upload/upload.py ile aynı)
+GENERATIONS_COLLECTION = "_generations"
+
+# Öneri sıralaması: tür ağırlığı (+ varsa log10(numVotes))
+TITLE_TYPE_WEIGHTS = {
+    'movie': 1.0, 'tvSeries': 0.9, 'tvMiniSeries': 0.8, 'tvMovie': 0.7, 'tvSpecial': 0.5,
+    'video': 0.4, 'videoGame': 0.4, 'short': 0.3, 'tvShort': 0.3, 'tvPilot': 0.2, 'tvEpisode': 0.1,
+}
+DEFAULT_TYPE_WEIGHT = 0.2
+
+
+@lru_cache(maxsize=1)
+def _combining_marks_table():
+    return {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.combining(chr(cp))}
+
+
+def fold_text(text):
+    """Arama anahtarı (converter/uploader ile aynı): NFKD + aksansız + casefold + tek boşluk"""
+    if text.isascii():
+        return ' '.join(text.lower().split())
+    decomposed = unicodedata.normalize('NFKD', text).translate(_combining_marks_table())
+    return ' '.join(decomposed.casefold().split())
+
+
+def document_weight(doc):
+    """Bir kaydın öneri ağırlığı: başlıklarda tür + oy sayısı, isimlerde bilinen iş sayısı"""
+    if 'nconst' in doc:
+        known = doc.get('knownForTitles') or []
+        if isinstance(known, str):
+            known = known.split(',')
+        weight = 0.5 + 0.1 * len(known)
+    else:
+        weight = TITLE_TYPE_WEIGHTS.get(doc.get('titleType'), DEFAULT_TYPE_WEIGHT)
+    votes = doc.get('numVotes')
+    if isinstance(votes, (int, float)) and votes > 0:
+        weight += math.log10(votes)
+    return weight
+
+
+class PrefixIndex:
+    """
+    Sıralı dizi üzerinde önek indeksi
+
+    Anahtarlar (fold_text) sıralı bir listede tutulur; bir önek için eşleşen aralık iki
+    bisect ile bulunur ve aralıktaki en ağırlıklı top_k kayıt döner. Görüntülenen metinler
+    tekilleştirilir ve intern edilir, ağırlıklar array('f') içinde tutulur. Kısa önekler
+    (precomputed_depth) ve büyük aralıklar için top_k sonuçları önceden / ilk istekte hesaplanır.
+    """
+
+    SCAN_LIMIT = 512        # Bu boyuta kadar aralıklar doğrudan taranır
+    MAX_CACHED = 10000      # İlk istekte hesaplanan büyük aralık sonuçları
+
+    def __init__(self, entries, top_k=10, precomputed_depth=2):
+        """
+        Args:
+            entries: (display, key, weight) üçlüleri; key None ise fold_text(display) kullanılır
+            top_k: Önek başına saklanan en fazla sonuç
+            precomputed_depth: Bu uzunluğa kadar tüm önekler kurulumda hesaplanır
+        """
+        best = {}
+        for display, key, weight in entries:
+            if not isinstance(display, str) or not display:
+                continue
+            current = best.get(display)
+            if current is None or weight > current[1]:
+                best[sys.intern(display)] = (key if isinstance(key, str) else None, weight)
+
+        ordered = sorted((key or fold_text(display), display, weight)
+                         for display, (key, weight) in best.items())
+        self.keys = [key for key, _, _ in ordered]
+        self.displays = [display for _, display, _ in ordered]
+        self.weights = array('f', (weight for _, _, weight in ordered))
+        self.top_k = top_k
+        self._top = {}
+
+        for depth in range(1, precomputed_depth + 1):
+            groups = itertools.groupby(range(len(self.keys)), key=lambda i: self.keys[i][:depth])
+            for prefix, positions in groups:
+                positions = list(positions)
+                if len(prefix) == depth and len(positions) > self.SCAN_LIMIT:
+                    self._top[prefix] = self._rank(positions)
+        self._precomputed = len(self._top)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rank(self, positions):
+        return heapq.nlargest(self.top_k, positions, key=self.weights.__getitem__)
+
+    def search(self, query, limit=5):
+        """Önekle başlayan en ağırlıklı `limit` metni döndürür"""
+        prefix = fold_text(query)
+        if not prefix:
+            return []
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\U0010ffff', lo)
+
+        if hi - lo <= self.SCAN_LIMIT:
+            top = heapq.nlargest(limit, range(lo, hi), key=self.weights.__getitem__)
+        else:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._rank(range(lo, hi))
+                if len(self._top) - self._precomputed < self.MAX_CACHED:
+                    self._top[prefix] = top
+        return [self.displays[i] for i in top[:limit]]
+
+
+def build_prefix_index(collection, top_k=10):
+    """Koleksiyondaki başlık / isimlerden PrefixIndex kurar (tek projection taraması)"""
+    sample = collection.find_one() or {}
+    if 'primaryTitle' in sample:
+        display_field, key_field = 'primaryTitle', 'primaryTitleKey'
+    elif 'primaryName' in sample:
+        display_field, key_field = 'primaryName', 'primaryNameKey'
+    else:
+        return PrefixIndex([], top_k)
+
+    projection = {'_id': 0, display_field: 1, key_field: 1, 'titleType': 1, 'numVotes': 1,
+                  'nconst': 1, 'knownForTitles': 1}
+    cursor = collection.find({}, projection, batch_size=10000)
+    return PrefixIndex(((doc.get(display_field), doc.get(key_field), document_weight(doc)) for doc in cursor),
+                       top_k)
+
+
+_TOKEN_RE = re.compile(r'\w+')
+_NO_TOKEN = 0xFFFFFFFF
+
+
+def tokenize(text):
+    """Katlanmış metni kelimelere böler ("Çiçek, Straße!" -> ["cicek", "strasse"])"""
+    return _TOKEN_RE.findall(fold_text(text)) if isinstance(text, str) else []
+
+
+class _KeyColumn:
+    """
+    Doğal anahtarlar (tt0000001, nm0000001) için sıkıştırılmış sütun
+
+    Tüm anahtarlar aynı önek + sayı biçimindeyse yalnızca sayılar array('I') içinde tutulur;
+    uymayan ilk anahtarda düz string listesine geçilir.
+    """
+
+    def __init__(self):
+        self.prefix = None
+        self.numbers = array('I')
+        self.strings = None
+
+    def append(self, key):
+        if self.strings is None:
+            prefix = key.rstrip('0123456789') if isinstance(key, str) else None
+            digits = key[len(prefix):] if prefix else ''
+            if (prefix and self.prefix in (None, prefix) and 7 <= len(digits) <= 9
+                    and (len(digits) == 7 or digits[0] != '0')):
+                self.prefix = prefix
+                self.numbers.append(int(digits))
+                return
+            self.strings = [self[i] for i in range(len(self.numbers))]
+        self.strings.append(key)
+
+    @staticmethod
+    def _format(prefix, number):
+        return f"{prefix}{number:07d}"
+
+    def reorder(self, order):
+        if self.strings is None:
+            self.numbers = array('I', (self.numbers[i] for i in order))
+        else:
+            self.strings = [self.strings[i] for i in order]
+
+    def __len__(self):
+        return len(self.numbers) if self.strings is None else len(self.strings)
+
+    def __getitem__(self, i):
+        if self.strings is None:
+            return self._format(self.prefix, self.numbers[i])
+        return self.strings[i]
+
+
+def _contains(postings, ordinal):
+    i = bisect_left(postings, ordinal)
+    return i < len(postings) and postings[i] == ordinal
+
+
+def _first_at_most(weights, value):
+    """Azalan sıralı weights'te değeri value'dan büyük olmayan ilk konum"""
+    lo, hi = 0, len(weights)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if weights[mid] > value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _merge_unique(lists):
+    last = None
+    for ordinal in heapq.merge(*lists):
+        if ordinal != last:
+            last = ordinal
+            yield ordinal
+
+
+def _trigrams(token):
+    """Kenarları işaretli üçlüler ("abc" -> {"^^a", "^ab", "abc", "bc$", "c$$"})"""
+    padded = f"^^{token}$$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Sınırlı Damerau-Levenshtein (OSA) mesafesi: yer değiştirme tek düzenlemedir
+    ("godfahter" -> "godfather" = 1). Yalnızca köşegene limit uzaklıktaki hücreler
+    hesaplanır; limit aşılınca erken çıkar ve limit + 1 döner.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if limit == 1:
+        return _one_edit_distance(a, b)
+    outside = limit + 1
+    before, previous = None, [j if j <= limit else outside for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [outside] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(lo, hi + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current[lo - 1:hi + 1]) > limit:
+            return outside
+        before, previous = previous, current
+    return min(previous[-1], outside)
+
+
+def _one_edit_distance(a, b):
+    """edit_distance(a, b, 1) için dilim karşılaştırmalı O(n) yol (kısa kelimelerin çoğu)"""
+    if a == b:
+        return 0
+    i = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return 1
+        swapped = i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        return 1 if swapped else 2
+    longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+    return 1 if longer[i + 1:] == shorter[i:] else 2
+
+
+def max_edits(token):
+    """Kelime uzunluğuna göre izin verilen düzenleme: kısa kelimelerde yanlış eşleşme çok olur"""
+    if len(token) < FuzzyVocabulary.MIN_LENGTH or token.isdigit():
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class FuzzyVocabulary:
+    """
+    Yazım hatası toleransı için kelime dağarcığı üzerinde üçlü (trigram) indeksi
+
+    Belgeler değil yalnızca tekil kelimeler indekslenir (milyonlarca başlık, çok daha az
+    kelime). Posting listeleri kelime uzunluğuna göre sıralıdır; sorgu kelimesinin ±d
+    uzunluk aralığı bisect ile kesilir. d düzenleme en fazla 4d üçlüyü bozar (yer
+    değiştirme 4), bu yüzden gerçek bir eşleşme sorgunun en nadir 4d + 1 üçlüsünden en az
+    birini içerir: yalnızca bu listeler birleştirilir, en çok ortak üçlüsü olan MAX_CANDIDATES
+    aday edit_distance ile doğrulanır.
+    """
+
+    MIN_LENGTH = 4          # Daha kısa kelimeler düzeltilmez
+    MAX_CANDIDATES = 300    # Kelime başına mesafesi hesaplanan en fazla aday
+
+    def __init__(self, tokens, frequencies):
+        """
+        Args:
+            tokens: (token, token_id) çiftleri; token_id InvertedIndex.token_ids değeri
+            frequencies: token_id -> belge sayısı fonksiyonu (eşit mesafede sık kelime önce)
+        """
+        entries = sorted(((token, token_id) for token, token_id in tokens
+                          if len(token) >= self.MIN_LENGTH and not token.isdigit()),
+                         key=lambda entry: len(entry[0]))
+        self.tokens = [token for token, _ in entries]
+        self.token_ids = array('I', (token_id for _, token_id in entries))
+        self.lengths = array('B', (min(len(token), 255) for token in self.tokens))
+        self.frequencies = frequencies
+        grams = {}
+        for local_id, token in enumerate(self.tokens):
+            for gram in _trigrams(token):
+                plist = grams.get(gram)
+                if plist is None:
+                    plist = grams[gram] = array('I')
+                plist.append(local_id)
+        self.grams = grams
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def corrections(self, token, limit=8):
+        """
+        Sözlükte token'a en yakın kelimeler: [(token_id, düzeltilmiş kelime, mesafe), ...]
+        (mesafe, sıklık) sırasında, en fazla limit tane. Önce tek düzenleme aranır; uzun
+        kelimelerde iki düzenlemeye yalnızca tek düzenlemeyle aday bulunamazsa genişletilir.
+        """
+        query_grams = _trigrams(token)
+        for edits in range(1, max_edits(token) + 1):
+            found = self._within(token, query_grams, edits)
+            if found:
+                found.sort()
+                return [(token_id, candidate, distance) for distance, _, token_id, candidate in found[:limit]]
+        return []
+
+    def _within(self, token, query_grams, edits):
+        lengths = self.lengths
+        shortest, longest = len(token) - edits, len(token) + edits
+
+        # En nadir 4d + 1 üçlünün uzunluk aralığındaki listeleri
+        slices = []
+        for gram in query_grams:
+            plist = self.grams.get(gram)
+            if plist is None:
+                continue
+            lo = bisect_left(plist, shortest, key=lengths.__getitem__)
+            hi = bisect_left(plist, longest + 1, lo, key=lengths.__getitem__)
+            slices.append(plist[lo:hi])
+        slices.sort(key=len)
+        hits = Counter(itertools.chain.from_iterable(slices[:4 * edits + 1]))
+
+        found = []
+        for local_id, _ in hits.most_common(self.MAX_CANDIDATES):
+            candidate = self.tokens[local_id]
+            # Ortak üçlü sayısı alt sınırı (her düzenleme en fazla 4 üçlüyü bozar)
+            if len(query_grams & _trigrams(candidate)) < len(query_grams) - 4 * edits:
+                continue
+            distance = edit_distance(token, candidate, edits)
+            if distance <= edits:
+                token_id = self.token_ids[local_id]
+                found.append((distance, -self.frequencies(token_id), token_id, candidate))
+        return found
+
+
+class InvertedIndex:
+    """
+    Bellek içi ters indeks (kelime -> posting listesi)
+
+    Belge sıra numaraları statik ağırlığa göre azalan düzende verilir; böylece posting
+    listeleri (array('I'), artan sıralı) aynı zamanda popülerlik sırasındadır. Sorgu en kısa
+    listeyi sürer, diğer kelimeleri bisect ile kontrol eder ve max_candidates eşleşmeden
+    sonra durur: sonuçlar tüm koleksiyon taranmadan, en popüler eşleşmeler arasından
+    metin skoruyla sıralanır. Son kelime önek olarak genişletilir (yazarken arama).
+    """
+
+    MAX_EXPANSIONS = 64     # Son kelime öneki için en fazla kelime (en sık olanlar)
+    MAX_BONUS = 1.5         # Skor - ağırlık üst sınırı: kapsama (en fazla 1) + başlangıç bonusu (0.5)
+    MAX_CORRECTIONS = 8     # Yazım hatalı kelime başına en fazla düzeltme
+    EDIT_PENALTY = 1.0      # Bulanık aramada düzenleme başına skor cezası
+
+    def __init__(self, documents, fuzzy=False):
+        """
+        Args:
+            documents: (key, texts, tags, weight) dörtlüleri. texts[0] ana başlık/isimdir;
+                tags (örn. "genre:drama") yalnızca filtre olarak aranabilir.
+            fuzzy: Yazım hatası toleransı için kelime dağarcığı üçlü indeksini de kur
+        """
+        token_ids = {}
+        postings = []
+        self.keys = _KeyColumn()
+        weights = array('f')
+        lengths = array('B')
+        first_tokens = array('I')
+        token_cache = {}    # Tekrarlanan metinler (türler, "Episode #1.1" vb.) bir kez bölünür
+
+        for ordinal, (key, texts, tags, weight) in enumerate(documents):
+            seen = set()
+            first_token, length = _NO_TOKEN, 0
+            for position, text in enumerate(texts):
+                tokens = token_cache.get(text)
+                if tokens is None:
+                    tokens = tokenize(text)
+                    if len(token_cache) < 100000:
+                        token_cache[text] = tokens
+                for token in itertools.chain(tokens, tags if position == 0 else ()):
+                    token_id = token_ids.get(token)
+                    if token_id is None:
+                        token_id = token_ids[token] = len(postings)
+                        postings.append(array('I'))
+                    if position == 0 and ':' not in token:
+                        length += 1
+                        if first_token == _NO_TOKEN:
+                            first_token = token_id
+                    if token_id not in seen:
+                        seen.add(token_id)
+                        postings[token_id].append(ordinal)
+            self.keys.append(key)
+            weights.append(weight)
+            lengths.append(min(length, 255))
+            first_tokens.append(first_token)
+
+        # Sıra numaralarını ağırlığa göre yeniden ver (0 = en popüler)
+        order = sorted(range(len(weights)), key=weights.__getitem__, reverse=True)
+        rank = array('I', bytes(4 * len(order)))
+        for new, old in enumerate(order):
+            rank[old] = new
+        self.postings = [array('I', sorted(rank[o] for o in plist)) for plist in postings]
+        self.keys.reorder(order)
+        self.weights = array('f', (weights[i] for i in order))
+        self.lengths = array('B', (lengths[i] for i in order))
+        self.first_tokens = array('I', (first_tokens[i] for i in order))
+        self.token_ids = token_ids
+        self.vocabulary = sorted(token for token in token_ids if ':' not in token)
+        self.fuzzy = None
+        if fuzzy:
+            self.fuzzy = FuzzyVocabulary(((token, token_ids[token]) for token in self.vocabulary),
+                                         lambda token_id: len(self.postings[token_id]))
+
+    def __len__(self):
+        return len(self.weights)
+
+    def _expand(self, prefix):
+        lo = bisect_left(self.vocabulary, prefix)
+        hi = bisect_left(self.vocabulary, prefix + '\U0010ffff', lo)
+        token_ids = [self.token_ids[token] for token in self.vocabulary[lo:hi]]
+        if len(token_ids) > self.MAX_EXPANSIONS:
+            token_ids = heapq.nlargest(self.MAX_EXPANSIONS, token_ids, key=lambda t: len(self.postings[t]))
+        return token_ids
+
+    def _plan(self, tokens, tags, start=0):
+        """
+        Eşleşme planı: (driver, driver_size, accept, last_ids) ya da eşleşme yoksa None
+
+        driver popülerlik sırasında start'tan itibaren aday sıra numaralarını üretir,
+        accept(ordinal) diğer kelimeleri kontrol eder.
+        """
+        required = []
+        for token in list(tokens[:-1]) + list(tags):
+            token_id = self.token_ids.get(token)
+            if token_id is None:
+                return None
+            required.append(self.postings[token_id])
+
+        last_ids = self._expand(tokens[-1])
+        if not last_ids:
+            return None
+        expansion = [self.postings[t] for t in last_ids]
+        expansion_size = sum(len(plist) for plist in expansion)
+
+        # Sürücü liste: her aday için tüm genişletme listelerini kontrol etmek, genişletmeleri
+        # birleştirip sürmekten ucuzsa en kısa zorunlu liste
+        required.sort(key=len)
+        if required and len(required[0]) * len(expansion) < expansion_size:
+            filters = required[1:]
+            accept = lambda ordinal: (all(_contains(plist, ordinal) for plist in filters)
+                                      and any(_contains(plist, ordinal) for plist in expansion))
+            driver = required[0]
+            driver = driver[bisect_left(driver, start):] if start else driver
+            return driver, len(driver), accept, last_ids
+
+        accept = lambda ordinal: all(_contains(plist, ordinal) for plist in required)
+        if start:
+            expansion = [plist[bisect_left(plist, start):] for plist in expansion]
+            expansion_size = sum(len(plist) for plist in expansion)
+        return _merge_unique(expansion), expansion_size, accept, last_ids
+
+    def search(self, query, limit=10, tags=(), max_candidates=1000):
+        """
+        Args:
+            query: Serbest metin; tüm kelimeler eşleşmeli, son kelime önek olabilir
+            limit: Döndürülecek sonuç sayısı
+            tags: Ek filtre kelimeleri (örn. ["genre:drama"])
+            max_candidates: Skorlanacak en fazla eşleşme (popülerlik sırasında ilk N)
+
+        Returns:
+            ([(key, score), ...], total, exact) - exact False ise total tahmindir
+        """
+        hits, total, exact, _ = self.search_page(query, limit, tags, max_candidates)
+        return hits, total, exact
+
+    def search_page(self, query, limit=10, tags=(), max_candidates=1000, after=None):
+        """
+        Skor sırasında (eşitlikte sıra numarasına göre) bir sayfa sonuç
+
+        İlk sayfa search() ile aynıdır: popülerlik sırasındaki ilk max_candidates eşleşme
+        skorlanır. Bu eşleşmelerin kapladığı sıra numarası aralığı (pencere) cursor'a yazılır;
+        sonraki sayfalar aynı pencerede (score, ordinal) eşiğinin altından devam eder, pencere
+        bitince bir sonraki pencere aynı şekilde açılır. Böylece her eşleşme tam bir kez döner:
+        pencere içinde skor sırası kesindir, pencereler popülerlik sırasındadır. Pencere içinde
+        sıra numaraları ağırlığa göre azalan olduğundan skoru eşikten büyük olamayacak ilk
+        belgeye bisect ile atlanır ve ağırlık + MAX_BONUS sayfanın en düşük skorunun altına
+        inince tarama durur.
+
+        Args:
+            after: Önceki sayfanın next_after değeri (score, ordinal, window_start, window_end);
+                None ise ilk sayfa. score None ise window_start'tan yeni bir pencere açılır.
+
+        Returns:
+            ([(key, score), ...], total, exact, next_after) - next_after sonraki sayfa yoksa None;
+            total after verildiğinde yalnızca taranan bölümü kapsar
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0, True, None
+        if after is None:
+            after = (None, None, 0, None)
+        elif len(after) == 2:
+            # Pencereden önceki cursor'lar: (score, ordinal) tüm listeler üzerinde
+            after = (*after, 0, None)
+        after_score, after_ordinal, window_start, window_end = after
+        hits, total, exact = [], None, True
+        while True:
+            need = limit - len(hits)
+            top, matched, exact_window, window_end = self._scan_window(
+                tokens, tags, need, max_candidates, window_start, window_end, after_score, after_ordinal)
+            if total is None:
+                total, exact = matched, exact_window
+            hits.extend((self.keys[ordinal], round(score, 3)) for score, ordinal in top[:need])
+            if len(top) > need:
+                score, ordinal = top[need - 1]
+                return hits, total, exact, (score, ordinal, window_start, window_end)
+            if window_end is None:
+                return hits, total, exact, None
+            # Pencere bitti: sayfanın kalanı sonraki pencereden doldurulur
+            window_start, window_end, after_score, after_ordinal = window_end, None, None, None
+            if len(hits) == limit:
+                # Sayfa dolu: sonraki pencerede en az bir eşleşme varsa cursor onu açar
+                more = self._scan_window(tokens, tags, 0, 1, window_start, None)[0]
+                return hits, total, exact, (None, None, window_start, None) if more else None
+
+    def _scan_window(self, tokens, tags, limit, max_candidates, window_start, window_end,
+                     after_score=None, after_ordinal=None):
+        """
+        Penceredeki en iyi limit + 1 eşleşme: ([(score, ordinal), ...], matched, exact, window_end)
+
+        window_end None ise pencere açıktır ve max_candidates eşleşmede kapanır (dönen
+        window_end son eşleşmenin bir sonrası); sonuna kadar taranırsa None kalır.
+        """
+        start = window_start
+        if after_score is not None:
+            # Ağırlığı after_score'dan büyük belgelerin skoru da büyüktür: hepsi önceki sayfalarda
+            start = max(start, _first_at_most(self.weights, after_score))
+        plan = self._plan(tokens, tags, start)
+        if plan is None:
+            return [], 0, True, window_end
+        driver, driver_size, accept, last_ids = plan
+
+        # Skor: popülerlik + kapsama (sorgu kelimeleri / başlık kelimeleri) + başlık sorguyla başlıyorsa bonus
+        first_ids = set(last_ids) if len(tokens) == 1 else {self.token_ids.get(tokens[0])}
+        heap = []   # En iyi limit + 1 sonuç: (score, -ordinal), en kötüsü başta
+        matched, eligible, scanned, exact = 0, 0, 0, True
+        for ordinal in driver:
+            if window_end is not None and ordinal >= window_end:
+                break
+            weight = self.weights[ordinal]
+            if after_score is not None and len(heap) > limit and weight + self.MAX_BONUS < heap[0][0]:
+                # Sonraki belgeler daha hafif: hiçbiri ilk limit + 1'e giremez
+                exact = False
+                break
+            scanned += 1
+            if not accept(ordinal):
+                continue
+            matched += 1
+            coverage = min(len(tokens) / max(self.lengths[ordinal], 1), 1.0)
+            starts = 0.5 if self.first_tokens[ordinal] in first_ids else 0.0
+            score = weight + coverage + starts
+            if after_score is not None and (score > after_score
+                                            or (score == after_score and ordinal <= after_ordinal)):
+                continue
+            entry = (score, -ordinal)
+            if len(heap) <= limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            eligible += 1
+            if window_end is None and eligible >= max_candidates:
+                exact = False
+                window_end = ordinal + 1
+                break
+
+        total = matched if exact else round(matched * driver_size / max(scanned, 1))
+        return [(score, -negative) for score, negative in sorted(heap, reverse=True)], total, exact, window_end
+
+    def fuzzy_search(self, query, limit=10, tags=(), max_candidates=1000):
+        """
+        Yazım hatalarına toleranslı arama ("godfahter" -> "godfather")
+
+        Sözlükte olan kelimeler aynen (son kelime önek olarak), olmayanlar FuzzyVocabulary
+        düzeltmeleriyle aranır; her kelime bir alternatif grubudur ve tüm gruplar eşleşmelidir.
+        Skor search() ile aynıdır, eksi düzenleme başına EDIT_PENALTY: yakın ve popüler
+        eşleşmeler önce gelir. Tek sayfa döner (cursor yok).
+
+        Returns:
+            ([(key, score), ...], total, exact, corrections) - corrections {"godfahter": "godfather"}
+        """
+        tokens = tokenize(query)
+        if self.fuzzy is None or not tokens:
+            return [], 0, True, {}
+
+        groups, corrections = [], {}
+        for position, token in enumerate(tokens):
+            last = position == len(tokens) - 1
+            token_id = self.token_ids.get(token)
+            expanded = self._expand(token) if last else None
+            if expanded:
+                alternatives = [(t, 0) for t in expanded]
+            elif token_id is not None:
+                alternatives = [(token_id, 0)]
+            else:
+                found = self.fuzzy.corrections(token, self.MAX_CORRECTIONS)
+                if not found:
+                    return [], 0, True, corrections
+                alternatives = [(t, distance) for t, _, distance in found]
+                corrections[token] = found[0][1]
+            groups.append([(self.postings[t], distance, t) for t, distance in alternatives])
+        for tag in tags:
+            token_id = self.token_ids.get(tag)
+            if token_id is None:
+                return [], 0, True, corrections
+            groups.append([(self.postings[token_id], 0, token_id)])
+        first_ids = {t for _, _, t in groups[0]}
+
+        # Sürücü: toplam posting boyutu en küçük grup (popülerlik sırasında birleştirilir)
+        groups.sort(key=lambda group: sum(len(plist) for plist, _, _ in group))
+        driver_size = sum(len(plist) for plist, _, _ in groups[0])
+        driver = _merge_unique([plist for plist, _, _ in groups[0]])
+
+        heap, matched, scanned, exact = [], 0, 0, True
+        for ordinal in driver:
+            scanned += 1
+            distance = 0
+            for group in groups:
+                best = min((d for plist, d, _ in group if _contains(plist, ordinal)), default=None)
+                if best is None:
+                    break
+                distance += best
+            else:
+                matched += 1
+                coverage = min(len(tokens) / max(self.lengths[ordinal], 1), 1.0)
+                starts = 0.5 if self.first_tokens[ordinal] in first_ids else 0.0
+                entry = (self.weights[ordinal] + coverage + starts - self.EDIT_PENALTY * distance, -ordinal)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+                if matched >= max_candidates:
+                    exact = False
+                    break
+
+        total = matched if exact else round(matched * driver_size / max(scanned, 1))
+        hits = [(self.keys[-negative], round(score, 3)) for score, negative in sorted(heap, reverse=True)]
+        return hits, total, exact, corrections
+
+    def matching_keys(self, query, tags=(), limit=1000):
+        """
+        Tüm eşleşmelerin anahtarları; limit'ten fazla eşleşme varsa None (geniş sorgu)
+        """
+        tokens = tokenize(query)
+        plan = self._plan(tokens, tags) if tokens else None
+        if plan is None:
+            return []
+        driver, _, accept, _ = plan
+
+        keys = []
+        for ordinal in driver:
+            if accept(ordinal):
+                if len(keys) >= limit:
+                    return None
+                keys.append(self.keys[ordinal])
+        return keys
+
+    def count(self, query, tags=(), limit=None):
+        """
+        Kesin eşleşme sayısı (skorlamadan); limit verilirse limit'e ulaşınca durur
+
+        Returns:
+            (count, capped) - capped True ise gerçek sayı en az count'tur
+        """
+        tokens = tokenize(query)
+        plan = self._plan(tokens, tags) if tokens else None
+        if plan is None:
+            return 0, False
+        driver, _, accept, _ = plan
+
+        count = 0
+        for ordinal in driver:
+            if accept(ordinal):
+                count += 1
+                if limit is not None and count > limit:
+                    return limit, True
+        return count, False
+
+
+def decade_of(year):
+    """1994 / "1994" -> 1990 (geçersizse None)"""
+    try:
+        return int(year) // 10 * 10
+    except (TypeError, ValueError):
+        return None
+
+
+def title_facet_tags(title_type=None, start_year=None):
+    """Facet filtre kelimeleri ("movie", 1994 -> ["type:movie", "decade:1990"])"""
+    tags = []
+    if title_type:
+        tags.append(f"type:{fold_text(title_type)}")
+    decade = decade_of(start_year)
+    if decade is not None:
+        tags.append(f"decade:{decade}")
+    return tags
+
+
+def build_inverted_index(collection, fuzzy=False):
+    """Koleksiyondan InvertedIndex kurar (başlık/isim, tür ve meslek alanları; fuzzy: yazım hatası indeksi)"""
+    sample = collection.find_one() or {}
+    if 'tconst' in sample:
+        key_field, text_fields, tag_field = 'tconst', ['primaryTitle', 'originalTitle'], 'genres'
+    elif 'nconst' in sample:
+        key_field, text_fields, tag_field = 'nconst', ['primaryName'], 'primaryProfession'
+    else:
+        return InvertedIndex([], fuzzy)
+    tag_name = 'genre' if tag_field == 'genres' else 'profession'
+
+    projection = dict.fromkeys([key_field, *text_fields, tag_field, 'titleType', 'startYear', 'numVotes',
+                                'knownForTitles'], 1)
+    projection['_id'] = 0
+
+    def documents():
+        for doc in collection.find({}, projection, batch_size=10000):
+            values = doc.get(tag_field) or []
+            if isinstance(values, str):
+                values = values.split(',')
+            texts = [doc.get(field) for field in text_fields] + values
+            tags = [f"{tag_name}:{fold_text(value)}" for value in values]
+            if key_field == 'tconst':
+                tags.extend(title_facet_tags(doc.get('titleType'), doc.get('startYear')))
+            yield doc.get(key_field), texts, tags, document_weight(doc)
+
+    return InvertedIndex(documents(), fuzzy)
+
+
+class GenerationWatcher:
+    """
+    Koleksiyonun generation işaretine bağlı, arka planda yeniden kurulan bellek içi nesne
+
+    get() en fazla check_interval saniyede bir _generations kaydını okur; işaret (generation,
+    swap zamanı, uploader'ın revision sayacı) değiştiyse builder() ayrı bir thread'de çalışır ve
+    bitene kadar eski nesne sunulmaya devam eder. İlk kurulum bitene kadar get() None döner
+    (çağıran MongoDB sorgusuna düşer). blocking=True ise kurulum çağıran thread'de yapılır
+    (ucuz nesneler için, örn. koleksiyon profili).
+    """
+
+    _UNSET = object()
+
+    def __init__(self, db, collection_name, builder, name="index", check_interval=5.0, blocking=False):
+        self.db = db
+        self.collection_name = collection_name
+        self.builder = builder
+        self.name = name
+        self.check_interval = check_interval
+        self.blocking = blocking
+        self.value = None
+        self._token = self._UNSET
+        self.snapshot = (None, None)
+        self._checked = float('-inf')
+        self._lock = threading.Lock()
+        self._building = None
+
+    @property
+    def token(self):
+        """Şu anki nesnenin kurulduğu generation işareti (henüz kurulmadıysa None)"""
+        return None if self._token is self._UNSET else self._token
+
+    def generation_token(self):
+        meta = self.db[GENERATIONS_COLLECTION].find_one({'_id': self.collection_name})
+        if not meta:
+            return None
+        return meta.get('generation'), meta.get('swapped_at'), meta.get('revision')
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            try:
+                token = self.generation_token()
+            except Exception as e:
+                print(f"⚠️  {self.name}: generation okunamadı: {e}")
+                return self.value
+            if token != self._token:
+                if self.blocking:
+                    self._build(token)
+                else:
+                    self._start_build(token)
+        return self.value
+
+    def refresh(self, wait=True):
+        """Generation'dan bağımsız olarak yeniden kurar"""
+        self._checked = time.monotonic()
+        if self.blocking:
+            self._build(self.generation_token())
+            return self.value
+        thread = self._start_build(self.generation_token())
+        if wait and thread is not None:
+            thread.join()
+        return self.value
+
+    def _start_build(self, token):
+        with self._lock:
+            if self._building is not None:
+                return self._building
+            self._building = threading.Thread(target=self._run_build, args=(token,),
+                                              name=f"{self.name}-build", daemon=True)
+            self._building.start()
+            return self._building
+
+    def _run_build(self, token):
+        try:
+            self._build(token)
+        finally:
+            with self._lock:
+                self._building = None
+
+    def _build(self, token):
+        try:
+            start = time.perf_counter()
+            value = self.builder()
+            self.value = value
+            self._token = token
+            # Nesne ve işareti birlikte okumak için (örn. indekse bağlı sayfa cursor'ları)
+            self.snapshot = (value, token)
+            size = f"{len(value):,} kayıt, " if hasattr(value, '__len__') else ""
+            print(f"✅ {self.name} hazır ({size}{time.perf_counter() - start:.1f} sn)")
+        except Exception as e:
+            print(f"❌ {self.name} kurulamadı: {e}")
+            traceback.print_exc()
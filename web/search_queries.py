@@ -0,0 +1,712 @@
+import base64
+import hashlib
+import json
+import re
+
+from bson import ObjectId
+
+from search_index import fold_text, title_facet_tags
+
+# Toplam sayısı: /api/search en fazla TOTAL_COUNT_CAP'e kadar sayar ("1000+"), kesin sayı
+# gerektiğinde arayüz /api/search/total'ı ayrıca ister
+TOTAL_COUNT_CAP = 1000
+TOTAL_COUNT_TIMEOUT_MS = 5000
+
+# Canlı arama yollarının süre bütçesi (maxTimeMS): aşılırsa MongoDB sorguyu kendisi sonlandırır
+SEARCH_TIMEOUT_MS = 2000
+SUGGESTION_TIMEOUT_MS = 500
+
+# Sayfalama: ?limit= (en fazla MAX_PAGE_SIZE) ve önceki cevabın next_cursor'ı (?cursor=)
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+# ?fuzzy=: "auto" sonuç yoksa yazım hatası düzeltmeleriyle tekrar dener, "1" her zaman, "0" kapalı
+FUZZY_MODES = ('auto', '1', '0')
+
+# ?view= alan kümeleri (None: tüm belge); ?fields=a,b ile alanlar ayrıca seçilebilir
+SEARCH_VIEWS = {
+    'card': ['tconst', 'titleType', 'primaryTitle', 'originalTitle', 'startYear', 'runtimeMinutes', 'genres',
+             'averageRating', 'numVotes', 'cast', 'directors',
+             'nconst', 'primaryName', 'primaryProfession', 'birthYear', 'knownForTitles', 'knownFor'],
+    'full': None,
+}
+DEFAULT_VIEW = 'card'
+RANK_FIELD = 'numVotes'
+_FIELD_NAME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9_]*$')
+
+# Toplu ID sorgusu (/api/lookup): tek istekte en fazla MAX_LOOKUP_IDS ID
+# Facet'ler: eşleşme sayısı bu sınırın altındaysa canlı $facet, üstündeyse yükleme sırasında
+# hesaplanan özet (Upload/upload.py build_facet_summary -> _facets koleksiyonu)
+FACETS_COLLECTION = '_facets'
+FACET_LIVE_LIMIT = 2000
+FACET_TIMEOUT_MS = 1000
+MAX_FACET_VALUES = 20
+
+MAX_LOOKUP_IDS = 500
+ID_FIELDS = {'tt': 'tconst', 'nm': 'nconst'}
+_ID_RE = re.compile(r'^(tt|nm)\d{1,12}$')
+
+
+def genre_tags(genres):
+    """Ters indeks filtre kelimeleri (["Drama"] -> ["genre:drama"])"""
+    return [f"genre:{fold_text(genre)}" for genre in genres]
+
+
+def genre_filter(genres, profile):
+    """?genre=Drama&genre=Short -> tüm türleri içeren kayıtlar"""
+    if profile.is_array('genres'):
+        # Arama şeması: genres dizisi, index'li tam eşleşme
+        return {"genres": {"$all": genres}}
+    # Eski şema: "Drama,Short" metni
+    return {"$and": [{"genres": {"$regex": f"(^|,){re.escape(genre)}(,|$)"}} for genre in genres]}
+
+
+def parse_decade(value):
+    """"1990" / "1990s" -> 1990; onluk değilse ValueError"""
+    text = str(value).strip().lower().rstrip('s')
+    decade = int(text)
+    if decade % 10:
+        raise ValueError(f"Invalid decade: {value}")
+    return decade
+
+
+def search_filters(args):
+    """?genre=, ?type=, ?decade= -> (genres, title_type, decade); geçersiz decade için ValueError"""
+    genres = [genre for genre in args.getlist('genre') if genre]
+    title_type = args.get('type', '').strip() or None
+    decade = args.get('decade', '').strip()
+    return genres, title_type, parse_decade(decade) if decade else None
+
+
+def fuzzy_mode(value):
+    """?fuzzy= -> "auto" / "1" / "0" (boşsa "auto"); geçersiz değer için ValueError"""
+    mode = (value or 'auto').strip().lower()
+    if mode not in FUZZY_MODES:
+        raise ValueError(f"Invalid fuzzy mode: {value}")
+    return mode
+
+
+def facet_tags(title_type=None, decade=None):
+    """Ters indeks filtre kelimeleri (type="movie", decade=1990 -> ["type:movie", "decade:1990"])"""
+    return title_facet_tags(title_type, decade)
+
+
+def facet_filter(title_type, decade):
+    """?type=movie&decade=1990 -> titleType / startYear index'lerini kullanan koşullar"""
+    conditions = []
+    if title_type:
+        conditions.append({"titleType": title_type})
+    if decade is not None:
+        # startYear her iki şemada da sayı (arama şeması 1994, eski converter çıktısı 1994.0): index'li aralık
+        conditions.append({"startYear": {"$gte": decade, "$lt": decade + 10}})
+    return conditions
+
+
+def regex_search_query(query, genres, profile, title_type=None, decade=None):
+    """İndeks hazır değilken kullanılan MongoDB sorgusu (arama alanı yoksa None)"""
+    search_conditions = []
+
+    if profile.has('primaryTitleKey'):
+        # Arama şeması: küçük harfli, aksansız anahtar alanlarında büyük/küçük harf duyarsız regex gerekmez
+        folded = re.escape(fold_text(query))
+        search_conditions.extend([
+            {"primaryTitleKey": {"$regex": folded}},
+            {"originalTitleKey": {"$regex": folded}}
+        ])
+    elif profile.has('primaryTitle'):
+        search_conditions.extend([
+            {"primaryTitle": {"$regex": query, "$options": "i"}},
+            {"originalTitle": {"$regex": query, "$options": "i"}}
+        ])
+
+    # Name search (name.basics için)
+    if profile.has('primaryNameKey'):
+        search_conditions.append(
+            {"primaryNameKey": {"$regex": re.escape(fold_text(query))}}
+        )
+    elif profile.has('primaryName'):
+        search_conditions.append(
+            {"primaryName": {"$regex": query, "$options": "i"}}
+        )
+
+    # Genres search
+    if profile.has('genres'):
+        search_conditions.append(
+            {"genres": {"$regex": query, "$options": "i"}}
+        )
+
+    # Profession search (name.basics için)
+    if profile.has('primaryProfession'):
+        search_conditions.append(
+            {"primaryProfession": {"$regex": query, "$options": "i"}}
+        )
+
+    if not search_conditions:
+        return None
+
+    mongo_query = {"$or": search_conditions}
+    filters = facet_filter(title_type, decade)
+    if genres:
+        filters.append(genre_filter(genres, profile))
+    if filters:
+        mongo_query = {"$and": [mongo_query, *filters]}
+    return mongo_query
+
+
+# Upload/upload.py ile aynı ifadeler: startYear int veya float (1994.0), genres dizi veya "Drama,Short"
+_YEAR_EXPRESSION = {"$convert": {"input": "$startYear", "to": "int", "onError": None, "onNull": None}}
+_DECADE_EXPRESSION = {"$multiply": [{"$floor": {"$divide": [_YEAR_EXPRESSION, 10]}}, 10]}
+_GENRES_EXPRESSION = {"$cond": [{"$isArray": "$genres"}, "$genres",
+                                {"$split": [{"$ifNull": ["$genres", ""]}, ","]}]}
+
+
+def facet_pipeline(match):
+    """Dar sonuç kümeleri için canlı sayım: tek $facet ile titleType, on yıl ve tür"""
+    def counts(expression):
+        return [{"$group": {"_id": expression, "n": {"$sum": 1}}},
+                {"$sort": {"n": -1}}, {"$limit": MAX_FACET_VALUES}]
+
+    return [
+        {"$match": match},
+        {"$facet": {
+            "titleType": counts("$titleType"),
+            "decade": counts(_DECADE_EXPRESSION),
+            "genre": [{"$project": {"g": _GENRES_EXPRESSION}}, {"$unwind": "$g"},
+                      {"$match": {"g": {"$nin": ["", None]}}}, *counts("$g")]
+        }}
+    ]
+
+
+def format_facets(result):
+    """$facet çıktısı -> {"titleType": [{"value": "movie", "count": 12}, ...], ...}"""
+    facets = {}
+    for name in ('titleType', 'decade', 'genre'):
+        rows = [row for row in (result or {}).get(name, []) if row.get('_id') not in (None, '', r'\N')]
+        rows.sort(key=lambda row: (-row['n'], str(row['_id'])))
+        facets[name] = [{'value': int(row['_id']) if name == 'decade' else row['_id'], 'count': row['n']}
+                        for row in rows[:MAX_FACET_VALUES]]
+    return facets
+
+
+def summary_facets(summary, title_type=None, decade=None, genres=(), scale_to=None):
+    """
+    Geniş sorgular için yükleme sırasında hesaplanmış özetten facet sayıları
+
+    Özet metin sorgusunu bilmez; type / decade / ilk tür filtresine uyan satırlar toplanır,
+    scale_to (sorgunun toplam eşleşmesi) verilirse sayılar bu toplama oranlanır. Sonuç
+    her zaman tahmindir (facets_estimated).
+    """
+    def keep(row):
+        return ((not title_type or row.get('t') == title_type)
+                and (decade is None or row.get('d') == decade))
+
+    genre = genres[0] if genres else None
+    genre_rows = [row for row in summary.get('genres', []) if keep(row)]
+    if genre:
+        # Tür filtresi varken tipler / on yıllar o türün satırlarından sayılır
+        base_rows = [row for row in genre_rows if row.get('g') == genre]
+        genre_rows = base_rows
+    else:
+        base_rows = [row for row in summary.get('docs', []) if keep(row)]
+
+    def grouped(rows, field):
+        counts = {}
+        for row in rows:
+            counts[row.get(field)] = counts.get(row.get(field), 0) + row['n']
+        return [{'_id': value, 'n': n} for value, n in counts.items()]
+
+    facets = format_facets({'titleType': grouped(base_rows, 't'), 'decade': grouped(base_rows, 'd'),
+                            'genre': grouped(genre_rows, 'g')})
+
+    base = sum(row['n'] for row in base_rows)
+    if scale_to is not None and base:
+        ratio = min(1.0, scale_to / base)
+        for values in facets.values():
+            for item in values:
+                item['count'] = max(1, round(item['count'] * ratio))
+    return facets
+
+
+def load_facet_summary(db, collection_name):
+    """_facets özet belgesi (yükleyici hiç çalışmadıysa None)"""
+    return db[FACETS_COLLECTION].find_one({'_id': collection_name})
+
+
+def suggestion_pipeline(query, profile):
+    """İndeks hazır değilken kullanılan öneri aggregation'ı (uygun alan yoksa boş liste)"""
+    # Arama şeması: sabitlenmiş (^) ve harf duyarlı regex, *Key index'i üzerinden aralık taraması yapar
+    key_field = next((field for field in ('primaryTitleKey', 'primaryNameKey') if profile.has(field)), None)
+    if key_field:
+        display_field = key_field[:-len('Key')]
+        return [
+            {"$match": {key_field: {"$regex": f"^{re.escape(fold_text(query))}"}}},
+            {"$limit": 50},
+            {"$group": {"_id": f"${display_field}"}},
+            {"$limit": 5},
+            {"$project": {"_id": 0, "suggestion": "$_id"}}
+        ]
+    if profile.has('primaryTitle'):
+        return [
+            {"$match": {"primaryTitle": {"$regex": f"^{query}", "$options": "i"}}},
+            {"$group": {"_id": "$primaryTitle"}},
+            {"$limit": 5},
+            {"$project": {"_id": 0, "suggestion": "$_id"}}
+        ]
+    if profile.has('primaryName'):
+        return [
+            {"$match": {"primaryName": {"$regex": f"^{query}", "$options": "i"}}},
+            {"$group": {"_id": "$primaryName"}},
+            {"$limit": 5},
+            {"$project": {"_id": 0, "suggestion": "$_id"}}
+        ]
+    return []
+
+
+def order_hits(hits, documents, key_field):
+    """İndeks sırasına göre belgeleri dizer, skor ekler (documents: $in sorgusunun sonucu)"""
+    by_key = {doc[key_field]: doc for doc in documents}
+    results = []
+    for key, score in hits:
+        doc = by_key.get(key)
+        if doc is not None:
+            if '_id' in doc:
+                doc['_id'] = str(doc['_id'])
+            doc['score'] = score
+            results.append(doc)
+    return results
+
+
+def page_size(value):
+    """?limit= değeri (geçersizse varsayılan, 1..MAX_PAGE_SIZE aralığına sıkıştırılır)"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def search_projection(view=None, fields=None, key_field=None):
+    """
+    ?view= / ?fields= -> MongoDB projection (None: tüm alanlar)
+
+    Anahtar alan (tconst / nconst) sıralama ve cursor için her zaman dahildir; _id yalnızca
+    istenirse döner.
+    """
+    if fields:
+        names = [name.strip() for name in fields.split(',')]
+        invalid = [name for name in names if not _FIELD_NAME_RE.match(name)]
+        if invalid:
+            raise ValueError(f"Invalid field name: {invalid[0]}")
+    else:
+        view = view or DEFAULT_VIEW
+        if view not in SEARCH_VIEWS:
+            raise ValueError(f"Unknown view: {view} (use one of {', '.join(SEARCH_VIEWS)})")
+        names = SEARCH_VIEWS[view]
+        if names is None:
+            return None
+
+    projection = dict.fromkeys(names, 1)
+    if key_field:
+        projection[key_field] = 1
+    projection.setdefault('_id', 0)
+    return projection
+
+
+def encode_cursor(**fields):
+    """Opak sayfa işareti (URL-safe base64 JSON)"""
+    raw = json.dumps(fields, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """encode_cursor'ın tersi; cursor yoksa None, bozuksa ValueError"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        fields = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(fields, dict):
+        raise ValueError("Invalid cursor")
+    return fields
+
+
+def index_version(token):
+    """İndeks cursor'ları yalnızca kuruldukları indeks için geçerlidir (sıra numaraları)"""
+    return hashlib.sha1(repr(token).encode('utf-8')).hexdigest()[:10]
+
+
+def rank_field(profile):
+    """
+    Regex yolunda popülerlik sırası: yükleyici ilişkileri eklediyse (numVotes) ve
+    (numVotes, anahtar) index'i varsa en çok oy alanlar önce gelir, yoksa anahtar sırası
+    """
+    return RANK_FIELD if profile.is_indexed(RANK_FIELD) else None
+
+
+def search_sort(key_field, rank=None):
+    """Regex yolu sıralaması: [(numVotes, -1), (anahtar, 1)] veya [(anahtar, 1)]"""
+    return ([(rank, -1)] if rank else []) + [(key_field, 1)]
+
+
+def keyset_query(mongo_query, key_field, cursor, rank=None):
+    """
+    Regex yolu için keyset sayfalama (skip yok): search_sort sırasında son sonuçtan sonrakiler
+
+    cursor: {"k": son anahtar, "n": son sonucun numVotes değeri} (rank yoksa yalnızca "k")
+    """
+    if cursor is None:
+        return mongo_query
+    after = cursor['k']
+    if key_field == '_id':
+        after = ObjectId(after)
+    condition = {key_field: {"$gt": after}}
+    if rank:
+        after_rank = cursor.get('n')
+        if after_rank is None:
+            # Azalan sıralamada numVotes'u olmayanlar en sondadır
+            condition = {rank: None, key_field: {"$gt": after}}
+        else:
+            condition = {"$or": [{rank: {"$lt": after_rank}}, {rank: None},
+                                 {rank: after_rank, key_field: {"$gt": after}}]}
+    return {"$and": [mongo_query, condition]}
+
+
+def keyset_cursor(results, key_field, limit, rank=None):
+    """limit + 1 sonuç okunduysa fazlasını atar ve sonraki sayfanın cursor'ını döner"""
+    if len(results) <= limit:
+        return results, None
+    results = results[:limit]
+    if rank:
+        return results, encode_cursor(k=str(results[-1][key_field]), n=results[-1].get(rank))
+    return results, encode_cursor(k=str(results[-1][key_field]))
+
+
+def stats_payload(total_docs, collection_name, database_name, profile):
+    stats_data = {
+        'total_documents': total_docs,
+        'collection_name': collection_name,
+        'database_name': database_name
+    }
+
+    if profile.fields:
+        stats_data['sample_fields'] = profile.fields
+        stats_data['record_type'] = profile.kind
+        stats_data['indexed_fields'] = sorted({index[0] for index in profile.indexes} - {'_id'})
+    return stats_data
+
+
+def parse_lookup_ids(values):
+    """
+    ID listesi -> (sırası korunmuş tekil ID'ler, geçersizler)
+
+    values: ["tt0111161", "nm0000151", ...]; virgüllü metinler de açılır ("tt1,tt2")
+    """
+    ids, invalid, seen = [], [], set()
+    for value in values:
+        for id_ in str(value).split(','):
+            id_ = id_.strip()
+            if not id_ or id_ in seen:
+                continue
+            seen.add(id_)
+            (ids if _ID_RE.match(id_) else invalid).append(id_)
+    return ids, invalid
+
+
+def lookup_projection(view=None, fields=None):
+    """search_projection gibi; karışık listeler için iki anahtar alan da döner"""
+    projection = search_projection(view, fields)
+    if projection is not None:
+        projection.update(dict.fromkeys(ID_FIELDS.values(), 1))
+    return projection
+
+
+def lookup_query(ids, profile):
+    """
+    ID'ler için tek $in sorgusu (tconst / nconst index'leri); koleksiyonda olmayan
+    türdeki ID'ler sorguya girmez. Sorgulanacak ID yoksa None.
+    """
+    conditions = []
+    for prefix, field in ID_FIELDS.items():
+        values = [id_ for id_ in ids if id_.startswith(prefix)]
+        if values and (not profile.fields or profile.has(field)):
+            conditions.append({field: {"$in": values}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+
+def documents_by_id(documents):
+    """$in sonucu -> {id: belge} (_id metne çevrilir)"""
+    by_id = {}
+    for doc in documents:
+        if '_id' in doc:
+            doc['_id'] = str(doc['_id'])
+        id_ = next((doc[field] for field in ID_FIELDS.values() if field in doc), None)
+        if id_ is not None:
+            by_id[id_] = doc
+    return by_id
+
+
+# --- /api/* handler'larının ortak kısmı ---
+# app.py (Flask + pymongo) ve async_app.py (Quart + Motor) yalnızca I/O yapar (find / count / aggregate);
+# parametre ayrıştırma, sorgu kurma ve cevap gövdeleri buradadır, iki uygulama aynı cevabı döner.
+
+MIN_QUERY_LENGTH = 2
+CURSOR_EXPIRED = {'results': [], 'error': 'Cursor expired, search again'}
+NO_SEARCH_FIELDS = {'results': [], 'total': 0, 'error': 'No searchable fields found'}
+SEARCH_TIMED_OUT = {'results': [], 'total': 0, 'timed_out': True, 'error': 'Search timed out'}
+# Hata alanı olan cevap önbelleğe alınmaz
+SUGGESTIONS_TIMED_OUT = {'suggestions': [], 'timed_out': True, 'error': 'Suggestions timed out'}
+
+
+def query_text(args):
+    """?q= (MIN_QUERY_LENGTH karakterden kısaysa None)"""
+    query = args.get('q', '').strip()
+    return query if len(query) >= MIN_QUERY_LENGTH else None
+
+
+def hits_query(hits, key_field):
+    """İndeks sonuçlarının belgeleri için tek $in sorgusu (hits: [(key, score), ...])"""
+    return {key_field: {"$in": [key for key, _ in hits]}}
+
+
+class TotalRequest:
+    """/api/search/total parametreleri: ?q=, ?genre=, ?type=, ?decade="""
+
+    def __init__(self, query, args, profile):
+        self.query = query
+        self.profile = profile
+        self.genres, self.title_type, self.decade = search_filters(args)
+        self.tags = genre_tags(self.genres) + facet_tags(self.title_type, self.decade)
+
+    @classmethod
+    def parse(cls, args, profile):
+        """(istek, None) veya hemen dönülecek cevapla (None, cevap)"""
+        query = query_text(args)
+        if query is None:
+            return None, cls.short_reply(args.get('q', '').strip())
+        try:
+            return cls(query, args, profile), None
+        except ValueError as e:
+            return None, cls.error_reply(e)
+
+    @staticmethod
+    def short_reply(query):
+        return {'total': 0, 'query': query}
+
+    @staticmethod
+    def error_reply(error):
+        return {'total': None, 'error': str(error)}
+
+    def regex_query(self):
+        """İndeks hazır değilken kullanılan MongoDB sorgusu (arama alanı yoksa None)"""
+        return regex_search_query(self.query, self.genres, self.profile, self.title_type, self.decade)
+
+    def reply(self, total):
+        return {'total': total, 'query': self.query}
+
+    def timed_out(self):
+        return {'total': None, 'timed_out': True, 'query': self.query}
+
+
+class SearchRequest(TotalRequest):
+    """
+    /api/search parametreleri ve cevap gövdeleri
+
+    Toplamlar ve facet'ler yalnızca ilk sayfada döner; sonraki sayfalar sadece sonuç ve
+    next_cursor içerir. payload handler'ların ekledikleriyle (total, facets) büyür.
+    """
+
+    def __init__(self, query, args, profile):
+        super().__init__(query, args, profile)
+        self.limit = page_size(args.get('limit'))
+        self.key_field = profile.key_field
+        self.sort_field = profile.key_field or '_id'
+        self.fuzzy = fuzzy_mode(args.get('fuzzy'))
+        self.cursor = decode_cursor(args.get('cursor'))
+        self.projection = search_projection(args.get('view'), args.get('fields'), self.sort_field)
+        self.rank = rank_field(profile)
+        self.first_page = self.cursor is None
+        self.with_facets = self.first_page and args.get('facets') == '1' and profile.kind == 'title'
+        self.payload = {'query': query, 'genres': self.genres, 'type': self.title_type, 'decade': self.decade}
+
+    @staticmethod
+    def short_reply(query):
+        return {'results': [], 'total': 0, 'next_cursor': None}
+
+    @staticmethod
+    def error_reply(error):
+        return {'results': [], 'total': 0, 'error': str(error)}
+
+    def reply(self, results, next_cursor=None):
+        return {'results': results, 'next_cursor': next_cursor, **self.payload}
+
+    # İndeks yolu
+
+    def uses_index(self, index):
+        """İndeks hazır ve cursor (varsa) indeks cursor'ı"""
+        return index is not None and (self.cursor is None or 'i' in self.cursor)
+
+    def cursor_expired(self, version=None):
+        """
+        Cursor bu yol için geçersiz mi: indeks yolunda başka bir indeks sürümünün cursor'ı
+        (version verilir), regex yolunda indeks artık kullanılmıyorken indeks cursor'ı
+        """
+        if self.cursor is None:
+            return False
+        if version is None:
+            return 'k' not in self.cursor
+        return self.cursor.get('v') != version
+
+    def index_page(self, index, version):
+        """Bu sayfanın indeks sonuçları: (hits, total, exact, next_cursor)"""
+        after = tuple(self.cursor['i']) if self.cursor else None
+        hits, total, exact, next_after = index.search_page(self.query, limit=self.limit, tags=self.tags,
+                                                           after=after)
+        next_cursor = encode_cursor(i=list(next_after), v=version) if next_after else None
+        return hits, total, exact, next_cursor
+
+    def fuzzy_first(self, index):
+        """?fuzzy=1: ilk sayfa doğrudan yazım hatası toleranslı aramayla"""
+        return self.first_page and self.fuzzy == '1' and index.fuzzy is not None
+
+    def fuzzy_fallback(self, index, total):
+        """?fuzzy=auto: tam eşleşme yoksa aynı sorgu düzeltmelerle tekrar denenir ("godfahter" -> "godfather")"""
+        return self.first_page and total == 0 and self.fuzzy == 'auto' and index.fuzzy is not None
+
+    def fuzzy_page(self, index):
+        """Yazım hatalarına toleranslı tek sayfa: (hits, total, exact, corrections)"""
+        return index.fuzzy_search(self.query, limit=self.limit, tags=self.tags)
+
+    def fuzzy_reply(self, results, total, exact, corrections):
+        self.payload.update(total=total, total_estimated=not exact, total_capped=False,
+                            fuzzy=True, corrections=corrections)
+        return self.reply(results)
+
+    def hits_query(self, hits):
+        return hits_query(hits, self.key_field)
+
+    def ordered(self, hits, documents):
+        return order_hits(hits, documents, self.key_field)
+
+    def index_totals(self, total, exact):
+        if self.first_page:
+            self.payload.update(total=total, total_estimated=not exact, total_capped=False)
+
+    def index_facet_match(self, index, total):
+        """Dar küme: eşleşen anahtarlar tconst index'i üzerinden tek $in ile sayılır -> (match, narrow)"""
+        keys = index.matching_keys(self.query, self.tags, FACET_LIVE_LIMIT) if total <= FACET_LIVE_LIMIT else None
+        return ({self.sort_field: {"$in": keys}} if keys else None), keys is not None
+
+    # Regex yolu
+
+    def page_find(self, mongo_query):
+        """
+        Keyset sayfası (skip yok): (filter, projection, sort); limit + 1 belge okunur,
+        fazlası sonraki sayfa olduğunu gösterir (regex_page)
+        """
+        projection = self.projection
+        if self.rank and projection is not None:
+            projection = {**projection, self.rank: 1}
+        return (keyset_query(mongo_query, self.sort_field, self.cursor, self.rank), projection,
+                search_sort(self.sort_field, self.rank))
+
+    def regex_page(self, documents):
+        """limit + 1 belge -> (results, next_cursor); _id metne çevrilir"""
+        results, next_cursor = keyset_cursor(documents, self.sort_field, self.limit, self.rank)
+        for result in results:
+            if '_id' in result:
+                result['_id'] = str(result['_id'])
+        return results, next_cursor
+
+    def regex_totals(self, total, capped):
+        self.payload.update(total=total, total_capped=capped)
+
+    # Facet'ler: dar sonuç kümesinde canlı $facet, geniş kümede yükleme sırasında hesaplanmış özet
+
+    @staticmethod
+    def wants_live_facets(match, narrow, total):
+        return bool(total) and narrow and match is not None
+
+    @staticmethod
+    def live_facets(result):
+        """facet_pipeline sonucu (ilk belge, yoksa {})"""
+        return {'facets': format_facets(result), 'facets_source': 'live', 'facets_estimated': False}
+
+    def estimated_facets(self, summary, total):
+        """Canlı sayım yapılmadığında: boş küme, özet yoksa None, varsa özetten tahmin"""
+        if not total:
+            return self.live_facets({})
+        if summary is None:
+            return {'facets': None, 'facets_source': None}
+        return {'facets': summary_facets(summary, self.title_type, self.decade, self.genres, scale_to=total),
+                'facets_source': 'summary', 'facets_estimated': True}
+
+
+def suggestions_reply(rows):
+    """Öneri aggregation'ı (suggestion_pipeline) sonucu -> cevap"""
+    return {'suggestions': [row['suggestion'] for row in rows]}
+
+
+class LookupRequest:
+    """
+    /api/lookup parametreleri: GET ?ids=tt0111161,nm0000151 veya POST {"ids": [...], "view": "card"}
+    """
+
+    def __init__(self, raw_ids, view=None, fields=None):
+        self.ids, self.invalid = parse_lookup_ids(raw_ids)
+        if len(self.ids) > MAX_LOOKUP_IDS:
+            raise ValueError(f'Too many ids: {len(self.ids)} (max {MAX_LOOKUP_IDS})')
+        self.projection = lookup_projection(view, fields)
+
+    @classmethod
+    def parse(cls, args, body=None):
+        """body: POST isteğinin JSON gövdesi (GET için None). (istek, None) veya (None, hata cevabı)"""
+        try:
+            if body is not None:
+                body = body if isinstance(body, dict) else {}
+                raw_ids = body.get('ids') or []
+                if not isinstance(raw_ids, list):
+                    raise ValueError('"ids" must be a list')
+                return cls(raw_ids, body.get('view'), body.get('fields')), None
+            return cls(args.getlist('ids'), args.get('view'), args.get('fields')), None
+        except ValueError as e:
+            return None, {'results': [], 'error': str(e)}
+
+    def namespace(self, generation_token):
+        """Sıcak ID önbelleği anahtarı: koleksiyon generation'ı + projection (reload / sync sonrası eskiler okunmaz)"""
+        return index_version((generation_token, sorted((self.projection or {}).items())))
+
+    def reply(self, found):
+        return {
+            'results': [found[id_] for id_ in self.ids if id_ in found],
+            'missing': [id_ for id_ in self.ids if id_ not in found],
+            'invalid': self.invalid
+        }
+
+
+def cache_payload(response_cache, hot_ids):
+    """/api/cache: önbellek isabet / ıska sayaçları (bu worker)"""
+    return {**response_cache.stats(), 'hot_ids': hot_ids.stats()}
+
+
+def metrics_payload(metrics, response_cache, hot_ids, slow_query_ms):
+    """/metrics: rota ve MongoDB komut gecikmeleri, önbellek oranları, yavaş sorgular (bu worker)"""
+    return {**metrics.snapshot(), 'cache': response_cache.stats(), 'hot_ids': hot_ids.stats(),
+            'slow_query_ms': slow_query_ms}
+
+
+HEALTHY = {'status': 'ok'}
+
+
+def readiness(ping, search_index, suggestion_index, settings):
+    """/readyz: (cevap, HTTP durumu); ping: MongoConnection.ping() sonucu (ok, latency_ms, error)"""
+    ok, latency_ms, error = ping
+    payload = {'status': 'ready' if ok else 'unavailable', 'mongo': {'ok': ok, 'latency_ms': latency_ms},
+               'indexes': {'search_index': search_index.value is not None,
+                           'suggestion_index': suggestion_index.value is not None},
+               'settings': settings.describe()}
+    if error:
+        payload['mongo']['error'] = error
+    return payload, 200 if ok else 503
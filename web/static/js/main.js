@@ -1,6 +1,77 @@
 let searchTimeout;
 let suggestionTimeout;
 let isSearched = false;
+let nextCursor = null;
+let currentQuery = '';
+
+// Facet filtreleri (tür, on yıl, kategori); yeni sorgu yazılınca sıfırlanır
+const activeFilters = { type: null, decade: null, genre: null };
+const FACET_GROUPS = [
+  { name: 'titleType', param: 'type', label: value => value },
+  { name: 'decade', param: 'decade', label: value => `${value}s` },
+  { name: 'genre', param: 'genre', label: value => value }
+];
+const FACET_CHIPS_PER_GROUP = 6;
+
+// Sunucudan ve kullanıcıdan gelen metinler innerHTML'e yalnızca bununla girer (başlık, isim, facet değeri)
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+
+function escapeHtml(value) {
+  return String(value ?? '').replace(/[&<>"']/g, char => HTML_ESCAPES[char]);
+}
+
+function searchParams(query, extra = {}) {
+  const params = new URLSearchParams({ q: query });
+  Object.entries(activeFilters).forEach(([param, value]) => {
+    if (value != null) params.set(param, value);
+  });
+  Object.entries(extra).forEach(([param, value]) => params.set(param, value));
+  return params.toString();
+}
+
+// Her kanalda yalnızca en son istek yaşar: yenisi başlarken eskisi iptal edilir (AbortController),
+// sıra numarası sunucuya da gönderilir ve geç gelen eski cevaplar yok sayılır
+const sessionId = Math.random().toString(36).slice(2, 12);
+const channels = {
+  search: { seq: 0, controller: null },
+  suggestions: { seq: 0, controller: null },
+  total: { seq: 0, controller: null },
+  more: { seq: 0, controller: null }
+};
+
+function cancelRequest(name) {
+  const channel = channels[name];
+  channel.seq += 1;
+  if (channel.controller) {
+    channel.controller.abort();
+    channel.controller = null;
+  }
+}
+
+function latestFetch(name, url) {
+  cancelRequest(name);
+  const channel = channels[name];
+  const seq = channel.seq;
+  const controller = new AbortController();
+  channel.controller = controller;
+
+  return fetch(url, {
+    signal: controller.signal,
+    headers: { 'X-Search-Session': sessionId, 'X-Search-Seq': String(seq) }
+  })
+    .then(response => response.json())
+    .then(data => {
+      if (seq !== channel.seq) {
+        throw new DOMException('Stale response', 'AbortError');
+      }
+      channel.controller = null;
+      return data;
+    });
+}
+
+function isAbort(err) {
+  return err && err.name === 'AbortError';
+}
 
 const searchBox = document.getElementById('searchBox');
 const container = document.getElementById('container');
@@ -12,12 +83,14 @@ const noResults = document.getElementById('noResults');
 const suggestions = document.getElementById('suggestions');
 const resultsHeader = document.getElementById('resultsHeader');
 const stats = document.getElementById('stats');
+const loadMore = document.getElementById('loadMore');
+const facets = document.getElementById('facets');
 
 // Stats yükle
 fetch('/api/stats')
   .then(response => response.json())
   .then(data => {
-    stats.innerHTML = `📊 ${data.total_documents?.toLocaleString()} records`;
+    stats.textContent = `📊 ${data.total_documents?.toLocaleString()} records`;
   })
   .catch(() => {
     stats.innerHTML = '📊 Database not connected';
@@ -41,6 +114,13 @@ searchBox.addEventListener('input', (e) => {
   clearTimeout(searchTimeout);
   clearTimeout(suggestionTimeout);
 
+  // Yazılan sorgu değişti: önceki önekler için süren istekler artık gereksiz
+  cancelRequest('search');
+  cancelRequest('suggestions');
+  cancelRequest('total');
+  cancelRequest('more');
+  clearFilters();
+
   if (query.length < 2) {
     hideResults();
     hideSuggestions();
@@ -60,13 +140,12 @@ searchBox.addEventListener('input', (e) => {
 
 // Öneriler için fetch
 function fetchSuggestions(query) {
-  fetch(`/api/suggestions?q=${encodeURIComponent(query)}`)
-    .then(response => response.json())
+  latestFetch('suggestions', `/api/suggestions?q=${encodeURIComponent(query)}`)
     .then(data => {
       showSuggestions(data.suggestions || []);
     })
     .catch(err => {
-      console.error('Suggestions error:', err);
+      if (!isAbort(err)) console.error('Suggestions error:', err);
     });
 }
 
@@ -78,7 +157,7 @@ function showSuggestions(suggestionsList) {
   }
 
   suggestions.innerHTML = suggestionsList
-    .map(s => `<div class="suggestion-item" onclick="selectSuggestion('${s.replace(/'/g, "\\'")}')">${s}</div>`)
+    .map(s => `<div class="suggestion-item" data-value="${escapeHtml(s)}">${escapeHtml(s)}</div>`)
     .join('');
 
   suggestions.style.display = 'block';
@@ -87,10 +166,16 @@ function showSuggestions(suggestionsList) {
 // Öneri seçildiğinde
 function selectSuggestion(suggestion) {
   searchBox.value = suggestion;
+  clearFilters();
   hideSuggestions();
   performSearch(suggestion);
 }
 
+suggestions.addEventListener('click', (e) => {
+  const item = e.target.closest('.suggestion-item');
+  if (item) selectSuggestion(item.dataset.value);
+});
+
 // Önerileri gizle
 function hideSuggestions() {
   suggestions.style.display = 'none';
@@ -108,76 +193,206 @@ function performSearch(query) {
   showLoading();
   hideResults();
   hideSuggestions();
+  cancelRequest('suggestions');
+  cancelRequest('more');
 
-  fetch(`/api/search?q=${encodeURIComponent(query)}`)
-    .then(response => response.json())
+  currentQuery = query;
+  setNextCursor(null);
+
+  latestFetch('search', `/api/search?${searchParams(query, { facets: 1 })}`)
     .then(data => {
       hideLoading();
       if (data.results && data.results.length > 0) {
-        showResults(data.results, data.total, query);
+        showResults(data.results, data.total, query, data);
+        showFacets(data);
+        setNextCursor(data.next_cursor);
       } else {
         showNoResults();
       }
     })
     .catch(err => {
+      if (isAbort(err)) return;
       hideLoading();
       console.error('Search error:', err);
       showNoResults();
     });
 }
 
-// Sonuçları göster
-function showResults(resultsList, total, query) {
-  resultsHeader.innerHTML = `"${query}"  ${total.toLocaleString()} result found`;
-
-  results.innerHTML = resultsList.map(item => {
-    let title, info, description;
-
-    // title.basics formatı
-    if (item.primaryTitle) {
-      title = item.primaryTitle;
-      info = [
-        item.titleType && `<span class="info-badge">${item.titleType}</span>`,
-        item.startYear && `<span class="info-badge">${item.startYear}</span>`,
-        item.runtimeMinutes && `<span class="info-badge">${item.runtimeMinutes} minute</span>`
-      ].filter(Boolean).join('');
-
-      description = [
-        item.originalTitle !== item.primaryTitle ? `Original title: ${item.originalTitle}` : null,
-        item.genres ? `Genres: ${item.genres}` : null
-      ].filter(Boolean).join(' • ');
-    }
-    // name.basics formatı
-    else if (item.primaryName) {
-      title = item.primaryName;
-      info = [
-        item.primaryProfession && `<span class="info-badge">${item.primaryProfession}</span>`,
-        item.birthYear && `<span class="info-badge">${item.birthYear}</span>`
-      ].filter(Boolean).join('');
-
-      description = [
-        item.knownForTitles ? `Bilinen işleri: ${item.knownForTitles}` : null
-      ].filter(Boolean).join(' • ');
-    }
-    else {
-      title = 'Unknown';
-      info = '';
-      description = JSON.stringify(item, null, 2);
-    }
+// Sonraki sayfa (cursor ile, skip yok)
+function loadMoreResults() {
+  if (!nextCursor) return;
+  const query = currentQuery;
+  loadMore.disabled = true;
+
+  latestFetch('more', `/api/search?${searchParams(query, { cursor: nextCursor })}`)
+    .then(data => {
+      if (query !== currentQuery) return;
+      if (data.results && data.results.length > 0) {
+        results.insertAdjacentHTML('beforeend', data.results.map(renderResult).join(''));
+      }
+      setNextCursor(data.next_cursor);
+    })
+    .catch(err => {
+      if (!isAbort(err)) console.error('Load more error:', err);
+    })
+    .finally(() => {
+      loadMore.disabled = false;
+    });
+}
+
+function setNextCursor(cursor) {
+  nextCursor = cursor || null;
+  if (loadMore) loadMore.style.display = nextCursor ? 'block' : 'none';
+}
+
+if (loadMore) loadMore.addEventListener('click', loadMoreResults);
+
+// Facet çipleri: sayılar dar sonuçlarda kesin, geniş sonuçlarda yükleme özetinden tahmin (~)
+function showFacets(data) {
+  if (!facets) return;
+  if (!data.facets) {
+    facets.innerHTML = '';
+    return;
+  }
+  const prefix = data.facets_estimated ? '~' : '';
 
-    return `
-      <div class="result-item">
-        <div class="result-title">${title}</div>
-        <div class="result-info">${info}</div>
-        <div class="result-description">${description}</div>
-      </div>
-    `;
+  facets.innerHTML = FACET_GROUPS.map(group => {
+    const active = activeFilters[group.param];
+    const values = (data.facets[group.name] || []).slice(0, FACET_CHIPS_PER_GROUP);
+    if (active != null && !values.some(item => String(item.value) === String(active))) {
+      values.unshift({ value: active, count: null });
+    }
+    return values.map(item => {
+      const isActive = String(item.value) === String(active);
+      const count = item.count != null ? ` ${prefix}${item.count.toLocaleString()}` : '';
+      return `<button type="button" class="facet-chip${isActive ? ' active' : ''}" data-param="${group.param}" data-value="${escapeHtml(item.value)}">${escapeHtml(group.label(item.value))}${count}</button>`;
+    }).join('');
   }).join('');
+}
+
+// Çipe tıklama: filtreyi ekler / kaldırır, ilk sayfadan yeniden arar
+function toggleFacet(param, value) {
+  activeFilters[param] = String(activeFilters[param]) === String(value) ? null : value;
+  performSearch(currentQuery);
+}
+
+function clearFilters() {
+  Object.keys(activeFilters).forEach(param => { activeFilters[param] = null; });
+  if (facets) facets.innerHTML = '';
+}
+
+if (facets) {
+  facets.addEventListener('click', (e) => {
+    const chip = e.target.closest('.facet-chip');
+    if (chip) toggleFacet(chip.dataset.param, chip.dataset.value);
+  });
+}
+
+// Toplam sayı: "1000+" (üst sınıra ulaşıldı) veya "~N" (tahmin)
+function formatTotal(total, data) {
+  if (data.total_capped) return `${total.toLocaleString()}+`;
+  if (data.total_estimated) return `~${total.toLocaleString()}`;
+  return total.toLocaleString();
+}
+
+// Kesin toplamı ayrıca iste (ilk sonuçları bekletmeden)
+function fetchExactTotal(query) {
+  latestFetch('total', `/api/search/total?${searchParams(query)}`)
+    .then(data => {
+      if (data.total == null || searchBox.value.trim() !== query) return;
+      resultsHeader.innerHTML = `"${escapeHtml(query)}"  ${data.total.toLocaleString()} result found`;
+    })
+    .catch(err => {
+      if (!isAbort(err)) console.error('Total error:', err);
+    });
+}
+
+// "godfahter" -> Showing results for "godfather"
+function fuzzyNote(query, corrections = {}) {
+  const words = query.split(/\s+/).map(word => corrections[word.toLowerCase()] || word);
+  return `Showing results for "${escapeHtml(words.join(' '))}"`;
+}
+
+// Sonuçları göster
+function showResults(resultsList, total, query, data = {}) {
+  resultsHeader.innerHTML = `"${escapeHtml(query)}"  ${formatTotal(total, data)} result found`;
+  if (data.fuzzy) {
+    // Yazım hatası düzeltildi: kesin toplam düzeltilmiş sorguya ait olduğundan ayrıca istenmez
+    resultsHeader.innerHTML += `<div class="fuzzy-note">${fuzzyNote(query, data.corrections)}</div>`;
+  } else if (data.total_capped || data.total_estimated) {
+    fetchExactTotal(query);
+  }
+
+  results.innerHTML = resultsList.map(renderResult).join('');
 
   resultsContainer.classList.add('visible');
   noResults.classList.remove('visible');
 }
 
+// Tek sonuç kartı
+function renderResult(item) {
+  let title, info, description;
+
+  // title.basics formatı
+  if (item.primaryTitle) {
+    title = item.primaryTitle;
+    info = [
+      item.titleType && `<span class="info-badge">${escapeHtml(item.titleType)}</span>`,
+      item.startYear && `<span class="info-badge">${escapeHtml(item.startYear)}</span>`,
+      item.runtimeMinutes && `<span class="info-badge">${escapeHtml(item.runtimeMinutes)} minute</span>`,
+      item.averageRating != null && `<span class="info-badge">⭐ ${escapeHtml(item.averageRating)}${escapeHtml(formatVotes(item.numVotes))}</span>`
+    ].filter(Boolean).join('');
+
+    // Oyuncular ve yönetmenler yükleme sırasında belgeye gömülür (ek istek yok); metin olarak birleştirilip kaçırılır
+    description = escapeHtml([
+      item.originalTitle !== item.primaryTitle ? `Original title: ${item.originalTitle}` : null,
+      item.genres ? `Genres: ${[].concat(item.genres).join(', ')}` : null,
+      item.directors && item.directors.length ? `Director: ${personNames(item.directors)}` : null,
+      item.cast && item.cast.length ? `Cast: ${personNames(item.cast)}` : null
+    ].filter(Boolean).join(' • '));
+  }
+  // name.basics formatı
+  else if (item.primaryName) {
+    title = item.primaryName;
+    info = [
+      item.primaryProfession && `<span class="info-badge">${escapeHtml([].concat(item.primaryProfession).join(', '))}</span>`,
+      item.birthYear && `<span class="info-badge">${escapeHtml(item.birthYear)}</span>`
+    ].filter(Boolean).join('');
+
+    const knownFor = item.knownFor && item.knownFor.length
+      ? item.knownFor.map(title => title.startYear ? `${title.primaryTitle} (${title.startYear})` : title.primaryTitle).join(', ')
+      : item.knownForTitles && [].concat(item.knownForTitles).join(', ');
+    description = escapeHtml([
+      knownFor ? `Bilinen işleri: ${knownFor}` : null
+    ].filter(Boolean).join(' • '));
+  }
+  else {
+    title = 'Unknown';
+    info = '';
+    description = escapeHtml(JSON.stringify(item, null, 2));
+  }
+
+  return `
+    <div class="result-item">
+      <div class="result-title">${escapeHtml(title)}</div>
+      <div class="result-info">${info}</div>
+      <div class="result-description">${description}</div>
+    </div>
+  `;
+}
+
+function personNames(people) {
+  return people.map(person => person.primaryName || person.nconst).join(', ');
+}
+
+// Oy sayısı: " (1.2M)" / " (8.4K)"
+function formatVotes(votes) {
+  if (!votes) return '';
+  if (votes >= 1e6) return ` (${(votes / 1e6).toFixed(1)}M)`;
+  if (votes >= 1e3) return ` (${(votes / 1e3).toFixed(1)}K)`;
+  return ` (${votes})`;
+}
+
 // Sonuç yok
 function showNoResults() {
   hideResults();
@@ -196,6 +411,7 @@ function hideLoading() {
 
 // Sonuçları gizle
 function hideResults() {
+  setNextCursor(null);
   resultsContainer.classList.remove('visible');
   noResults.classList.remove('visible');
 }
@@ -0,0 +1,209 @@
+import asyncio
+import json
+
+import pytest
+from pymongo.errors import ConnectionFailure
+
+mongomock = pytest.importorskip("mongomock")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+pytest.importorskip("quart")
+
+import app as flask_app  # noqa: E402
+import async_app  # noqa: E402
+from search_index import fold_text  # noqa: E402
+
+TITLES = ['Star Wars', 'Star Trek', 'Night of the Living Dead', 'The Godfather', 'Love Actually',
+          'Starship Troopers', 'A Star Is Born', 'Day of the Dead', 'Wars of the Roses', 'Dead Man']
+
+
+def title_documents():
+    documents = []
+    for i, title in enumerate(TITLES * 3):
+        documents.append({'tconst': f"tt{i:07d}", 'titleType': 'movie' if i % 2 else 'short',
+                          'primaryTitle': title, 'originalTitle': title, 'primaryTitleKey': fold_text(title),
+                          'originalTitleKey': fold_text(title), 'startYear': 1950 + i * 2,
+                          'genres': ['Drama', 'Horror'] if 'Dead' in title else ['Comedy'],
+                          'numVotes': 1000 - i * 7})
+    return documents
+
+
+@pytest.fixture(scope='module')
+def apps():
+    client = mongomock.MongoClient()
+    collection = client['imdb_database']['movies']
+    collection.insert_many(title_documents())
+    collection.create_index('tconst', unique=True)
+    collection.create_index([('numVotes', -1), ('tconst', 1)])
+
+    flask_app.mongo._client = client
+    async_app.sync_client._client = client
+    async_app.mongo['collection'] = mongomock_motor.AsyncMongoMockClient(
+        mock_mongo_client=client)['imdb_database']['movies']
+    for module in (flask_app, async_app):
+        module.response_cache.enabled = False
+        for watcher in (module.collection_profile, module.search_index, module.suggestion_index,
+                        module.facet_summary):
+            watcher.refresh()
+    yield flask_app.app.test_client(), async_app.app.test_client()
+
+
+def get_flask(client, url):
+    response = client.get(url)
+    return response.status_code, response.get_json()
+
+
+def get_quart(client, url):
+    async def call():
+        response = await client.get(url)
+        return response.status_code, json.loads(await response.get_data(as_text=True))
+    return asyncio.run(call())
+
+
+# Async paths that tag queries with comment= (regex search, lookup) are left out: mongomock rejects it
+PARITY_URLS = [
+    '/api/search?q=star', '/api/search?q=star&limit=2', '/api/search?q=dead&genre=Horror&type=movie',
+    '/api/search?q=dead&decade=1970', '/api/search?q=stra+wras&fuzzy=auto', '/api/search?q=star&fuzzy=1',
+    '/api/search?q=star&fields=primaryTitle', '/api/search?q=s', '/api/search?q=star&decade=1995',
+    '/api/search?q=star&view=nope', '/api/search?q=star&cursor=bad', '/api/search?q=star&fuzzy=maybe',
+    '/api/search/total?q=the', '/api/search/total?q=dead&genre=Horror', '/api/search/total?q=x',
+    '/api/search/total?q=the&decade=abc', '/api/suggestions?q=sta', '/api/suggestions?q=s',
+    '/api/lookup?ids=bad,nm1x', '/healthz',
+]
+
+
+@pytest.mark.parametrize('url', PARITY_URLS)
+def test_flask_and_async_apps_return_the_same_response(apps, url):
+    flask_client, quart_client = apps
+    assert get_flask(flask_client, url) == get_quart(quart_client, url)
+
+
+def test_cursor_pages_match_between_apps(apps):
+    flask_client, quart_client = apps
+    url = '/api/search?q=the&limit=2'
+    pages = []
+    while url:
+        flask_page, quart_page = get_flask(flask_client, url)[1], get_quart(quart_client, url)[1]
+        assert flask_page == quart_page
+        pages.extend(result['tconst'] for result in flask_page['results'])
+        cursor = flask_page['next_cursor']
+        url = f'/api/search?q=the&limit=2&cursor={cursor}' if cursor else None
+    assert len(pages) == len(set(pages)) == sum('the' in fold_text(title).split() for title in TITLES * 3)
+
+
+def test_regex_path_pages_by_votes(apps, monkeypatch):
+    flask_client, _ = apps
+    monkeypatch.setattr(flask_app, 'SEARCH_INDEX_ENABLED', False)
+    _, first = get_flask(flask_client, '/api/search?q=dead&limit=4')
+    assert first['total'] == 9 and first['total_capped'] is False
+    votes = [result['numVotes'] for result in first['results']]
+    assert votes == sorted(votes, reverse=True)
+    _, second = get_flask(flask_client, f"/api/search?q=dead&limit=4&cursor={first['next_cursor']}")
+    assert 'total' not in second
+    assert not {r['tconst'] for r in first['results']} & {r['tconst'] for r in second['results']}
+
+
+def test_index_cursor_expires_on_regex_path(apps, monkeypatch):
+    flask_client, _ = apps
+    _, page = get_flask(flask_client, '/api/search?q=star&limit=1')
+    monkeypatch.setattr(flask_app, 'SEARCH_INDEX_ENABLED', False)
+    _, expired = get_flask(flask_client, f"/api/search?q=star&limit=1&cursor={page['next_cursor']}")
+    assert expired == {'results': [], 'error': 'Cursor expired, search again'}
+
+
+def test_lookup_post_keeps_input_order(apps):
+    flask_client, _ = apps
+    payload = flask_client.post('/api/lookup', json={'ids': ['tt0000003', 'tt0000001', 'tt9999999'],
+                                                    'fields': 'primaryTitle'}).get_json()
+    assert [result['tconst'] for result in payload['results']] == ['tt0000003', 'tt0000001']
+    assert payload['missing'] == ['tt9999999']
+    assert flask_client.post('/api/lookup', json={'ids': 'tt1'}).get_json()['error'] == '"ids" must be a list'
+
+
+def test_superseded_request_skips_mongodb(apps, monkeypatch):
+    flask_client, _ = apps
+    monkeypatch.setattr(flask_app, 'SEARCH_INDEX_ENABLED', False)
+    headers = {'X-Search-Session': 'superseded-test', 'X-Search-Seq': '5'}
+    assert 'cancelled' not in flask_client.get('/api/search?q=dead', headers=headers).get_json()
+    stale = flask_client.get('/api/search?q=dea', headers={**headers, 'X-Search-Seq': '4'}).get_json()
+    assert stale == {'results': [], 'total': 0, 'cancelled': True, 'error': 'Superseded by a newer request'}
+
+
+def test_regex_total_is_capped_and_exact_total_is_deferred(apps, monkeypatch):
+    flask_client, _ = apps
+    monkeypatch.setattr(flask_app, 'SEARCH_INDEX_ENABLED', False)
+    monkeypatch.setattr(flask_app, 'TOTAL_COUNT_CAP', 5)
+    _, page = get_flask(flask_client, '/api/search?q=dead&limit=2')
+    assert (page['total'], page['total_capped']) == (5, True)
+    _, single = get_flask(flask_client, '/api/search?q=dead&limit=50')
+    assert (single['total'], single['total_capped']) == (9, False)
+    assert get_flask(flask_client, '/api/search/total?q=dead')[1] == {'total': 9, 'query': 'dead'}
+
+
+def test_response_cache_behaves_the_same_in_both_apps(apps, monkeypatch):
+    flask_client, quart_client = apps
+    for module in (flask_app, async_app):
+        monkeypatch.setattr(module.response_cache, 'enabled', True)
+        module.response_cache.backend.clear()
+
+    async def quart_headers(url):
+        return (await quart_client.get(url)).headers.get('X-Cache')
+
+    url = '/api/suggestions?q=Sta'
+    assert [flask_client.get(url).headers.get('X-Cache') for _ in range(2)] == ['MISS', 'HIT']
+    assert [asyncio.run(quart_headers(url)) for _ in range(2)] == ['MISS', 'HIT']
+    assert get_flask(flask_client, url) == get_quart(quart_client, url)
+
+
+def test_repeated_lookup_is_served_from_hot_id_cache(apps, monkeypatch):
+    flask_client, _ = apps
+    first = get_flask(flask_client, '/api/lookup?ids=tt0000004,tt0000002')[1]
+    hits = flask_app.hot_ids.hits
+    monkeypatch.setattr(flask_app.search_collection, 'find', None, raising=False)
+    assert get_flask(flask_client, '/api/lookup?ids=tt0000004,tt0000002')[1] == first
+    assert flask_app.hot_ids.hits == hits + 2
+    assert [result['tconst'] for result in first['results']] == ['tt0000004', 'tt0000002']
+
+
+def test_readiness_follows_mongo_ping_and_liveness_does_not(apps, monkeypatch):
+    flask_client, quart_client = apps
+    monkeypatch.setattr(flask_app.mongo, 'ping', lambda: (True, 1.5, None))
+    status, body = get_flask(flask_client, '/readyz')
+    assert status == 200 and body['status'] == 'ready' and body['indexes']['search_index']
+    assert body['settings']['host'] == flask_app.MONGO_SETTINGS.describe()['host']
+
+    monkeypatch.setattr(flask_app.mongo, 'ping', lambda: (False, 1000.0, 'timed out'))
+    status, body = get_flask(flask_client, '/readyz')
+    assert status == 503 and body['mongo'] == {'ok': False, 'latency_ms': 1000.0, 'error': 'timed out'}
+    assert get_flask(flask_client, '/healthz') == (200, {'status': 'ok'})
+
+
+class MotorAdmin:
+    def __init__(self, error=None):
+        self.error = error
+        self.pings = 0
+
+    async def command(self, name):
+        self.pings += 1
+        if self.error:
+            raise self.error
+        return {'ok': 1}
+
+
+def test_async_readiness_pings_the_motor_client(apps, monkeypatch):
+    _, quart_client = apps
+    # Senkron bağlantı sağlıklı olsa da istekleri sunan Motor havuzu bozuksa worker hazır değildir
+    monkeypatch.setattr(async_app.sync_client, 'ping', lambda: (True, 1.0, None))
+    broken = MotorAdmin(ConnectionFailure("pool closed"))
+    monkeypatch.setitem(async_app.mongo, 'client', type('Client', (), {'admin': broken})())
+    monkeypatch.delitem(async_app.mongo, 'health', raising=False)
+
+    status, body = get_quart(quart_client, '/readyz')
+    assert status == 503 and body['mongo']['error'] == 'pool closed'
+    assert get_quart(quart_client, '/readyz')[0] == 503 and broken.pings == 1
+
+    healthy = MotorAdmin()
+    async_app.mongo['client'].admin = healthy
+    monkeypatch.setitem(async_app.mongo, 'health', (0.0, None))
+    status, body = get_quart(quart_client, '/readyz')
+    assert status == 200 and body['status'] == 'ready' and healthy.pings == 1
+    assert get_quart(quart_client, '/healthz') == (200, {'status': 'ok'})
@@ -0,0 +1,54 @@
+import pytest
+
+from collection_profile import CollectionProfile, detect_collection_profile
+from search_index import GenerationWatcher
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()['imdb_test']
+
+
+def test_profile_detects_fields_arrays_and_indexes(db):
+    db['movies'].insert_many([{'tconst': 'tt1', 'primaryTitle': 'A', 'genres': ['Drama']},
+                              {'tconst': 'tt2', 'primaryTitleKey': 'b', 'genres': ['Comedy']}])
+    db['movies'].create_index([('numVotes', -1), ('tconst', 1)])
+
+    profile = detect_collection_profile(db['movies'])
+    assert profile.kind == 'title' and profile.key_field == 'tconst'
+    assert profile.fields == ['tconst', 'primaryTitle', 'genres', 'primaryTitleKey']
+    assert profile.is_array('genres') and not profile.is_array('primaryTitle')
+    assert profile.is_indexed('numVotes') and not profile.is_indexed('tconst')
+    assert CollectionProfile().kind is None and CollectionProfile().key_field is None
+
+
+def test_profile_is_detected_once_per_generation(db):
+    db['movies'].insert_one({'nconst': 'nm1', 'primaryName': 'A'})
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return detect_collection_profile(db['movies'])
+
+    watcher = GenerationWatcher(db, 'movies', builder, blocking=True, check_interval=0)
+    for _ in range(5):
+        assert watcher.get().kind == 'name'
+    assert len(builds) == 1
+
+    db['_generations'].insert_one({'_id': 'movies', 'generation': 2, 'swapped_at': 1.0, 'revision': 0})
+    watcher.get()
+    watcher.get()
+    db['_generations'].update_one({'_id': 'movies'}, {'$set': {'revision': 1}})
+    watcher.get()
+    assert len(builds) == 3
+
+
+def test_generation_is_read_at_most_once_per_check_interval(db):
+    reads = []
+    watcher = GenerationWatcher(db, 'movies', CollectionProfile, blocking=True, check_interval=60)
+    watcher.generation_token = lambda: reads.append(1)
+    for _ in range(10):
+        watcher.get()
+    assert len(reads) == 1
@@ -0,0 +1,64 @@
+import itertools
+import random
+
+import pytest
+
+from search_index import FuzzyVocabulary, InvertedIndex, edit_distance
+
+
+def osa_distance(a, b):
+    """Tam tablo ile Damerau-Levenshtein (OSA) mesafesi"""
+    table = [[i + j if not i * j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i, j in itertools.product(range(1, len(a) + 1), range(1, len(b) + 1)):
+        table[i][j] = min(table[i - 1][j] + 1, table[i][j - 1] + 1, table[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+        if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+            table[i][j] = min(table[i][j], table[i - 2][j - 2] + 1)
+    return table[-1][-1]
+
+
+def test_banded_edit_distance_matches_full_table():
+    rng = random.Random(7)
+    for _ in range(3000):
+        a = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 8)))
+        b = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 8)))
+        for limit in (1, 2, 3):
+            assert edit_distance(a, b, limit) == min(osa_distance(a, b), limit + 1), (a, b, limit)
+
+
+def test_corrections_prefer_closer_then_more_frequent_words():
+    tokens = ['godfather', 'godmother', 'father', 'feather', 'heather', 'leather', 'star', 'stars', '1999']
+    counts = {token_id: 10 - token_id for token_id in range(len(tokens))}
+    vocabulary = FuzzyVocabulary(((token, token_id) for token_id, token in enumerate(tokens)), counts.get)
+
+    assert len(vocabulary) == 8
+    assert vocabulary.corrections('godfahter')[0][1:] == ('godfather', 1)
+    assert [word for _, word, _ in vocabulary.corrections('feathar')] == ['feather']
+    assert [word for _, word, _ in vocabulary.corrections('heathers')] == ['heather']
+    # Eşit mesafede sık kelime önce; 8 harften kısa kelimelerde tek düzenleme
+    assert [(word, distance) for _, word, distance in vocabulary.corrections('fether')] == \
+        [('father', 1), ('feather', 1)]
+    assert vocabulary.corrections('lether') == [(5, 'leather', 1)]
+    # Kısa kelimeler ve sayılar düzeltilmez
+    assert vocabulary.corrections('sta') == [] and vocabulary.corrections('1998') == []
+
+
+@pytest.fixture(scope='module')
+def index():
+    documents = [("tt0000001", ["The Godfather"], ["genre:crime"], 3.0),
+                 ("tt0000002", ["The Godfather Part II"], ["genre:crime"], 2.5),
+                 ("tt0000003", ["Dead Poets Society"], ["genre:drama"], 2.0),
+                 ("tt0000004", ["Godmother"], ["genre:comedy"], 1.0)]
+    return InvertedIndex(documents, fuzzy=True)
+
+
+def test_fuzzy_search_corrects_typos_and_keeps_filters(index):
+    hits, total, exact, corrections = index.fuzzy_search('godfahter')
+    assert [key for key, _ in hits] == ['tt0000001', 'tt0000002'] and total == 2 and exact
+    assert corrections == {'godfahter': 'godfather'}
+
+    hits, _, _, corrections = index.fuzzy_search('dead poetz')
+    assert [key for key, _ in hits] == ['tt0000003'] and corrections == {'poetz': 'poets'}
+    assert index.fuzzy_search('ded poets')[0] == []
+    assert index.fuzzy_search('godfahter', tags=['genre:comedy'])[:2] == ([], 0)
+    assert index.fuzzy_search('qwxzyv') == ([], 0, True, {})
+    assert InvertedIndex([("tt1", ["Godfather"], [], 1.0)]).fuzzy_search('godfahter') == ([], 0, True, {})
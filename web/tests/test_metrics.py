@@ -0,0 +1,93 @@
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from metrics import CommandMetrics, LatencyHistogram, Metrics, explain_command, plan_summary, query_shape
+
+
+def test_histogram_percentiles_stay_within_bucket_error():
+    rng = random.Random(3)
+    samples = sorted(rng.lognormvariate(2, 1.2) for _ in range(5000))
+    histogram = LatencyHistogram()
+    for ms in samples:
+        histogram.observe(ms)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = samples[int(q * len(samples)) - 1]
+        assert histogram.percentile(q) == pytest.approx(exact, rel=0.25)
+    summary = histogram.summary()
+    assert summary['count'] == 5000 and summary['max_ms'] == round(samples[-1], 3)
+    assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms'] <= summary['max_ms']
+    assert LatencyHistogram().summary()['p99_ms'] == 0.0
+
+
+def test_replies_count_errors_and_cancellations_from_body():
+    metrics = Metrics()
+    metrics.observe_reply('/api/search', 200, 5.0, cache='HIT', payload={'results': []})
+    metrics.observe_reply('/api/search', 200, 7.0, cache='MISS', payload={'error': 'Search timed out'})
+    metrics.observe_reply('/api/search', 200, 1.0, payload={'error': 'Superseded', 'cancelled': True})
+    metrics.observe_reply('/api/search', 503, 2.0, payload=None)
+
+    route = metrics.snapshot()['routes']['/api/search']
+    assert route['count'] == 4 and route['status'] == {'200': 3, '503': 1}
+    assert (route['errors'], route['cancelled'], route['cache_hit_ratio']) == (1, 1, 0.5)
+
+
+def test_query_shape_and_explain_command_strip_values():
+    assert query_shape({'a': {'$gt': 5}, '$or': [{'b': 'x'}, {'c': {'$in': [1, 2]}}]}) == \
+        {'a': {'$gt': 1}, '$or': [{'b': 1}, {'c': {'$in': 1}}]}
+    command = explain_command('aggregate', {'aggregate': 'titles', 'pipeline': [], 'lsid': {}, '$db': 'imdb'})
+    assert command == {'explain': {'aggregate': 'titles', 'pipeline': [], 'cursor': {}}, 'verbosity': 'queryPlanner'}
+
+
+def test_plan_summary_finds_nested_winning_plans():
+    explain = {'stages': [{'$cursor': {'queryPlanner': {'winningPlan': {
+        'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'numVotes_-1'}}}}},
+        {'$lookup': {'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}}}}]}
+    assert plan_summary(explain) == {'stages': ['FETCH', 'IXSCAN', 'COLLSCAN'], 'indexes': ['numVotes_-1'],
+                                     'collection_scan': True}
+
+
+class ExplainClient:
+    def __init__(self):
+        self.commands = []
+
+    def __getitem__(self, database):
+        return self
+
+    def command(self, command):
+        self.commands.append(command)
+        return {'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}}}
+
+
+def run_command(listener, request_id, ms, failed=False, name='find', query=None):
+    command = {name: 'titles', 'filter': query or {'primaryTitle': {'$regex': 'dead'}}, 'comment': 'search'}
+    listener.started(SimpleNamespace(command_name=name, command=command, connection_id=1,
+                                     request_id=request_id, database_name='imdb'))
+    finished = SimpleNamespace(command_name=name, connection_id=1, request_id=request_id,
+                               duration_micros=int(ms * 1000))
+    (listener.failed if failed else listener.succeeded)(finished)
+
+
+def test_command_listener_times_commands_and_explains_slow_query_shapes_once():
+    metrics, client = Metrics(), ExplainClient()
+    listener = CommandMetrics(metrics, slow_ms=50)
+    listener.explain_with(client)
+
+    run_command(listener, 1, 10)
+    run_command(listener, 2, 80, failed=True)
+    run_command(listener, 3, 120)
+    run_command(listener, 4, 90, query={'primaryTitle': {'$regex': 'star'}})
+    run_command(listener, 5, 500, name='insert')
+
+    deadline = time.monotonic() + 5
+    while any(record['plan'] is None for record in metrics.slow_queries) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    snapshot = metrics.snapshot()
+    assert snapshot['mongo'] == {'find titles': {**snapshot['mongo']['find titles'], 'count': 4, 'failures': 1}}
+    assert [record['duration_ms'] for record in snapshot['slow_queries']] == [90.0, 120.0]
+    assert snapshot['slow_queries'][0]['comment'] == 'search' and snapshot['collection_scans'] == 2
+    # Aynı biçimdeki iki yavaş sorgu için tek explain
+    assert len(client.commands) == 1 and 'comment' in client.commands[0]['explain']
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from search_index import PrefixIndex, fold_text
+
+SYLLABLES = ['ka', 'ta', 'star', 'stra', 'ço', 'ße', 'lo', 'ma', 'ni']
+
+
+@pytest.fixture(scope='module')
+def entries():
+    rng = random.Random(7)
+    titles = {' '.join(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+                       for _ in range(rng.randint(1, 2))) for _ in range(3000)}
+    return [(title, None, rng.random() * 10) for title in sorted(titles)]
+
+
+def brute_force(entries, query, limit):
+    prefix = fold_text(query)
+    matches = [(weight, display) for display, _, weight in entries if fold_text(display).startswith(prefix)]
+    return [display for _, display in sorted(matches, reverse=True)[:limit]]
+
+
+@pytest.mark.parametrize('query', ['k', 's', 'ST', 'sta', 'stra', 'co', 'cosse', 'strasse', 'kata ', 'zz', 'ma ni'])
+@pytest.mark.parametrize('limit', [1, 5, 10])
+def test_prefix_search_returns_heaviest_matches(entries, query, limit):
+    index = PrefixIndex(entries, top_k=10)
+    assert index.search(query, limit) == brute_force(entries, query, limit)
+
+
+def test_duplicate_titles_keep_the_heaviest_weight():
+    index = PrefixIndex([('Dune', None, 1.0), ('Dune', None, 3.0), ('Dunkirk', None, 2.0)])
+    assert len(index) == 2
+    assert index.search('dun') == ['Dune', 'Dunkirk']
+    assert index.search('') == []
@@ -0,0 +1,42 @@
+import pytest
+
+from request_guard import LatestRequests, RedisLatestRequests, request_sequence
+
+
+def test_request_sequence_reads_headers():
+    assert request_sequence({'X-Search-Session': 'abc', 'X-Search-Seq': '7'}) == ('abc', 7)
+    assert request_sequence({'X-Search-Session': 'abc', 'X-Search-Seq': 'x'}) == (None, None)
+    assert request_sequence({'X-Search-Seq': '7'}) == (None, None)
+
+
+def test_older_request_is_superseded():
+    latest = LatestRequests()
+    assert not latest.superseded('s', 'search', 1)
+    assert not latest.superseded('s', 'search', 3)
+    assert latest.superseded('s', 'search', 2)
+    assert not latest.superseded('s', 'search', 3)
+    # Kanallar ve oturumlar birbirini etkilemez
+    assert not latest.superseded('s', 'suggestions', 1)
+    assert not latest.superseded('t', 'search', 1)
+    assert not latest.superseded(None, 'search', 0)
+    assert latest.dropped == 1
+
+
+def test_oldest_sessions_are_evicted():
+    latest = LatestRequests(max_sessions=2)
+    for session in ('a', 'b', 'c'):
+        latest.superseded(session, 'search', 5)
+    assert not latest.superseded('a', 'search', 1)
+    assert latest.superseded('c', 'search', 1)
+
+
+def test_redis_store_is_shared_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    workers = [RedisLatestRequests(client=fakeredis.FakeRedis(server=server)) for _ in range(2)]
+    assert not workers[0].superseded('s', 'search', 1)
+    assert not workers[1].superseded('s', 'search', 2)
+    assert workers[0].superseded('s', 'search', 1)
+    assert not workers[0].superseded('s', 'search', 2)
+    assert workers[0].client.ttl('imdb-seq:search:s') > 0
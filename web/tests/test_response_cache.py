@@ -0,0 +1,85 @@
+import pytest
+from flask import Flask, jsonify
+from werkzeug.datastructures import MultiDict
+
+import response_cache as cache_module
+from response_cache import HotIdCache, MemoryCacheBackend, ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_memory_backend_expires_entries(clock):
+    backend = MemoryCacheBackend()
+    backend.set('a', '1', ttl=10)
+    clock[0] += 9
+    assert backend.get('a') == '1'
+    clock[0] += 2
+    assert backend.get('a') is None and len(backend) == 0
+
+
+def test_memory_backend_evicts_least_recently_used(clock):
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set('a', '1', 60)
+    backend.set('b', '2', 60)
+    backend.get('a')
+    backend.set('c', '3', 60)
+    assert backend.get('b') is None
+    assert (backend.get('a'), backend.get('c')) == ('1', '3')
+
+
+def test_keys_normalize_queries_but_keep_exact_params():
+    cache = ResponseCache(MemoryCacheBackend())
+    key = cache.make_key('search', MultiDict([('q', ' The  Star '), ('genre', 'Drama'), ('genre', 'comedy')]),
+                         list_params=('genre',), exact_params=('cursor',))
+    same = cache.make_key('search', MultiDict([('q', 'the star'), ('genre', 'Comedy'), ('genre', 'drama')]),
+                          list_params=('genre',), exact_params=('cursor',))
+    other_page = cache.make_key('search', MultiDict([('q', 'the star'), ('cursor', 'Ab')]),
+                                exact_params=('cursor',))
+    assert key == same
+    assert other_page != cache.make_key('search', MultiDict([('q', 'the star'), ('cursor', 'ab')]),
+                                        exact_params=('cursor',))
+
+
+def test_new_version_invalidates_entries_and_errors_are_not_stored():
+    version = [1]
+    cache = ResponseCache(MemoryCacheBackend(), version=lambda: version[0])
+    key = cache.make_key('stats', MultiDict())
+    cache.store('stats', key, '{"total": 1}', ttl=60)
+    cache.store('stats', cache.make_key('stats', MultiDict([('q', 'x')])), '{"error": "boom"}', ttl=60)
+    assert cache.lookup('stats', key) == '{"total": 1}'
+    assert len(cache.backend) == 1
+
+    version[0] = 2
+    assert cache.make_key('stats', MultiDict()) != key
+    assert len(cache.backend) == 0
+    assert cache.stats()['endpoints']['stats'] == {'hits': 1, 'misses': 0, 'stores': 1, 'hit_ratio': 1.0}
+
+
+def test_cached_view_answers_hits_without_calling_the_view():
+    app = Flask(__name__)
+    cache = ResponseCache(MemoryCacheBackend())
+    calls = []
+
+    @app.route('/api/suggestions')
+    @cache.cached('suggestions', ttl=60)
+    def suggestions():
+        calls.append(1)
+        return jsonify({'suggestions': ['Star Wars']})
+
+    client = app.test_client()
+    first, second = client.get('/api/suggestions?q=Star'), client.get('/api/suggestions?q=star ')
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('MISS', 'HIT')
+    assert first.get_json() == second.get_json() and len(calls) == 1
+
+
+def test_hot_id_cache_namespaces_entries():
+    hot = HotIdCache(max_entries=10, ttl=60)
+    hot.set_many('gen1', {'tt1': {'tconst': 'tt1'}})
+    assert hot.get_many('gen1', ['tt1', 'tt2']) == ({'tt1': {'tconst': 'tt1'}}, ['tt2'])
+    assert hot.get_many('gen2', ['tt1']) == ({}, ['tt1'])
+    assert hot.stats()['hits'] == 1 and hot.stats()['misses'] == 2
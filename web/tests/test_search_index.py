@@ -0,0 +1,62 @@
+import itertools
+import random
+
+import pytest
+
+from search_index import InvertedIndex
+
+WORDS = ['star', 'wars', 'trek', 'night', 'day', 'love', 'war', 'man', 'the', 'story']
+
+
+@pytest.fixture(scope='module')
+def index():
+    rng = random.Random(1)
+    documents = []
+    for i in range(3000):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 5)))
+        documents.append((f"tt{i:07d}", [title], [], rng.random() * 3))
+    documents.sort(key=lambda document: -document[3])
+    return InvertedIndex(documents)
+
+
+def walk_pages(index, query, limit, max_candidates):
+    hits, after = [], None
+    while True:
+        page, _, _, after = index.search_page(query, limit=limit, max_candidates=max_candidates, after=after)
+        assert len(page) <= limit
+        hits.extend(page)
+        if after is None:
+            return hits
+
+
+@pytest.mark.parametrize('query', ['star', 'the', 'star wa', 'love the', 'm'])
+@pytest.mark.parametrize('limit, max_candidates', list(itertools.product((1, 7, 10), (5, 8, 37, 1000))))
+def test_cursor_pages_return_every_match_exactly_once(index, query, limit, max_candidates):
+    everything = index.search_page(query, limit=10 ** 6, max_candidates=10 ** 9)[0]
+    hits = walk_pages(index, query, limit, max_candidates)
+
+    keys = [key for key, _ in hits]
+    assert len(keys) == len(set(keys))
+    assert set(keys) == {key for key, _ in everything}
+    assert hits[:limit] == index.search(query, limit=limit, max_candidates=max_candidates)[0]
+
+
+@pytest.mark.parametrize('query', ['star', 'love the'])
+def test_uncapped_cursor_pages_equal_one_large_page(index, query):
+    everything = index.search_page(query, limit=10 ** 6, max_candidates=10 ** 9)[0]
+    assert walk_pages(index, query, 7, 10 ** 9) == everything
+
+
+def test_no_match_has_no_cursor(index):
+    assert index.search_page('zzz', limit=10) == ([], 0, True, None)
+
+
+@pytest.mark.parametrize('query', ['star', 'the', 'love the', 'm'])
+def test_capped_totals_never_exceed_the_exact_count(index, query):
+    exact_total, capped = index.count(query)
+    assert not capped
+    _, total, exact = index.search(query, limit=5, max_candidates=50)
+    assert exact == (exact_total <= 50)
+    if exact:
+        assert total == exact_total
+    assert index.count(query, limit=10) == ((10, True) if exact_total > 10 else (exact_total, False))
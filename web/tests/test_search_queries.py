@@ -0,0 +1,151 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from collection_profile import CollectionProfile
+from search_queries import (MAX_LOOKUP_IDS, MAX_PAGE_SIZE, LookupRequest, SearchRequest, decode_cursor,
+                            encode_cursor, format_facets, keyset_cursor, keyset_query, lookup_query, page_size,
+                            parse_lookup_ids, regex_search_query, search_projection, search_sort,
+                            summary_facets)
+
+TITLE_PROFILE = CollectionProfile(['tconst', 'primaryTitle', 'primaryTitleKey', 'genres', 'numVotes'],
+                                  ['genres'], [['tconst'], ['numVotes', 'tconst']])
+
+
+def test_cursor_round_trip_and_bad_cursors():
+    cursor = encode_cursor(k='tt0000010', n=42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == {'k': 'tt0000010', 'n': 42}
+    assert decode_cursor('') is None
+    for bad in ('%%%', 'bm90IGpzb24', 'WzEsMl0'):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_page_size_is_clamped():
+    assert page_size(None) == 10 and page_size('abc') == 10
+    assert page_size('0') == 1 and page_size('500') == MAX_PAGE_SIZE and page_size('7') == 7
+
+
+def test_projection_views_and_fields():
+    assert search_projection('full') is None
+    card = search_projection(None, None, 'tconst')
+    assert card['primaryTitle'] == 1 and card['_id'] == 0
+    assert search_projection(None, 'primaryTitle, startYear', 'tconst') == \
+        {'primaryTitle': 1, 'startYear': 1, 'tconst': 1, '_id': 0}
+    with pytest.raises(ValueError):
+        search_projection('poster')
+    with pytest.raises(ValueError):
+        search_projection(None, 'title.$')
+
+
+def test_keyset_pages_walk_the_whole_sorted_result():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient()['imdb_test']['movies']
+    collection.insert_many([{'tconst': f"tt{i:07d}", 'numVotes': votes}
+                            for i, votes in enumerate([50, 50, 40, None, 40, 10, None, 50, 30, 10, 40])])
+    query, sort = {'tconst': {'$gte': 'tt'}}, search_sort('tconst', 'numVotes')
+    everything = list(collection.find(query, {'_id': 0}).sort(sort))
+
+    pages, cursor = [], None
+    while True:
+        page = list(collection.find(keyset_query(query, 'tconst', cursor, 'numVotes'), {'_id': 0})
+                    .sort(sort).limit(4))
+        page, next_cursor = keyset_cursor(page, 'tconst', 3, 'numVotes')
+        pages.extend(page)
+        if next_cursor is None:
+            break
+        cursor = decode_cursor(next_cursor)
+    assert pages == everything
+    assert [doc['numVotes'] for doc in pages][-2:] == [None, None]
+
+
+def test_search_request_parses_parameters_and_replies():
+    params, reply = SearchRequest.parse(MultiDict([('q', ' star '), ('limit', '5'), ('genre', 'Drama'),
+                                                   ('decade', '1990s'), ('facets', '1')]), TITLE_PROFILE)
+    assert reply is None
+    assert (params.query, params.limit, params.decade, params.rank) == ('star', 5, 1990, 'numVotes')
+    assert params.tags == ['genre:drama', 'decade:1990'] and params.with_facets
+    assert SearchRequest.parse(MultiDict([('q', 'a')]), TITLE_PROFILE) == \
+        (None, {'results': [], 'total': 0, 'next_cursor': None})
+    assert SearchRequest.parse(MultiDict([('q', 'star'), ('decade', '1995')]), TITLE_PROFILE)[1]['error'] == \
+        'Invalid decade: 1995'
+    later, _ = SearchRequest.parse(MultiDict([('q', 'star'), ('cursor', encode_cursor(k='tt1')), ('facets', '1')]),
+                                   TITLE_PROFILE)
+    assert not later.first_page and not later.with_facets and not later.cursor_expired()
+
+
+def test_lookup_ids_are_deduplicated_and_validated():
+    ids, invalid = parse_lookup_ids(['tt0111161, nm0000151', 'tt0111161', 'xx1', '', 'tt12345678901234'])
+    assert ids == ['tt0111161', 'nm0000151'] and invalid == ['xx1', 'tt12345678901234']
+
+
+def test_lookup_query_only_asks_for_ids_the_collection_holds():
+    assert lookup_query(['tt1', 'nm2'], CollectionProfile()) == \
+        {'$or': [{'tconst': {'$in': ['tt1']}}, {'nconst': {'$in': ['nm2']}}]}
+    assert lookup_query(['tt1', 'nm2'], TITLE_PROFILE) == {'tconst': {'$in': ['tt1']}}
+    assert lookup_query(['nm2'], TITLE_PROFILE) is None
+
+
+def test_lookup_request_limits_and_post_bodies():
+    params, reply = LookupRequest.parse(MultiDict(), {'ids': ['tt1', 'nm2'], 'view': 'full'})
+    assert reply is None and params.projection is None
+    assert params.reply({'nm2': {'nconst': 'nm2'}}) == \
+        {'results': [{'nconst': 'nm2'}], 'missing': ['tt1'], 'invalid': []}
+    too_many = MultiDict([('ids', ','.join(f"tt{i}" for i in range(MAX_LOOKUP_IDS + 1)))])
+    assert 'Too many ids' in LookupRequest.parse(too_many)[1]['error']
+    assert LookupRequest.parse(MultiDict(), ['tt1'])[0].ids == []
+    assert params.namespace('gen-1') != params.namespace('gen-2')
+
+
+SUMMARY = {'docs': [{'t': 'movie', 'd': 1990, 'n': 60}, {'t': 'movie', 'd': 2000, 'n': 30},
+                    {'t': 'short', 'd': 1990, 'n': 10}],
+           'genres': [{'t': 'movie', 'd': 1990, 'g': 'Drama', 'n': 40}, {'t': 'movie', 'd': 1990, 'g': 'Crime', 'n': 20},
+                      {'t': 'movie', 'd': 2000, 'g': 'Drama', 'n': 30}, {'t': 'short', 'd': 1990, 'g': 'Drama', 'n': 10}]}
+
+
+def test_format_facets_orders_by_count_and_drops_missing_values():
+    facets = format_facets({'titleType': [{'_id': 'short', 'n': 2}, {'_id': 'movie', 'n': 5}, {'_id': r'\N', 'n': 9}],
+                            'decade': [{'_id': 1990.0, 'n': 3}, {'_id': None, 'n': 4}],
+                            'genre': [{'_id': 'Drama', 'n': 1}, {'_id': 'Action', 'n': 1}]})
+    assert facets == {'titleType': [{'value': 'movie', 'count': 5}, {'value': 'short', 'count': 2}],
+                      'decade': [{'value': 1990, 'count': 3}],
+                      'genre': [{'value': 'Action', 'count': 1}, {'value': 'Drama', 'count': 1}]}
+    assert format_facets(None) == {'titleType': [], 'decade': [], 'genre': []}
+
+
+def test_summary_facets_apply_filters_and_scale_to_total():
+    facets = summary_facets(SUMMARY)
+    assert facets['titleType'] == [{'value': 'movie', 'count': 90}, {'value': 'short', 'count': 10}]
+    assert facets['genre'][0] == {'value': 'Drama', 'count': 80}
+
+    crime = summary_facets(SUMMARY, title_type='movie', genres=['Crime'])
+    assert crime == {'titleType': [{'value': 'movie', 'count': 20}], 'decade': [{'value': 1990, 'count': 20}],
+                     'genre': [{'value': 'Crime', 'count': 20}]}
+
+    scaled = summary_facets(SUMMARY, decade=1990, scale_to=7)
+    assert scaled['titleType'] == [{'value': 'movie', 'count': 6}, {'value': 'short', 'count': 1}]
+    assert summary_facets(SUMMARY, scale_to=1000)['titleType'][0]['count'] == 90
+
+
+def test_search_request_chooses_live_or_summary_facets():
+    params = SearchRequest.parse(MultiDict([('q', 'dead'), ('genre', 'Crime'), ('type', 'movie')]),
+                                 TITLE_PROFILE)[0]
+    assert SearchRequest.wants_live_facets({'tconst': {'$in': ['tt1']}}, True, 3)
+    assert not SearchRequest.wants_live_facets(None, True, 3) and not SearchRequest.wants_live_facets({}, False, 3)
+    assert params.estimated_facets(SUMMARY, 0)['facets_source'] == 'live'
+    assert params.estimated_facets(None, 5) == {'facets': None, 'facets_source': None}
+    estimated = params.estimated_facets(SUMMARY, 5)
+    assert estimated['facets_estimated'] and estimated['facets']['genre'] == [{'value': 'Crime', 'count': 5}]
+
+
+@pytest.mark.parametrize('profile', [TITLE_PROFILE, CollectionProfile(['tconst', 'primaryTitle', 'genres'])])
+def test_decade_filter_matches_numeric_years(profile):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient()['imdb_test']['movies']
+    collection.insert_many([
+        {'tconst': 'tt1', 'primaryTitle': 'Dead Man', 'primaryTitleKey': 'dead man', 'startYear': 1995.0},
+        {'tconst': 'tt2', 'primaryTitle': 'Dead Ringers', 'primaryTitleKey': 'dead ringers', 'startYear': 1988},
+        {'tconst': 'tt3', 'primaryTitle': 'Dead Again', 'primaryTitleKey': 'dead again', 'startYear': 1990},
+        {'tconst': 'tt4', 'primaryTitle': 'Dead Calm', 'primaryTitleKey': 'dead calm', 'startYear': None}])
+    query = regex_search_query('dead', [], profile, decade=1990)
+    assert sorted(doc['tconst'] for doc in collection.find(query)) == ['tt1', 'tt3']